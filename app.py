@@ -1,17 +1,144 @@
 import streamlit as st
 import pandas as pd
-import requests
 import random
 import altair as alt
+import numpy as np
 import re
 import math
+import hashlib
+import os
+from contextlib import closing
 from urllib.parse import quote_plus
 from rapidfuzz import fuzz  # <- antes: from thefuzz import fuzz
 
+from modules.api_cache import coalesced_stats, get_response_cache, outcome_counts, transient_fallback
+from modules.awards_batch import DEFAULT_BATCH as AWARDS_BATCH, iter_batches
+from modules.awards_store import DEFAULT_AWARDS_CSV as AWARDS_CSV, AwardsStore
+from modules.circuit_breaker import PROVIDER_LABELS, breaker_states, degraded_providers
+from modules.http_client import get_client
+from modules.collab_filter import FilmClubModel
+from modules.enrich import DEFAULT_SIDECAR as ENRICHMENT_SIDECAR, EnrichmentSidecar
+from modules.external_apis import (
+    API_BASE, FAKE_API_KEY, IMDB_TO_TMDB, TRAILER_BY_ID, omdb_awards, omdb_lookup_counts, tmdb_details, tmdb_find, tmdb_provider_catalog, tmdb_provider_table,
+    tmdb_region_providers, tmdb_search, tmdb_similar, valid_imdb_id,
+    youtube_trailer,
+)
+from modules.poster_cache import get_poster_cache
+from modules.prefetch import get_background_prefetcher, map_concurrent, session_key
+from modules.rate_limit import quota_degraded, quota_states
+from modules.providers import REGIONS, ProviderIndex
+from modules.rating_model import RatingModel
+from modules.sampler import (
+    POOL_ALL, POOL_FAVOURITES, POOL_RECENT_TOP, POOL_UNRATED, PickHistory, build_pool_sampler,
+)
+from modules.recommender import (
+    ANN_AUTO_MIN_ROWS, build_lsh_index, catalog_version, recommend_for_seeds,
+    recommend_from_catalog,
+)
+
 # ===================== Versión y changelog =====================
-APP_VERSION = "1.1.8"  # <- Nueva versión
+APP_VERSION = "1.4.3"  # <- Nueva versión
 
 CHANGELOG = {
+    "1.4.3": [
+        "Qué ver hoy: el tráiler de la sugerencia se busca sólo al pulsar \"▶️ Ver tráiler\" (con un aviso mientras se resuelve); las sugerencias automáticas ya no gastan cuota de YouTube.",
+        "Los tráilers encontrados se guardan por id de película en la caché persistente y no se vuelven a buscar.",
+    ],
+    "1.4.2": [
+        "Galería: al dibujar una página se adelantan en segundo plano pósters y plataformas de la siguiente y la anterior; pasar de página sale casi siempre de caché.",
+        "El adelanto cede ante las consultas de la página visible y se descarta al cambiar los filtros.",
+    ],
+    "1.4.1": [
+        "Consultas idénticas simultáneas (varias sesiones abriendo el mismo año de los Oscar o la misma página de la galería) comparten una sola llamada a TMDb / OMDb / YouTube.",
+        "Panel de latencia: contador de pedidos coalescidos.",
+    ],
+    "1.4.0": [
+        "Servidor local que imita TMDb, OMDb y YouTube (`python -m modules.fake_apis serve`): responde con datos sintéticos deterministas (o con fixtures exportados de una caché real, si los hay) y puede inyectar latencia, errores, límites de ritmo y cuotas.",
+        "`CATALOGO_API_BASE` apunta la app a ese servidor (o a cualquier otro con las mismas rutas) sin tocar código ni necesitar keys.",
+    ],
+    "1.3.9": [
+        "Estadísticas de premios: consultas en paralelo por tandas (respetando el límite de OMDb), con barra de progreso y tabla que se van llenando.",
+        "Botón para cancelar el cálculo a mitad de camino; lo ya obtenido queda a la vista y en caché.",
+    ],
+    "1.3.8": [
+        "Límite de ritmo y de llamadas simultáneas por proveedor, compartido por todas las sesiones (opcionalmente por todo el host).",
+        "Cuota diaria persistente de OMDb (1.000/día) y YouTube (10.000 unidades; búsqueda = 100): al acercarse al tope se sirven datos en caché, aunque estén vencidos, y se avisa en el banner.",
+    ],
+    "1.3.7": [
+        "Premios: parser del texto de OMDb vectorizado (una pasada por columna) compartido por la consulta en vivo y la carga de los CSV de premios.",
+        "Corregido el conteo de BAFTA (\"Won 2 BAFTA…\" ahora cuenta 2).",
+    ],
+    "1.3.6": [
+        "OMDb: con el id de IMDb (Const) los premios se piden en una sola consulta (i=tt…); la cascada por título queda para filas sin id.",
+        "Panel de latencia: búsquedas OMDb por id vs por título y consultas ahorradas.",
+    ],
+    "1.3.5": [
+        "Premios: se leen primero de `peliculas_con_premios_2025.csv` (cruce por Const / imdb_id); OMDb sólo para películas que falten o quedaron con error.",
+        "Los premios nuevos obtenidos de OMDb se agregan al CSV: \"Estadísticas de premios\" responde al instante en catálogos ya enriquecidos.",
+    ],
+    "1.3.4": [
+        "Pósters: cada uno se descarga una vez a `static/posters/` y se sirven miniaturas WebP al tamaño de la tarjeta (srcset), con caché larga en el navegador.",
+        "Caché de pósters con tope de tamaño y desalojo LRU (`python -m modules.poster_cache stats|prune|clear`).",
+    ],
+    "1.3.3": [
+        "Nuevo filtro \"Disponible en…\": qué películas del catálogo están en cada plataforma de la región elegida.",
+        "Índice inverso plataforma → películas armado con el catálogo paginado de TMDb (/discover), en vez de una consulta por película.",
+    ],
+    "1.3.2": [
+        "Streaming: se guarda la respuesta de proveedores completa (todos los países) una vez por película, en forma compacta.",
+        "Nuevo selector \"Región de streaming\" en la barra lateral; cambiar de país se resuelve en memoria, sin llamadas nuevas.",
+    ],
+    "1.3.1": [
+        "Ficha TMDb en una sola llamada (append_to_response): detalles, streaming, videos y similares; deja en caché lo que piden las demás vistas.",
+        "Tráilers desde los videos de TMDb cuando se conoce el id (sin gastar cuota de YouTube).",
+    ],
+    "1.3.0": [
+        "TMDb: las películas con id de IMDb (Const del export, FilmId de los Óscar) se resuelven por /find en vez de adivinar por título; el par tt → TMDb se guarda para siempre.",
+        "La búsqueda por título queda sólo para filas sin id.",
+    ],
+    "1.2.9": [
+        "Nuevo CLI `python -m modules.enrich`: enriquece todo el catálogo (o la lista de los Óscar) con TMDb y premios OMDb, en paralelo, con checkpoints reanudables.",
+        "La app lee el sidecar `peliculas_enriquecidas.csv` y sólo consulta las APIs para películas que no estén ahí.",
+    ],
+    "1.2.8": [
+        "Circuit breaker por proveedor (TMDb / OMDb / YouTube): si un servicio falla seguido, se deja de esperar sus timeouts y se muestran datos en caché o marcadores.",
+        "Aviso de \"modo degradado\" bajo el título mientras un proveedor está caído.",
+    ],
+    "1.2.7": [
+        "Un timeout o caída puntual de TMDb / OMDb ya no deja \"Sin póster\" hasta reiniciar: los fallos transitorios se cachean unos minutos y se re-validan en segundo plano.",
+        "Los \"no encontrado\" se cachean como negativos; contadores por resultado en el panel de APIs.",
+    ],
+    "1.2.6": [
+        "Cliente HTTP compartido para TMDb / OMDb / YouTube: conexiones keep-alive por host, reintentos con backoff y respeto de Retry-After.",
+        "Opciones avanzadas: panel con la latencia por endpoint (p50 / p95) de las APIs externas.",
+    ],
+    "1.2.5": [
+        "Galería: pósters y streaming de TMDb de toda la página se resuelven en paralelo (pool acotado, conexión compartida).",
+    ],
+    "1.2.4": [
+        "APIs: caché persistente en disco (SQLite) para TMDb, OMDb y YouTube; sobrevive a reinicios.",
+        "APIs: vencimiento por tipo de dato (ids/pósters largos, streaming corto). Compactar: `python -m modules.api_cache compact`.",
+    ],
+    "1.2.3": [
+        "¿Qué ver hoy?: sorteo en O(1) con tablas de alias precalculadas por tipo de pool (sin copiar el catálogo).",
+        "¿Qué ver hoy?: no se repiten sugerencias en la sesión hasta agotar el pool.",
+    ],
+    "1.2.2": [
+        "Nueva columna 'Predicted Rating': nota estimada para pendientes según mis propias notas.",
+        "Orden por nota estimada y filtro por nota estimada mínima en ¿Qué ver hoy? (sólo pendientes).",
+    ],
+    "1.2.1": [
+        "¿Qué ver hoy?: 'Club de cine' — filtrado colaborativo (ALS) a partir de varios exports de IMDb.",
+        "Club de cine: re-ajuste incremental cuando un miembro vuelve a subir su export.",
+    ],
+    "1.2.0": [
+        "Favoritas: 'Porque te encantó…' con películas similares para cada favorita (nota ≥ 9).",
+        "Recomendaciones de todas las favoritas calculadas en lote y cacheadas por versión del catálogo.",
+    ],
+    "1.1.9": [
+        "¿Qué ver hoy?: recomendaciones similares vectorizadas (mismo puntaje, sin recorrer fila a fila).",
+        "¿Qué ver hoy?: modo aproximado (LSH) automático para catálogos muy grandes.",
+    ],
     "1.1.8": [
         "Búsqueda: Fuzzy Search optimizada usando rapidfuzz (más rápida en catálogos grandes).",
         "Búsqueda: Menos comparaciones difusas innecesarias (se priorizan coincidencias literales).",
@@ -88,16 +215,42 @@ st.set_page_config(
 st.title("🎥 Mi catálogo de películas (IMDb)")
 # (Se elimina el caption de versión en cabecera; la versión sólo aparece en el footer)
 
-# ----------------- Config APIs externas -----------------
+def render_degraded_banner(slot):
+    """Aviso de modo degradado si algún proveedor externo tiene el circuito abierto o sin cuota."""
+    degraded = degraded_providers()
+    no_quota = quota_degraded()
+    if not degraded and not no_quota:
+        slot.empty()
+        return
+    msgs = []
+    if degraded:
+        parts = [
+            f"{PROVIDER_LABELS.get(p, p)} (reintento en {int(wait)} s)" if wait > 0 else PROVIDER_LABELS.get(p, p)
+            for p, wait in sorted(degraded.items())
+        ]
+        msgs.append(", ".join(parts) + " no responde")
+    if no_quota:
+        parts = [
+            f"{PROVIDER_LABELS.get(p, p)} (se renueva en {wait / 3600:.1f} h)"
+            for p, wait in sorted(no_quota.items())
+        ]
+        msgs.append("cuota diaria agotada en " + ", ".join(parts))
+    slot.caption(
+        "⚠️ Modo degradado: " + "; ".join(msgs)
+        + ". Se muestran datos en caché o marcadores."
+    )
 
-TMDB_API_KEY = st.secrets.get("TMDB_API_KEY", None)
-TMDB_SEARCH_URL = "https://api.themoviedb.org/3/search/movie"
-TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w342"
+# Se rellena al inicio y otra vez al final del script (el circuito puede abrirse durante el render)
+degraded_slot = st.empty()
+render_degraded_banner(degraded_slot)
 
-TMDB_SIMILAR_URL_TEMPLATE = "https://api.themoviedb.org/3/movie/{movie_id}/similar"
+# ----------------- Config APIs externas -----------------
 
-YOUTUBE_API_KEY = st.secrets.get("YOUTUBE_API_KEY", None)
-YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
+# Endpoints y parseo en modules/external_apis.py (compartidos con `python -m modules.enrich`).
+# Con CATALOGO_API_BASE (servidor falso local) las keys que falten se rellenan.
+TMDB_API_KEY = st.secrets.get("TMDB_API_KEY", None) or (FAKE_API_KEY if API_BASE else None)
+YOUTUBE_API_KEY = st.secrets.get("YOUTUBE_API_KEY", None) or (FAKE_API_KEY if API_BASE else None)
+OMDB_API_KEY = st.secrets.get("OMDB_API_KEY", None) or (FAKE_API_KEY if API_BASE else None)
 
 # ----------------- Lista AFI 100 Years...100 Movies (10th Anniversary Edition) -----------------
 
@@ -262,334 +415,304 @@ def load_data(file_path_or_buffer):
 
     return df
 
-def _coerce_year_for_tmdb(year):
-    if year is None or pd.isna(year):
-        return None
-    try:
-        return int(float(year))
-    except Exception:
-        return None
-
-@st.cache_data
-def get_tmdb_basic_info(title, year=None):
-    """Info básica TMDb (id/poster/vote_average) en una sola búsqueda."""
-    if TMDB_API_KEY is None:
-        return None
-    if not title or pd.isna(title):
-        return None
-
-    title = str(title).strip()
-    year_int = _coerce_year_for_tmdb(year)
-
-    params = {"api_key": TMDB_API_KEY, "query": title}
-    if year_int is not None:
-        params["year"] = year_int
+# Sidecar del enriquecimiento offline (python -m modules.enrich): si una película
+# está ahí, no se llama a TMDb / OMDb durante el render.
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_enrichment_sidecar(path, mtime):
+    return EnrichmentSidecar.from_csv(path)
 
+def enrichment_sidecar():
     try:
-        r = requests.get(TMDB_SEARCH_URL, params=params, timeout=3)
-        if r.status_code != 200:
-            return None
-        data = r.json()
-        results = data.get("results", [])
-        if not results:
-            return None
+        mtime = os.path.getmtime(ENRICHMENT_SIDECAR)
+    except OSError:
+        mtime = None
+    return get_enrichment_sidecar(ENRICHMENT_SIDECAR, mtime)
+
+@transient_fallback(None)
+@st.cache_data(show_spinner=False)
+def _tmdb_basic_info_live(title, year=None):
+    return tmdb_search(title, year, TMDB_API_KEY)
+
+@transient_fallback(None)
+@st.cache_data(show_spinner=False)
+def _tmdb_by_imdb_id_live(imdb_id):
+    return tmdb_find(imdb_id, TMDB_API_KEY)
+
+def get_tmdb_basic_info(title, year=None, imdb_id=None):
+    """
+    Info básica TMDb (id/poster/vote_average). Con id de IMDb (Const / FilmId) se
+    resuelve por /find; la búsqueda por título queda para filas sin id.
+    """
+    found, info = enrichment_sidecar().tmdb_info(title, year, imdb_id=imdb_id)
+    if found:
+        return info
+    if valid_imdb_id(imdb_id):
+        return _tmdb_by_imdb_id_live(valid_imdb_id(imdb_id))
+    return _tmdb_basic_info_live(title, year)
+
+@transient_fallback(None)
+def get_tmdb_id(title, year=None, imdb_id=None):
+    """
+    Sólo el id TMDb (tráileres, proveedores): sidecar y mapa persistente tt → TMDb
+    antes que la red; /find o la búsqueda por título sólo si el id aún no se conoce.
+    """
+    found, info = enrichment_sidecar().tmdb_info(title, year, imdb_id=imdb_id)
+    if not found:
+        if valid_imdb_id(imdb_id):
+            info = tmdb_find(valid_imdb_id(imdb_id), TMDB_API_KEY, id_only=True)
+        else:
+            info = _tmdb_basic_info_live(title, year)
+    return info.get("id") if info else None
+
+@transient_fallback(None)
+@st.cache_data(show_spinner=False)
+def _tmdb_provider_table_live(tmdb_id):
+    # una entrada por película (todos los países); la región se corta en memoria
+    return tmdb_provider_table(tmdb_id, TMDB_API_KEY)
+
+def get_tmdb_providers(tmdb_id, country=None):
+    """Streaming desde TMDb watch/providers para un país (por defecto, la región elegida)."""
+    country = country or streaming_region
+    found, providers = enrichment_sidecar().providers(tmdb_id, country)
+    if found:
+        return providers
+    table = _tmdb_provider_table_live(tmdb_id)
+    return table.for_country(country) if table is not None else None
+
+@transient_fallback(list)
+@st.cache_data(show_spinner=False, ttl=7 * 24 * 3600)
+def get_region_providers(region):
+    """Plataformas de streaming de la región según TMDb ({id, name})."""
+    return tmdb_region_providers(region, TMDB_API_KEY)
+
+@transient_fallback(None)
+@st.cache_data(show_spinner=False, ttl=24 * 3600)
+def _tmdb_provider_catalog_live(provider_id, region):
+    return tmdb_provider_catalog(provider_id, region, TMDB_API_KEY)
+
+@st.cache_data(show_spinner=False, ttl=600)
+def catalog_tmdb_ids(consts, titles, years):
+    """
+    Id TMDb de cada fila del catálogo sin tocar la red: sidecar de
+    enriquecimiento y mapa tt → TMDb de la caché persistente. -1 si no se conoce.
+    """
+    sidecar = enrichment_sidecar()
+    cache = get_response_cache()
+    out = []
+    for const, title, year in zip(consts, titles, years):
+        found, info = sidecar.tmdb_info(title, year, imdb_id=const)
+        tmdb_id = info.get("id") if found and info else None
+        if tmdb_id is None and valid_imdb_id(const):
+            tmdb_id = cache.get_mapping(IMDB_TO_TMDB, valid_imdb_id(const))
+        out.append(int(tmdb_id) if tmdb_id else -1)
+    return np.asarray(out, dtype=np.int64)
+
+def build_provider_index(region, provider_ids, tmdb_ids):
+    """
+    ProviderIndex con un bitset por proveedor. Los catálogos (/discover paginado)
+    quedan en caché; cruzarlos con el catálogo es un np.isin por proveedor.
+    Devuelve (índice, proveedores cuyo catálogo no se pudo descargar).
+    """
+    index = ProviderIndex(tmdb_ids)
+    failed = []
+    for pid in provider_ids:
+        ids = _tmdb_provider_catalog_live(pid, region)
+        if ids is None:
+            failed.append(pid)
+        else:
+            index.add(pid, ids)
+    return index, failed
 
-        movie = results[0]
-        movie_id = movie.get("id")
-        poster_path = movie.get("poster_path")
-        vote_average = movie.get("vote_average")
+def enrich_tmdb_batch(films, country=None, max_workers=8):
+    """
+    Resuelve en paralelo (pool acotado + Session compartida) la info básica y los
+    proveedores TMDb de una lista de (título, año, id IMDb). Devuelve
+    [(info, providers), ...] en el mismo orden; cada resultado queda además en
+    las cachés de siempre.
+    """
+    def _one(film):
+        info = get_tmdb_basic_info(*film)
+        tmdb_id = info.get("id") if info else None
+        providers = get_tmdb_providers(tmdb_id, country=country) if tmdb_id else None
+        return info, providers
 
-        return {
-            "id": movie_id,
-            "poster_url": f"{TMDB_IMAGE_BASE}{poster_path}" if poster_path else None,
-            "vote_average": vote_average,
-        }
-    except Exception:
-        return None
+    return [res or (None, None) for res in map_concurrent(_one, films, max_workers=max_workers)]
 
-@st.cache_data
-def get_tmdb_providers(tmdb_id, country="CL"):
-    """Streaming desde TMDb watch/providers para un país."""
-    if TMDB_API_KEY is None or not tmdb_id:
-        return None
+def _prefetch_gallery_film(film):
+    """Lo mismo que pide una tarjeta de la galería: info, proveedores y miniaturas del póster."""
+    title, year, const, country = film
+    info = get_tmdb_basic_info(title, year, const)
+    tmdb_id = info.get("id") if info else None
+    if tmdb_id:
+        get_tmdb_providers(tmdb_id, country=country)
+    if info and info.get("poster_url") and use_local_posters():
+        get_poster_cache().srcset(info["poster_url"])
 
+def prefetch_gallery_pages(view, current_page, page_size, num_pages, country):
+    """
+    Agenda en segundo plano (prioridad baja) la página siguiente y la anterior de
+    la galería. El token es la vista filtrada y ordenada: si cambian los filtros,
+    lo pendiente de la vista anterior se descarta.
+    """
+    token = (hash(tuple(view.index)), page_size, country)
+    films = []
+    for page in (current_page + 1, current_page - 1):
+        if 1 <= page <= num_pages:
+            rows = view.iloc[(page - 1) * page_size: page * page_size]
+            consts = rows["Const"] if "Const" in rows.columns else [None] * len(rows)
+            films += [(t, None if pd.isna(y) else y, c, country)
+                      for t, y, c in zip(rows["Title"], rows["Year"], consts)]
+    return get_background_prefetcher().schedule(session_key(), token, _prefetch_gallery_film, films)
+
+# Tamaño con que se dibuja el póster en la grilla (ver .movie-gallery-grid)
+POSTER_SIZES = "(max-width: 900px) 160px, 240px"
+
+def use_local_posters():
     try:
-        providers_url = f"https://api.themoviedb.org/3/movie/{tmdb_id}/watch/providers"
-        r2 = requests.get(providers_url, params={"api_key": TMDB_API_KEY}, timeout=4)
-        if r2.status_code != 200:
-            return None
-        pdata = r2.json()
-        all_countries = pdata.get("results", {})
-        cdata = all_countries.get(country.upper())
-        if not cdata:
-            return None
-
-        providers = set()
-        for key in ["flatrate", "rent", "buy", "ads", "free"]:
-            for item in cdata.get(key, []) or []:
-                name = item.get("provider_name")
-                if name:
-                    providers.add(name)
-
-        link = cdata.get("link")
-        return {
-            "platforms": sorted(list(providers)) if providers else [],
-            "link": link,
-        }
+        return bool(st.get_option("server.enableStaticServing"))
     except Exception:
-        return None
+        return False
 
+def poster_img_attrs(poster_url, wait=False):
+    """
+    Atributos src/srcset del <img>: miniaturas locales (static/posters) si
+    Streamlit sirve estáticos; si aún no están (o no hay serving), la URL de TMDb.
+    """
+    if use_local_posters():
+        local = get_poster_cache().srcset(poster_url, wait=wait)
+        if local:
+            srcset = f' srcset="{local["srcset"]}" sizes="{POSTER_SIZES}"' if local["srcset"] else ""
+            return f'src="{local["src"]}"{srcset} loading="lazy"'
+    return f'src="{poster_url}" loading="lazy"'
+
+def warm_poster_thumbnails(poster_urls, max_workers=8):
+    """Genera en paralelo las miniaturas locales de una página de la galería."""
+    if use_local_posters():
+        cache = get_poster_cache()
+        map_concurrent(cache.srcset, [u for u in poster_urls if u], max_workers=max_workers)
+
+@transient_fallback(list)
 @st.cache_data
 def get_tmdb_similar_movies(tmdb_id, language="es-ES", max_results=10):
     """Películas similares desde TMDb."""
-    if TMDB_API_KEY is None or not tmdb_id:
-        return []
-    try:
-        url = TMDB_SIMILAR_URL_TEMPLATE.format(movie_id=tmdb_id)
-        params = {"api_key": TMDB_API_KEY, "language": language, "page": 1}
-        r = requests.get(url, params=params, timeout=4)
-        if r.status_code != 200:
-            return []
-        data = r.json()
-        results = data.get("results", [])[:max_results]
-        out = []
-        for m in results:
-            title = m.get("title") or m.get("name")
-            date_str = m.get("release_date") or ""
-            year = None
-            if date_str:
-                try:
-                    year = int(date_str[:4])
-                except Exception:
-                    year = None
-            out.append({
-                "id": m.get("id"),
-                "title": title,
-                "year": year,
-                "vote_average": m.get("vote_average"),
-                "poster_url": f"{TMDB_IMAGE_BASE}{m['poster_path']}" if m.get("poster_path") else None,
-            })
-        return out
-    except Exception:
-        return []
-
-@st.cache_data
-def get_youtube_trailer_url(title, year=None, language_hint="es"):
-    """URL de YouTube del primer resultado de tráiler."""
-    if YOUTUBE_API_KEY is None:
-        return None
-    if not title or pd.isna(title):
-        return None
-
-    q = f"{title} trailer"
-    try:
-        if year is not None and not pd.isna(year):
-            q += f" {int(float(year))}"
-    except Exception:
-        pass
+    return tmdb_similar(tmdb_id, TMDB_API_KEY, language=language, max_results=max_results)
 
-    params = {
-        "key": YOUTUBE_API_KEY,
-        "part": "snippet",
-        "q": q,
-        "type": "video",
-        "maxResults": 1,
-        "videoEmbeddable": "true",
-        "regionCode": "CL",
-    }
-
-    try:
-        r = requests.get(YOUTUBE_SEARCH_URL, params=params, timeout=5)
-        if r.status_code != 200:
-            return None
-        data = r.json()
-        items = data.get("items", [])
-        if not items:
-            return None
-        vid = items[0]["id"]["videoId"]
-        return f"https://www.youtube.com/watch?v={vid}"
-    except Exception:
-        return None
+@transient_fallback(None)
+@st.cache_data(show_spinner=False)
+def get_tmdb_details(tmdb_id, language="es-ES"):
+    """
+    Ficha TMDb en una sola llamada (detalles + proveedores + videos + similares).
+    Deja en caché lo que luego piden get_tmdb_providers / get_tmdb_similar_movies.
+    """
+    return tmdb_details(tmdb_id, TMDB_API_KEY, language=language)
 
+@transient_fallback(None)
 @st.cache_data
-def get_omdb_awards(title, year=None):
-    """Info de premios desde OMDb (texto + parseo básico)."""
-    api_key = st.secrets.get("OMDB_API_KEY", None)
-    if api_key is None:
-        return {"error": "OMDB_API_KEY no está configurada en st.secrets."}
-    if not title or pd.isna(title):
-        return {"error": "Título vacío o inválido."}
-
-    base_url = "https://www.omdbapi.com/"
-    raw_title = str(title).strip()
-    simple_title = re.sub(r"\s*\(.*?\)\s*$", "", raw_title).strip()
-
-    year_int = None
-    try:
-        if year is not None and not pd.isna(year):
-            year_int = int(float(year))
-    except Exception:
-        year_int = None
-
-    def _query(params):
-        try:
-            r = requests.get(base_url, params=params, timeout=8)
-            if r.status_code != 200:
-                return {"error": f"HTTP {r.status_code} desde OMDb."}
-            data = r.json()
-            if data.get("Response") != "True":
-                return {"error": data.get("Error", "Respuesta no válida de OMDb.")}
-            return data
-        except Exception as e:
-            return {"error": f"Excepción al llamar a OMDb: {e}"}
-
-    data = None
-    last_error = None
-
-    for t in [raw_title, simple_title]:
-        params = {"apikey": api_key, "t": t, "type": "movie"}
-        if year_int:
-            params["y"] = year_int
-        candidate = _query(params)
-        if candidate is None:
-            continue
-        if "error" in candidate:
-            last_error = candidate["error"]
-        else:
-            data = candidate
-            break
-
-    if data is None:
-        params = {"apikey": api_key, "s": simple_title, "type": "movie"}
-        if year_int:
-            params["y"] = year_int
-        search = _query(params)
-        if search and "error" not in search and "Search" in search:
-            best = search["Search"][0]
-            imdb_id = best.get("imdbID")
-            if imdb_id:
-                data = _query({"apikey": api_key, "i": imdb_id})
-                if isinstance(data, dict) and "error" in data:
-                    last_error = data["error"]
-        elif search and "error" in search:
-            last_error = search["error"]
-
-    if data is None:
-        return {"error": last_error or "No se encontró la película en OMDb."}
-    if "error" in data:
-        return {"error": data["error"]}
-
-    awards_str = data.get("Awards", "")
-    if not awards_str or awards_str == "N/A":
-        return {
-            "raw": None,
-            "oscars": 0,
-            "emmys": 0,
-            "baftas": 0,
-            "golden_globes": 0,
-            "palme_dor": False,
-            "oscars_nominated": 0,
-            "total_wins": 0,
-            "total_nominations": 0,
-        }
-
-    text_lower = awards_str.lower()
-
-    oscars = 0
-    emmys = 0
-    baftas = 0
-    golden_globes = 0
-    palme_dor = False
-    oscars_nominated = 0
-    total_wins = 0
-    total_nominations = 0
-
-    m_osc = re.search(r"won\s+(\d+)\s+oscars?", text_lower)
-    if not m_osc:
-        m_osc = re.search(r"won\s+(\d+)\s+oscar\b", text_lower)
-    if m_osc:
-        oscars = int(m_osc.group(1))
-
-    m_osc_nom = re.search(r"nominated\s+for\s+(\d+)\s+oscars?", text_lower)
-    if not m_osc_nom:
-        m_osc_nom = re.search(r"nominated\s+for\s+(\d+)\s+oscar\b", text_lower)
-    if m_osc_nom:
-        oscars_nominated = int(m_osc_nom.group(1))
-
-    for pat in [
-        r"won\s+(\d+)\s+primetime\s+emmys?",
-        r"won\s+(\d+)\s+emmys?",
-        r"won\s+(\d+)\s+emmy\b",
-    ]:
-        m = re.search(pat, text_lower)
-        if m:
-            emmys = int(m.group(1))
-            break
-
-    m_bafta = re.search(r"won\s+(\d+)[^\.]*bafta", text_lower)
-    if m_bafta:
-        baftas = int(m_bafta)
-    elif "bafta" in text_lower:
-        baftas = 1
-
-    m_globe = re.search(r"won\s+(\d+)[^\.]*golden\s+globes?", text_lower)
-    if not m_globe:
-        m_globe = re.search(r"won\s+(\d+)[^\.]*golden\s+globe\b", text_lower)
-    if m_globe:
-        golden_globes = int(m_globe.group(1))
-    elif "golden globe" in text_lower:
-        golden_globes = 1
+def _youtube_trailer_live(title, year=None, language_hint="es"):
+    return youtube_trailer(title, year, YOUTUBE_API_KEY)
+
+def _trailer_ids(tmdb_id=None, imdb_id=None):
+    ids = [f"tmdb:{int(tmdb_id)}" if tmdb_id else None, valid_imdb_id(imdb_id)]
+    return [i for i in ids if i]
+
+def known_trailer_url(tmdb_id=None, imdb_id=None):
+    """Tráiler ya resuelto alguna vez para esta película (caché persistente por id), sin red."""
+    cache = get_response_cache()
+    for key in _trailer_ids(tmdb_id, imdb_id):
+        url = cache.get_mapping(TRAILER_BY_ID, key)
+        if url:
+            return url
+    return None
 
-    if re.search(r"palme\s+d['’]or", text_lower):
-        palme_dor = True
+def get_youtube_trailer_url(title, year=None, language_hint="es", tmdb_id=None, imdb_id=None):
+    """
+    URL de YouTube del tráiler: primero la caché persistente por id; luego los
+    videos de TMDb si se conoce el id (sin gastar cuota de YouTube); la búsqueda
+    en YouTube queda para películas sin id TMDb. Lo encontrado se guarda por id.
+    """
+    url = known_trailer_url(tmdb_id, imdb_id)
+    if url:
+        return url
+    details = get_tmdb_details(tmdb_id) if tmdb_id else None
+    if details is not None:
+        url = details.get("trailer_url")
+    else:
+        url = _youtube_trailer_live(title, year, language_hint)
+    if url:
+        cache = get_response_cache()
+        for key in _trailer_ids(tmdb_id, imdb_id):
+            cache.set_mapping(TRAILER_BY_ID, key, url)
+    return url
+
+@transient_fallback(lambda: {"error": "OMDb no responde por ahora; se reintentará en unos minutos."})
+@st.cache_data
+def _omdb_awards_live(title, year=None, imdb_id=None, api_key=None):
+    # la key entra en la clave de la caché: un "Invalid API key!" memoizado no sobrevive al cambio de secrets
+    return omdb_awards(title, year, api_key, imdb_id=imdb_id)
 
-    m_wins = re.search(r"(\d+)\s+wins?", text_lower)
-    if m_wins:
-        total_wins = int(m_wins.group(1))
+@st.cache_resource(show_spinner=False)
+def get_awards_store(path):
+    return AwardsStore(path)
 
-    m_noms = re.search(r"(\d+)\s+nominations?", text_lower)
-    if m_noms:
-        total_nominations = int(m_noms.group(1))
+def get_omdb_awards(title, year=None, imdb_id=None):
+    """
+    Info de premios: primero peliculas_con_premios_2025.csv (por Const), luego el
+    sidecar de enriquecimiento y sólo si falta en ambos, OMDb. Lo nuevo se agrega al CSV.
+    """
+    store = get_awards_store(AWARDS_CSV)
+    found, awards = store.lookup(title, year, imdb_id)
+    if found:
+        return awards
+    found, awards = enrichment_sidecar().awards(title, year, imdb_id)
+    if found:
+        return awards
+    awards = _omdb_awards_live(title, year, valid_imdb_id(imdb_id), OMDB_API_KEY)
+    store.append(title, year, imdb_id, awards)
+    return awards
+
+AWARDS_TABLE_COLUMNS = [
+    "Title", "Year", "oscars", "oscars_nominated",
+    "total_wins", "total_nominations", "palme_dor", "raw"
+]
 
+def _awards_row(title, year, awards):
+    if not isinstance(awards, dict) or "error" in awards:
+        return None
     return {
-        "raw": awards_str,
-        "oscars": oscars,
-        "emmys": emmys,
-        "baftas": baftas,
-        "golden_globes": golden_globes,
-        "palme_dor": palme_dor,
-        "oscars_nominated": oscars_nominated,
-        "total_wins": total_wins,
-        "total_nominations": total_nominations,
+        "Title": title,
+        "Year": year,
+        "oscars": awards.get("oscars", 0),
+        "oscars_nominated": awards.get("oscars_nominated", 0),
+        "total_wins": awards.get("total_wins", 0),
+        "total_nominations": awards.get("total_nominations", 0),
+        "palme_dor": awards.get("palme_dor", False),
+        "raw": awards.get("raw"),
     }
 
+def iter_awards_table(df_basic, batch_size=AWARDS_BATCH):
+    """
+    Tabla de premios por tandas: lookups concurrentes (pool de hilos; concurrencia
+    y ritmo acotados por el limitador de OMDb) y, tras cada tanda, (tabla parcial,
+    hechas, total). La tabla conserva el orden de df_basic.
+    """
+    films = [(r.get("Title"), r.get("Year"), r.get("Const")) for _, r in df_basic.iterrows()]
+    rows = {}
+    done = 0
+    with closing(iter_batches(films, lambda f: get_omdb_awards(*f), batch_size=batch_size)) as batches:
+        for batch in batches:
+            for i, awards in batch:
+                row = _awards_row(films[i][0], films[i][1], awards)
+                if row is not None:
+                    rows[i] = row
+            done += len(batch)
+            yield pd.DataFrame([rows[i] for i in sorted(rows)], columns=AWARDS_TABLE_COLUMNS), done, len(films)
+
 def compute_awards_table(df_basic):
-    """Tabla de premios OMDb para un subconjunto de pelis (Title/Year)."""
-    rows = []
-    for _, r in df_basic.iterrows():
-        title = r.get("Title")
-        year = r.get("Year")
-        awards = get_omdb_awards(title, year)
-        if not isinstance(awards, dict) or "error" in awards:
-            continue
-        rows.append({
-            "Title": title,
-            "Year": year,
-            "oscars": awards.get("oscars", 0),
-            "oscars_nominated": awards.get("oscars_nominated", 0),
-            "total_wins": awards.get("total_wins", 0),
-            "total_nominations": awards.get("total_nominations", 0),
-            "palme_dor": awards.get("palme_dor", False),
-            "raw": awards.get("raw"),
-        })
-    if not rows:
-        return pd.DataFrame(
-            columns=[
-                "Title", "Year", "oscars", "oscars_nominated",
-                "total_wins", "total_nominations", "palme_dor", "raw"
-            ]
-        )
-    return pd.DataFrame(rows)
+    """Tabla de premios OMDb para un subconjunto de pelis (Title/Year, y Const si está)."""
+    table = pd.DataFrame(columns=AWARDS_TABLE_COLUMNS)
+    for table, _, _ in iter_awards_table(df_basic):
+        pass
+    return table
 
 def get_rating_colors(rating):
     try:
@@ -618,67 +741,66 @@ def get_spanish_review_link(title, year=None):
         pass
     return "https://www.google.com/search?q=" + quote_plus(q)
 
-def recommend_from_catalog(df_all, seed_row, top_n=5):
-    """Recomendaciones simples dentro de tu catálogo a partir de una película semilla."""
-    if df_all.empty:
-        return pd.DataFrame()
-
-    candidates = df_all.copy()
-    if "Title" in candidates.columns and "Year" in candidates.columns:
-        candidates = candidates[
-            ~(
-                (candidates["Title"] == seed_row.get("Title")) &
-                (candidates["Year"] == seed_row.get("Year"))
-            )
-        ]
-
-    seed_genres = set(seed_row.get("GenreList") or [])
-    seed_dirs = {d.strip() for d in str(seed_row.get("Directors") or "").split(",") if d.strip()}
-    seed_year = seed_row.get("Year")
-    seed_rating = seed_row.get("Your Rating")
-
-    scores = []
-    for idx, r in candidates.iterrows():
-        g2 = set(r.get("GenreList") or [])
-        d2 = {d.strip() for d in str(r.get("Directors") or "").split(",") if d.strip()}
-        score = 0.0
-
-        # géneros compartidos
-        score += 2.0 * len(seed_genres & g2)
-
-        # directores compartidos
-        if seed_dirs & d2:
-            score += 3.0
-
-        # cercanía en año
-        y2 = r.get("Year")
-        if pd.notna(seed_year) and pd.notna(y2):
-            score -= min(abs(seed_year - y2) / 10.0, 3.0)
-
-        # similitud de tu nota
-        r2 = r.get("Your Rating")
-        if pd.notna(seed_rating) and pd.notna(r2):
-            score -= abs(seed_rating - r2) * 0.3
-
-        # pequeño boost por IMDb alta
-        imdb_r2 = r.get("IMDb Rating")
-        if pd.notna(imdb_r2):
-            score += (float(imdb_r2) - 6.5) * 0.2
-
-        scores.append((idx, score))
-
-    if not scores:
-        return pd.DataFrame()
-
-    scores_sorted = sorted(scores, key=lambda x: x[1], reverse=True)
-    top_indices = [idx for idx, sc in scores_sorted[:top_n] if sc > 0]
+@st.cache_resource(show_spinner=False)
+def get_reco_index(catalog_key, _df_all):
+    """Índice LSH del recomendador (sólo para catálogos grandes), cacheado por versión de catálogo."""
+    if len(_df_all) < ANN_AUTO_MIN_ROWS:
+        return None
+    return build_lsh_index(_df_all)
+
+@st.cache_data(show_spinner=False)
+def get_favourite_recs(catalog_key, _df_all, top_n=6):
+    """Tabla materializada favorita (nota ≥ 9) -> top_n similares, cacheada por versión de catálogo."""
+    if "Your Rating" not in _df_all.columns:
+        return recommend_for_seeds(_df_all, [], top_n=top_n)
+    fav_pos = np.flatnonzero(_df_all["Your Rating"].ge(9).to_numpy())
+    return recommend_for_seeds(_df_all, fav_pos, top_n=top_n)
+
+def get_film_club_model():
+    """Modelo colaborativo del club de esta sesión (los exports subidos no se comparten entre sesiones)."""
+    if "club_model" not in st.session_state:
+        st.session_state.club_model = FilmClubModel()
+        st.session_state.club_labels = {}
+    return st.session_state.club_model, st.session_state.club_labels
+
+def index_fingerprint(index):
+    """Huella corta de un conjunto de etiquetas (independiente del orden)."""
+    values = np.sort(pd.util.hash_array(np.asarray(index)))
+    return hashlib.sha1(values.tobytes()).hexdigest()[:16]
+
+# Historiales de '¿Qué ver hoy?' que guarda cada sesión (uno por pool)
+WHAT_HISTORY_POOLS = 8
+
+# Pools de '¿Qué ver hoy?' (definición -> etiqueta); los que dependen de mis notas
+# sólo se ofrecen si el catálogo trae 'Your Rating'
+WHAT_POOL_LABELS = {
+    POOL_ALL: "Todas",
+    POOL_FAVOURITES: "Favoritas (nota ≥ 9)",
+    POOL_RECENT_TOP: "Nota 8–10 de los últimos 20 años",
+    POOL_UNRATED: "Pendientes (sin nota mía)",
+}
 
-    if not top_indices:
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_what_pool_sampler(catalog_key, pool_key, _df_all, _scope_index):
+    """
+    Pool de '¿Qué ver hoy?' como posiciones del catálogo + tabla de alias.
+    pool_key = (alcance, definición, IMDb mínima, nota estimada mínima, ponderar por mi nota).
+    """
+    _, definition, min_imdb, min_pred, weighted = pool_key
+    within = np.ones(len(_df_all), dtype=bool)
+    if _scope_index is not None:
+        within &= _df_all.index.isin(_scope_index)
+    if definition == POOL_UNRATED and min_pred is not None:
+        within &= (_df_all["Predicted Rating"] >= float(min_pred)).to_numpy()
+    return build_pool_sampler(_df_all, definition, min_imdb=min_imdb, weighted=weighted, within=within)
+
+def recs_for_seed(fav_recs, df_all, seed_idx):
+    """Recomendaciones precalculadas para una semilla (DataFrame vacío si no es favorita)."""
+    sel = fav_recs[fav_recs["SeedIdx"] == seed_idx]
+    if sel.empty:
         return pd.DataFrame()
-
-    recs = df_all.loc[top_indices].copy()
-    score_map = dict(scores)
-    recs["similarity_score"] = recs.index.map(score_map.get)
+    recs = df_all.loc[sel["RecIdx"]].copy()
+    recs["similarity_score"] = sel["similarity_score"].to_numpy()
     return recs
 
 # ===================== ÓSCAR: carga y helpers (full_data.csv) =====================
@@ -814,6 +936,18 @@ if "Year" in df.columns:
 else:
     df["YearInt"] = -1
 
+# Versión del catálogo: clave para cachés derivadas (índices, recomendaciones)
+catalog_key = catalog_version(df)
+
+# Nota estimada para pendientes: modelo por sesión, re-ajuste incremental con notas nuevas
+if "rating_model" not in st.session_state:
+    st.session_state.rating_model = RatingModel()
+if st.session_state.get("predicted_key") != catalog_key:
+    st.session_state.rating_model.sync(df, catalog_key)
+    st.session_state.predicted_col = st.session_state.rating_model.predict(df)
+    st.session_state.predicted_key = catalog_key
+df["Predicted Rating"] = st.session_state.predicted_col
+
 # ----------------- Tema oscuro + CSS -----------------
 
 primary_bg = "#020617"
@@ -1159,9 +1293,27 @@ selected_directors = st.sidebar.multiselect(
     options=all_directors
 )
 
+streaming_region = st.sidebar.selectbox(
+    "🌎 Región de streaming",
+    options=list(REGIONS),
+    format_func=lambda cc: f"{REGIONS[cc]} ({cc})",
+    index=0,
+    help="TMDb entrega todos los países de una vez; cambiar de región no vuelve a consultar la API.",
+)
+region_label = f"{REGIONS[streaming_region]} ({streaming_region})"
+
+_region_providers = get_region_providers(streaming_region) if TMDB_API_KEY else []
+_provider_names = {p["id"]: p["name"] for p in _region_providers}
+available_on = st.sidebar.multiselect(
+    "📺 Disponible en…",
+    options=list(_provider_names),
+    format_func=lambda pid: _provider_names.get(pid, str(pid)),
+    help="Cruza el catálogo de cada plataforma en TMDb (región elegida) con tus películas.",
+)
+
 order_by = st.sidebar.selectbox(
     "Ordenar por",
-    ["Your Rating", "IMDb Rating", "Year", "Title", "Aleatorio"]
+    ["Your Rating", "Predicted Rating", "IMDb Rating", "Year", "Title", "Aleatorio"]
 )
 
 # ... aquí estaba el código de order_asc ...
@@ -1178,6 +1330,63 @@ if show_awards:
     st.sidebar.caption(
         "⚠ Consultar premios para muchas películas puede hacer la app más lenta en la primera carga."
     )
+with st.sidebar.expander("📡 Latencia de APIs externas", expanded=False):
+    _lat = get_client().latency_stats()
+    if _lat:
+        st.dataframe(
+            pd.DataFrame.from_dict(_lat, orient="index").rename_axis("Endpoint"),
+            use_container_width=True,
+        )
+        st.caption(f"Reintentos (429 / 5xx / red) en este proceso: {get_client().retries}")
+    else:
+        st.caption("Aún no hay llamadas a TMDb / OMDb / YouTube en este proceso.")
+    if use_local_posters():
+        _pc = get_poster_cache().stats()
+        st.caption(
+            f"Pósters locales: {_pc['files']} archivos · {_pc['bytes'] / 1e6:.1f} / {_pc['max_bytes'] / 1e6:.0f} MB · "
+            f"aciertos {_pc['hits']} · descargas {_pc['downloads']} · desalojos {_pc['evictions']}"
+        )
+    _cb = breaker_states()
+    if _cb:
+        st.dataframe(
+            pd.DataFrame.from_dict(_cb, orient="index").rename_axis("Proveedor"),
+            use_container_width=True,
+        )
+    _outc = outcome_counts()
+    if _outc:
+        st.dataframe(
+            pd.DataFrame.from_dict(_outc, orient="index").fillna(0).astype(int).rename_axis("Tipo"),
+            use_container_width=True,
+        )
+        st.caption(
+            "hit = caché · ok / not_found / transient = red · negative_hit = fallo cacheado · "
+            "revalidated = recuperado en segundo plano · quota = sin cuota · stale = caché vencida servida · "
+            "coalesced = esperó una consulta idéntica en curso"
+        )
+    _bg = get_background_prefetcher().stats()
+    if _bg["done"] or _bg["pending"]:
+        st.caption(
+            f"Prefetch de la galería: {_bg['done']} películas adelantadas · {_bg['pending']} en cola · "
+            f"{_bg['cancelled']} descartadas por cambio de filtros"
+        )
+    _sf = coalesced_stats()
+    if _sf["coalesced"]:
+        st.caption(
+            f"Single flight: {_sf['coalesced']} pedidos compartieron una consulta en vuelo "
+            f"({_sf['leaders']} consultas reales a la red)."
+        )
+    st.dataframe(
+        pd.DataFrame.from_dict(quota_states(), orient="index").rename_axis("Proveedor"),
+        use_container_width=True,
+    )
+    st.caption("Cuota diaria compartida por todas las sesiones (se reserva un 5 % para no agotarla).")
+    _om = omdb_lookup_counts()
+    if _om["id_lookups"] or _om["title_lookups"]:
+        st.caption(
+            f"OMDb: {_om['id_lookups']} búsquedas por id IMDb ({_om['id_queries']} consultas) · "
+            f"{_om['title_lookups']} por título ({_om['title_queries']} consultas, "
+            f"{_om['queries_per_title_lookup']} por película) · ~{_om['queries_saved']} consultas ahorradas"
+        )
 # ---------------------------------------------
 
 # ---- Changelog al FINAL de la barra lateral ----
@@ -1223,12 +1432,37 @@ if selected_directors:
 
     filtered = filtered[filtered["Directors"].apply(_matches_any_director)]
 
+# Filtro de plataformas: máscara del índice proveedor -> películas
+if available_on:
+    _catalog_ids = catalog_tmdb_ids(
+        tuple(df["Const"]) if "Const" in df.columns else (None,) * len(df),
+        tuple(df["Title"]),
+        tuple(df["Year"]),
+    )
+    provider_index, _failed = build_provider_index(streaming_region, available_on, _catalog_ids)
+    _available = pd.Series(provider_index.mask(available_on), index=df.index)
+    filtered = filtered[_available.loc[filtered.index].to_numpy()]
+    st.sidebar.caption(
+        f"Ids TMDb conocidos: {provider_index.known}/{len(provider_index)} películas "
+        "(el resto se resuelve con `python -m modules.enrich` o al verlas en la galería)."
+    )
+    if _failed:
+        st.sidebar.warning(
+            "No se pudo descargar el catálogo de: "
+            + ", ".join(_provider_names.get(pid, str(pid)) for pid in _failed)
+            + ". Se reintentará en unos minutos."
+        )
+
 # ---------- Texto “Filtros activos” cerca del título ----------
 st.caption(
     f"Filtros activos → Años: {year_range[0]}–{year_range[1]} | "
     f"Mi nota: {rating_range[0]}–{rating_range[1]} | "
     f"Géneros: {', '.join(selected_genres) if selected_genres else 'Todos'} | "
     f"Directores: {', '.join(selected_directors) if selected_directors else 'Todos'}"
+    + (
+        f" | Disponible en ({streaming_region}): {', '.join(_provider_names.get(p, str(p)) for p in available_on)}"
+        if available_on else ""
+    )
 )
 
 # ----------------- Helpers de formato -----------------
@@ -1348,7 +1582,7 @@ with tab_catalog:
 
     cols_to_show = [
         c for c in [
-            "Title", "Year", "Your Rating", "IMDb Rating",
+            "Title", "Year", "Your Rating", "Predicted Rating", "IMDb Rating",
             "Genres", "Directors", "Date Rated", "URL"
         ]
         if c in filtered_view.columns
@@ -1363,6 +1597,8 @@ with tab_catalog:
         display_df["Your Rating"] = display_df["Your Rating"].apply(fmt_rating)
     if "IMDb Rating" in display_df.columns:
         display_df["IMDb Rating"] = display_df["IMDb Rating"].apply(fmt_rating)
+    if "Predicted Rating" in display_df.columns:
+        display_df["Predicted Rating"] = display_df["Predicted Rating"].apply(fmt_rating)
 
     st.dataframe(
         display_df,
@@ -1445,9 +1681,17 @@ with tab_catalog:
         end_idx = start_idx + page_size
         page_df = filtered_view.iloc[start_idx:end_idx].copy()
 
+        # Enriquecimiento TMDb de toda la página en paralelo, antes de armar el HTML
+        if use_tmdb_gallery:
+            page_ids = page_df["Const"] if "Const" in page_df.columns else [None] * len(page_df)
+            page_tmdb = enrich_tmdb_batch(list(zip(page_df["Title"], page_df["Year"], page_ids)))
+            warm_poster_thumbnails([info.get("poster_url") for info, _ in page_tmdb if info])
+        else:
+            page_tmdb = [(None, None)] * len(page_df)
+
         cards_html = ['<div class="movie-gallery-grid">']
 
-        for _, row in page_df.iterrows():
+        for (_, row), (tmdb_info, availability) in zip(page_df.iterrows(), page_tmdb):
             titulo = row.get("Title", "Sin título")
             year = row.get("Year", "")
             nota = row.get("Your Rating", "")
@@ -1459,27 +1703,17 @@ with tab_catalog:
             base_rating = nota if pd.notna(nota) else imdb_rating
             border_color, glow_color = get_rating_colors(base_rating)
 
-            if use_tmdb_gallery:
-                tmdb_info = get_tmdb_basic_info(titulo, year)
-                if tmdb_info:
-                    poster_url = tmdb_info.get("poster_url")
-                    tmdb_rating = tmdb_info.get("vote_average")
-                    tmdb_id = tmdb_info.get("id")
-                    availability = get_tmdb_providers(tmdb_id, country="CL")
-                else:
-                    poster_url = None
-                    tmdb_rating = None
-                    availability = None
+            if tmdb_info:
+                poster_url = tmdb_info.get("poster_url")
+                tmdb_rating = tmdb_info.get("vote_average")
             else:
-                tmdb_info = None
                 poster_url = None
                 tmdb_rating = None
-                availability = None
 
             if isinstance(poster_url, str) and poster_url:
                 poster_html = f"""
 <div class="movie-poster-frame">
-  <img src="{poster_url}" alt="{titulo}" class="movie-poster-img">
+  <img {poster_img_attrs(poster_url)} alt="{titulo}" class="movie-poster-img">
 </div>
 """
             else:
@@ -1501,7 +1735,7 @@ with tab_catalog:
             )
 
             if show_awards:
-                awards = get_omdb_awards(titulo, year)
+                awards = get_omdb_awards(titulo, year, row.get("Const"))
             else:
                 awards = None
 
@@ -1551,9 +1785,9 @@ with tab_catalog:
                 platforms = availability.get("platforms") or []
                 link = availability.get("link")
 
-            platforms_str = ", ".join(platforms) if platforms else "Sin datos para Chile (CL)"
+            platforms_str = ", ".join(platforms) if platforms else f"Sin datos para {region_label}"
             link_html = (
-                f'<a href="{link}" target="_blank">Ver streaming en TMDb (CL)</a>'
+                f'<a href="{link}" target="_blank">Ver streaming en TMDb ({streaming_region})</a>'
                 if link else "Sin enlace de streaming disponible"
             )
 
@@ -1594,7 +1828,7 @@ with tab_catalog:
     {genres_html}
     {directors_html}
     <b>Premios:</b> {awards_text}<br>
-    <b>Streaming (CL):</b> {platforms_str}<br>
+    <b>Streaming ({streaming_region}):</b> {platforms_str}<br>
     {link_html}<br>
     {imdb_link_html}<br>
     <b>Reseñas:</b> {reseñas_html}
@@ -1607,6 +1841,12 @@ with tab_catalog:
         gallery_html = "\n".join(cards_html)
         st.markdown(gallery_html, unsafe_allow_html=True)
 
+        # Con la página ya dibujada, adelantar la siguiente / anterior en segundo plano
+        if use_tmdb_gallery:
+            prefetch_gallery_pages(filtered_view, current_page, page_size, num_pages, streaming_region)
+        else:
+            get_background_prefetcher().cancel(session_key())
+
         # ----------- NAV INFERIOR -----------
         st.markdown("")
         col_navb1, col_navb2, col_navb3 = st.columns([1, 2, 1])
@@ -1639,8 +1879,9 @@ with tab_catalog:
             if not fav.empty:
                 fav = fav.sort_values(["Your Rating", "Year"], ascending=[False, True])
                 fav = fav.head(12)
+                fav_recs = get_favourite_recs(catalog_key, df)
 
-                for _, row in fav.iterrows():
+                for fav_idx, row in fav.iterrows():
                     titulo = row.get("Title", "Sin título")
                     year = row.get("Year", "")
                     nota = row.get("Your Rating", "")
@@ -1677,7 +1918,7 @@ with tab_catalog:
 
                     with col_img:
                         if show_posters_fav:
-                            tmdb_info = get_tmdb_basic_info(titulo, year)
+                            tmdb_info = get_tmdb_basic_info(titulo, year, row.get("Const"))
                             poster_url = tmdb_info.get("poster_url") if tmdb_info else None
                             if isinstance(poster_url, str) and poster_url:
                                 try:
@@ -1702,8 +1943,19 @@ with tab_catalog:
                         if reseñas_url:
                             st.write(f"[Reseñas en español]({reseñas_url})")
 
+                        more_like = recs_for_seed(fav_recs, df, fav_idx)
+                        if not more_like.empty:
+                            similares = []
+                            for _, r_sim in more_like.iterrows():
+                                y_sim = fmt_year(r_sim.get("Year"))
+                                similares.append(f"{r_sim.get('Title', '')}" + (f" ({y_sim})" if y_sim else ""))
+                            st.write("**Porque te encantó:** " + " · ".join(similares))
+
                         if show_trailers:
-                            trailer_url = get_youtube_trailer_url(titulo, year)
+                            trailer_url = get_youtube_trailer_url(
+                                titulo, year, tmdb_id=get_tmdb_id(titulo, year, row.get("Const")),
+                                imdb_id=row.get("Const"),
+                            )
                             if trailer_url:
                                 st.video(trailer_url)
 
@@ -2122,8 +2374,35 @@ with tab_analysis:
         elif filtered.empty:
             st.info("No hay datos bajo los filtros actuales.")
         else:
+            awards_input = filtered[[c for c in ("Title", "Year", "Const") if c in filtered.columns]]
+            awards_key = int(pd.util.hash_pandas_object(awards_input, index=False).sum())
             if st.button("Calcular estadísticas de premios para las películas filtradas"):
-                awards_stats_df = compute_awards_table(filtered[["Title", "Year"]])
+                # Cancelar vuelve a ejecutar el script: Streamlit corta este bucle
+                # entre tandas y lo ya obtenido queda en session_state.
+                st.button("⏹️ Cancelar", key="awards_cancel")
+                awards_progress = st.progress(0.0, text="Consultando premios…")
+                awards_live = st.empty()
+                for partial, done, total in iter_awards_table(awards_input):
+                    st.session_state["awards_stats"] = {
+                        "key": awards_key, "df": partial, "done": done, "total": total,
+                    }
+                    awards_progress.progress(done / total, text=f"Premios: {done} de {total} películas")
+                    awards_live.dataframe(
+                        partial.sort_values(["oscars", "total_wins"], ascending=False)
+                        .head(30).drop(columns=["raw"]),
+                        hide_index=True, use_container_width=True
+                    )
+                awards_progress.empty()
+                awards_live.empty()
+
+            awards_saved = st.session_state.get("awards_stats")
+            if awards_saved is not None and awards_saved["key"] == awards_key:
+                awards_stats_df = awards_saved["df"]
+                if awards_saved["done"] < awards_saved["total"]:
+                    st.warning(
+                        f"Cálculo cancelado: resultados parciales "
+                        f"({awards_saved['done']} de {awards_saved['total']} películas consultadas)."
+                    )
                 if awards_stats_df.empty:
                     st.write("No se pudieron obtener datos de premios para estas películas.")
                 else:
@@ -2588,11 +2867,11 @@ def _build_oscar_card_html(row, categories_for_film=None, wins_for_film=None,
     is_winner = highlight_winner or is_winner_row
 
     # Poster / TMDb / streaming
-    tmdb_info = get_tmdb_basic_info(title, year)
+    tmdb_info = get_tmdb_basic_info(title, year, row.get("FilmId"))
     poster_url = tmdb_info.get("poster_url") if tmdb_info else None
     tmdb_rating = tmdb_info.get("vote_average") if tmdb_info else None
     tmdb_id = tmdb_info.get("id") if tmdb_info else None
-    providers = get_tmdb_providers(tmdb_id, country="CL") if tmdb_id else None
+    providers = get_tmdb_providers(tmdb_id) if tmdb_id else None
 
     # Colores del borde según winner
     if is_winner:
@@ -2607,7 +2886,7 @@ def _build_oscar_card_html(row, categories_for_film=None, wins_for_film=None,
     if poster_url:
         poster_html = (
             "<div class='movie-poster-frame'>"
-            f"<img src='{poster_url}' alt='{title}' class='movie-poster-img' />"
+            f"<img {poster_img_attrs(poster_url)} alt='{title}' class='movie-poster-img' />"
             "</div>"
         )
     else:
@@ -2630,18 +2909,18 @@ def _build_oscar_card_html(row, categories_for_film=None, wins_for_film=None,
 
     if providers:
         plats = providers.get("platforms") or []
-        plats_str = ", ".join(plats) if plats else "Sin datos específicos para Chile (CL)"
+        plats_str = ", ".join(plats) if plats else f"Sin datos específicos para {region_label}"
         watch_link = providers.get("link")
         streaming_html = (
-            f"Streaming (CL): {plats_str}"
+            f"Streaming ({streaming_region}): {plats_str}"
             + (
-                f"<br><a href='{watch_link}' target='_blank'>Ver streaming en TMDb (CL)</a>"
+                f"<br><a href='{watch_link}' target='_blank'>Ver streaming en TMDb ({streaming_region})</a>"
                 if watch_link
                 else ""
             )
         )
     else:
-        streaming_html = "Streaming (CL): Sin datos para Chile (CL)"
+        streaming_html = f"Streaming ({streaming_region}): Sin datos para {region_label}"
 
     imdb_line = (
         f"IMDb: {float(my_imdb):.1f}"
@@ -2814,6 +3093,8 @@ def load_oscar_data_from_excel(path_xlsx="Oscar_Data_1927_today.xlsx"):
             "CategoryRaw": raw[cat_col].astype(str),
             "PersonName": raw[name_col].astype(str) if name_col else "",
             "Film": raw[film_col].astype(str) if film_col else "",
+            # id de IMDb de la película (tt…): resuelve TMDb sin buscar por título
+            "FilmId": raw[cols_lower["filmid"]] if "filmid" in cols_lower else None,
             "IsWinner": is_winner,
         }
     )
@@ -2929,15 +3210,15 @@ def build_oscar_movie_card_html(
     # Streaming
     if providers_info:
         platforms = providers_info.get("platforms") or []
-        platforms_str = ", ".join(platforms) if platforms else "Sin datos para Chile (CL)"
+        platforms_str = ", ".join(platforms) if platforms else f"Sin datos para {region_label}"
         streaming_link = providers_info.get("link")
     else:
-        platforms_str = "Sin datos para Chile (CL)"
+        platforms_str = f"Sin datos para {region_label}"
         streaming_link = None
 
-    streaming_html = f"Streaming (CL): {platforms_str}"
+    streaming_html = f"Streaming ({streaming_region}): {platforms_str}"
     if streaming_link:
-        streaming_html += f'<br><a href="{streaming_link}" target="_blank">Ver streaming en TMDb (CL)</a>'
+        streaming_html += f'<br><a href="{streaming_link}" target="_blank">Ver streaming en TMDb ({streaming_region})</a>'
 
     # Badges
     winner_badge = ""
@@ -2990,7 +3271,7 @@ def build_oscar_movie_card_html(
     if isinstance(poster_url, str) and poster_url:
         poster_html = (
             "<div class='movie-poster-frame'>"
-            f"<img src='{poster_url}' alt='{film_title}' class='movie-poster-img' />"
+            f"<img {poster_img_attrs(poster_url)} alt='{film_title}' class='movie-poster-img' />"
             "</div>"
         )
     else:
@@ -3153,18 +3434,24 @@ with tab_awards:
         "En modo ganadores se muestran sólo las películas que ganan al menos un premio en el año."
     )
 
+    def _first_film_id(rows):
+        """FilmId (tt…) del grupo de filas, si el Excel lo trae."""
+        if "FilmId" not in rows.columns or not rows["FilmId"].notna().any():
+            return None
+        return rows["FilmId"].dropna().iloc[0]
+
     # Cache ligero para TMDb y proveedores
     tmdb_cache = {}
     providers_cache = {}
 
-    def get_tmdb_and_providers_for_title(title, year):
+    def get_tmdb_and_providers_for_title(title, year, film_id=None):
         key = (title, year)
         if key in tmdb_cache:
             return tmdb_cache[key], providers_cache.get(key)
-        info = get_tmdb_basic_info(title, year)
+        info = get_tmdb_basic_info(title, year, film_id)
         tmdb_cache[key] = info
         if info and info.get("id"):
-            providers = get_tmdb_providers(info["id"], country="CL")
+            providers = get_tmdb_providers(info["id"])
         else:
             providers = None
         providers_cache[key] = providers
@@ -3215,7 +3502,9 @@ with tab_awards:
                     my_imdb = g["MyIMDb"].dropna().iloc[0] if g["MyIMDb"].notna().any() else None
                     imdb_url = g["CatalogURL"].dropna().iloc[0] if g["CatalogURL"].notna().any() else None
 
-                    tmdb_info, providers_info = get_tmdb_and_providers_for_title(film_title, film_year)
+                    tmdb_info, providers_info = get_tmdb_and_providers_for_title(
+                        film_title, film_year, _first_film_id(g)
+                    )
 
                     card_html = build_oscar_movie_card_html(
                         film_title=film_title,
@@ -3258,7 +3547,9 @@ with tab_awards:
                 imdb_url = g["CatalogURL"].dropna().iloc[0] if g["CatalogURL"].notna().any() else None
                 people = wins["PersonName"].dropna().unique().tolist()
 
-                tmdb_info, providers_info = get_tmdb_and_providers_for_title(film_title, film_year)
+                tmdb_info, providers_info = get_tmdb_and_providers_for_title(
+                    film_title, film_year, _first_film_id(g)
+                )
 
                 card_html = build_oscar_movie_card_html(
                     film_title=film_title,
@@ -3377,7 +3668,9 @@ with tab_awards:
             n_wins = int(film_rows["IsWinner"].sum())
             n_noms = len(film_rows)
 
-            tmdb_info, providers_info = get_tmdb_and_providers_for_title(sel_film, film_year_val)
+            tmdb_info, providers_info = get_tmdb_and_providers_for_title(
+                sel_film, film_year_val, _first_film_id(film_rows)
+            )
 
             in_my_catalog = bool(film_rows["InMyCatalog"].any())
             my_rating = (
@@ -3398,17 +3691,17 @@ with tab_awards:
 
             if providers_info:
                 platforms = providers_info.get("platforms") or []
-                platforms_str = ", ".join(platforms) if platforms else "Sin datos para Chile (CL)"
+                platforms_str = ", ".join(platforms) if platforms else f"Sin datos para {region_label}"
                 streaming_link = providers_info.get("link")
             else:
-                platforms_str = "Sin datos para Chile (CL)"
+                platforms_str = f"Sin datos para {region_label}"
                 streaming_link = None
 
             poster_url = tmdb_info.get("poster_url") if tmdb_info else None
             if poster_url:
                 poster_html = (
                     "<div class='movie-poster-frame' style='width:180px;'>"
-                    f"<img src='{poster_url}' alt='{sel_film}' class='movie-poster-img' />"
+                    f"<img {poster_img_attrs(poster_url)} alt='{sel_film}' class='movie-poster-img' />"
                     "</div>"
                 )
             else:
@@ -3459,11 +3752,11 @@ with tab_awards:
 
             if streaming_link:
                 streaming_html_detail = (
-                    f"Streaming (CL): {platforms_str}<br>"
-                    f'<a href="{streaming_link}" target="_blank">Ver streaming en TMDb (CL)</a>'
+                    f"Streaming ({streaming_region}): {platforms_str}<br>"
+                    f'<a href="{streaming_link}" target="_blank">Ver streaming en TMDb ({streaming_region})</a>'
                 )
             else:
-                streaming_html_detail = f"Streaming (CL): {platforms_str}"
+                streaming_html_detail = f"Streaming ({streaming_region}): {platforms_str}"
 
             # Detalle nominación por fila
             detalle_rows = []
@@ -3543,10 +3836,17 @@ with tab_what:
             )
 
         with colw2:
-            only_unrated = st.checkbox(
-                "Sólo pendientes (sin nota mía)",
-                value=False,
-                help="Recomienda solo películas donde `Your Rating` está vacío.",
+            pool_options = list(WHAT_POOL_LABELS) if "Your Rating" in df.columns else [POOL_ALL]
+            pool_def = st.selectbox(
+                "Sortear entre",
+                options=pool_options,
+                format_func=WHAT_POOL_LABELS.get,
+                help="Pendientes = películas donde `Your Rating` está vacío.",
+            )
+            weighted_pick = pool_def != POOL_UNRATED and st.checkbox(
+                "Ponderar por mi nota",
+                value=pool_def in (POOL_FAVOURITES, POOL_RECENT_TOP),
+                help="Las mejor puntuadas salen más seguido (peso = nota + 1).",
             )
 
         with colw3:
@@ -3558,38 +3858,57 @@ with tab_what:
                 step=0.1,
             )
 
-        pool = filtered_view if use_filtered and not filtered_view.empty else df.copy()
-
-        if only_unrated and "Your Rating" in pool.columns:
-            pool = pool[pool["Your Rating"].isna()].copy()
+        # Pendientes: además de IMDb, según la nota estimada para mi gusto
+        min_pred_pick = None
+        if pool_def == POOL_UNRATED and df["Predicted Rating"].notna().any():
+            min_pred_pick = st.slider(
+                "Nota estimada mínima (según mis notas)",
+                min_value=1.0,
+                max_value=10.0,
+                value=6.0,
+                step=0.1,
+                help="Modelo lineal ajustado con mis notas (géneros, directores, década, duración, IMDb y votos).",
+            )
 
-        if "IMDb Rating" in pool.columns:
-            pool = pool[
-                (pool["IMDb Rating"].isna())
-                | (pool["IMDb Rating"] >= float(min_imdb_pick))
-            ]
+        # Pool precomputado (posiciones + tabla de alias) por definición; sin copiar el catálogo
+        scope_index = filtered_view.index if use_filtered and not filtered_view.empty else None
+        pool_key = (
+            index_fingerprint(scope_index) if scope_index is not None else "all",
+            pool_def,
+            float(min_imdb_pick),
+            min_pred_pick,
+            bool(weighted_pick),
+        )
+        pool_sampler = get_what_pool_sampler(catalog_key, pool_key, df, scope_index)
 
-        if pool.empty:
+        if len(pool_sampler) == 0:
             st.info(
                 "No hay películas que cumplan las condiciones actuales para recomendar."
             )
         else:
             st.markdown("### 🎬 Sugerencia principal")
 
-            if "what_pick" not in st.session_state:
+            # al cambiar de pool, la sugerencia anterior puede no pertenecer al nuevo
+            if "what_pick" not in st.session_state or st.session_state.get("what_pick_pool") != (catalog_key, pool_key):
                 st.session_state.what_pick = None
+                st.session_state.what_pick_pool = (catalog_key, pool_key)
 
             def _pick_random_movie():
-                if pool.empty:
-                    return None
-                return pool.sample(1).iloc[0]
+                # un historial por pool, y sólo los WHAT_HISTORY_POOLS pools más recientes
+                histories = st.session_state.setdefault("what_history", {})
+                history = histories.pop((catalog_key, pool_key), None) or PickHistory()
+                histories[(catalog_key, pool_key)] = history
+                while len(histories) > WHAT_HISTORY_POOLS:
+                    histories.pop(next(iter(histories)))
+                pos = pool_sampler.pick(history)
+                return None if pos is None else df.iloc[pos]
 
             col_btn1, col_btn2 = st.columns([1, 3])
             with col_btn1:
                 if st.button("🎲 Sugerir película"):
                     st.session_state.what_pick = _pick_random_movie()
 
-            if st.session_state.what_pick is None and not pool.empty:
+            if st.session_state.what_pick is None:
                 # Primera sugerencia automática
                 st.session_state.what_pick = _pick_random_movie()
 
@@ -3615,7 +3934,7 @@ with tab_what:
 
                 # Póster + trailer
                 with col_info1:
-                    tmdb_info = get_tmdb_basic_info(titulo, year)
+                    tmdb_info = get_tmdb_basic_info(titulo, year, row.get("Const"))
                     tmdb_id = None
                     if tmdb_info:
                         poster_url = tmdb_info.get("poster_url")
@@ -3625,15 +3944,32 @@ with tab_what:
                         poster_url = None
                         tmdb_vote = None
 
+                    # Una sola llamada trae tráiler, streaming y similares de esta película
+                    if tmdb_id is not None:
+                        get_tmdb_details(tmdb_id)
+
                     if poster_url:
                         st.image(poster_url, use_column_width=True)
                     else:
                         st.write("Sin póster disponible.")
 
+                    # El tráiler se resuelve sólo si se pide (la búsqueda en YouTube cuesta 100 unidades)
                     if show_trailers:
-                        trailer_url = get_youtube_trailer_url(titulo, year)
-                        if trailer_url:
-                            st.video(trailer_url)
+                        trailer_for = row.name   # índice de la sugerencia en el catálogo
+                        show_trailer = st.session_state.get("what_trailer_for") == trailer_for
+                        if not show_trailer and st.button("▶️ Ver tráiler", key="what_trailer_btn"):
+                            st.session_state.what_trailer_for = trailer_for
+                            show_trailer = True
+                        if show_trailer:
+                            trailer_slot = st.empty()
+                            trailer_slot.caption("⏳ Buscando el tráiler…")
+                            trailer_url = get_youtube_trailer_url(
+                                titulo, year, tmdb_id=tmdb_id, imdb_id=row.get("Const")
+                            )
+                            if trailer_url:
+                                trailer_slot.video(trailer_url)
+                            else:
+                                trailer_slot.caption("No se encontró tráiler para esta película.")
 
                 # Detalle + streaming + enlaces
                 with col_info2:
@@ -3658,23 +3994,23 @@ with tab_what:
                         st.write(f"[Ver ficha en IMDb]({url})")
 
                     if tmdb_id is not None:
-                        providers = get_tmdb_providers(tmdb_id, country="CL")
+                        providers = get_tmdb_providers(tmdb_id)
                     else:
                         providers = None
 
                     if providers is None:
-                        st.write("**Streaming (CL):** sin datos de TMDb o sin API key.")
+                        st.write(f"**Streaming ({streaming_region}):** sin datos de TMDb o sin API key.")
                     else:
                         platforms = providers.get("platforms") or []
                         link = providers.get("link")
                         if platforms:
                             st.write(
-                                "**Streaming (CL):** "
+                                f"**Streaming ({streaming_region}):** "
                                 + ", ".join(sorted(set(platforms)))
                             )
                         else:
                             st.write(
-                                "**Streaming (CL):** sin plataformas listadas para Chile."
+                                f"**Streaming ({streaming_region}):** sin plataformas listadas para {REGIONS[streaming_region]}."
                             )
                         if link:
                             st.write(f"[Ver detalle de streaming en TMDb]({link})")
@@ -3686,7 +4022,11 @@ with tab_what:
                 # --------- Recomendaciones similares dentro de tu catálogo ----------
                 st.markdown("### ➕ Otras películas de tu catálogo que te podrían gustar")
 
-                recs = recommend_from_catalog(df, row, top_n=6)
+                # Favoritas: tabla precalculada; resto: cálculo puntual
+                recs = recs_for_seed(get_favourite_recs(catalog_key, df), df, row.name)
+                if recs.empty:
+                    reco_index = get_reco_index(catalog_key, df)
+                    recs = recommend_from_catalog(df, row, top_n=6, index=reco_index)
                 if recs.empty:
                     st.info("No se pudieron generar recomendaciones similares en tu catálogo.")
                 else:
@@ -3702,13 +4042,13 @@ with tab_what:
                         base_rating2 = my2 if pd.notna(my2) else imdb2
                         border_color2, glow_color2 = get_rating_colors(base_rating2)
 
-                        tmdb2 = get_tmdb_basic_info(t2, y2)
+                        tmdb2 = get_tmdb_basic_info(t2, y2, r2.get("Const"))
                         poster2 = tmdb2.get("poster_url") if tmdb2 else None
 
                         if poster2:
                             poster_html2 = f"""
 <div class="movie-poster-frame">
-  <img src="{poster2}" alt="{t2}" class="movie-poster-img">
+  <img {poster_img_attrs(poster2)} alt="{t2}" class="movie-poster-img">
 </div>
 """
                         else:
@@ -3760,6 +4100,86 @@ with tab_what:
                     gallery_recs_html = "\n".join(cards_html)
                     st.markdown(gallery_recs_html, unsafe_allow_html=True)
 
+    # --------- Club de cine: filtrado colaborativo entre varios exports ----------
+    st.markdown("---")
+    st.markdown("### 👥 Club de cine (recomendaciones entre miembros)")
+
+    with st.expander("Ver recomendaciones a partir de los exports del club", expanded=False):
+        club_files = st.file_uploader(
+            "Exports de IMDb de los miembros (un CSV por persona; el nombre del archivo identifica al miembro)",
+            type=["csv"],
+            accept_multiple_files=True,
+            key="club_exports",
+        )
+
+        if not club_files:
+            st.caption(
+                "Sube al menos dos exports. Se cruzan por `Const` y se predice la nota de cada "
+                "miembro para películas que otros ya vieron y que ese miembro aún no ve."
+            )
+        else:
+            club_model, club_labels = get_film_club_model()
+            # Cada archivo subido es un miembro (por su id de subida, no por el nombre:
+            # dos "ratings.csv" son dos personas); el nombre sólo se usa como etiqueta.
+            uploaded = {f.file_id: f for f in club_files}
+            removed = [m for m in list(club_model.users) if m not in uploaded]
+            for member in removed:
+                club_model.remove_user(member)
+                club_labels.pop(member, None)
+
+            changed = []
+            for member, f in uploaded.items():
+                label = re.sub(r"\.csv$", "", f.name, flags=re.IGNORECASE)
+                try:
+                    if club_model.upsert_user(member, pd.read_csv(f)):
+                        changed.append(member)
+                except Exception as e:
+                    st.warning(f"No pude leer el export de {label}: {e}")
+                    continue
+                if member not in club_labels:
+                    taken = set(club_labels.values())
+                    n = 2
+                    name = label
+                    while name in taken:
+                        name, n = f"{label} ({n})", n + 1
+                    club_labels[member] = name
+
+            if (changed or removed) and club_model.n_users:
+                with st.spinner("Ajustando el modelo del club…"):
+                    # Subida nueva de uno o dos miembros: re-ajuste incremental
+                    if club_model.fitted and not removed and len(changed) <= 2:
+                        for member in changed:
+                            club_model.refit_user(member)
+                    else:
+                        club_model.fit()
+
+            club_members = list(club_model.users)
+            club_recs = club_model.recommend(top_n=20, min_raters=1)
+
+            if not club_members:
+                st.info("Los exports no tienen notas (`Your Rating`) ni `Const` válidos.")
+            else:
+                st.caption(
+                    f"{len(club_members)} miembro(s) · {club_model.n_films} película(s) con nota en el club."
+                )
+                member_sel = st.selectbox(
+                    "Miembro", club_members, format_func=club_labels.get, key="club_member"
+                )
+                mine = club_recs[club_recs["User"] == member_sel].copy()
+                if mine.empty:
+                    st.write("No hay películas pendientes para este miembro.")
+                else:
+                    mine["Year"] = mine["Year"].apply(fmt_year)
+                    mine["Predicted"] = mine["Predicted"].apply(fmt_rating)
+                    mine = mine.rename(
+                        columns={"Rank": "#", "Title": "Película", "Year": "Año", "Predicted": "Nota estimada"}
+                    )
+                    st.dataframe(
+                        mine[["#", "Película", "Año", "Nota estimada", "Const"]],
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+
 # ============================================================
 #                     FOOTER / PIE DE PÁGINA
 # ============================================================
@@ -3767,4 +4187,6 @@ with tab_what:
 st.markdown("---")
 st.caption(f"Versión de la app: v{APP_VERSION} · Powered by Diego Leal")
 
+render_degraded_banner(degraded_slot)
+
 
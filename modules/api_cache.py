@@ -0,0 +1,433 @@
+# modules/api_cache.py
+# Caché persistente (SQLite) de respuestas de TMDb / OMDb / YouTube.
+#
+# - Clave: endpoint + parámetros normalizados (sin API keys, orden estable).
+# - TTL por tipo de dato (ids/pósters largos, proveedores de streaming cortos).
+# - Modo WAL: varios lectores concurrentes (todos los procesos del host) y un
+#   escritor a la vez; sobrevive a reinicios y redeploys.
+# - Caché negativa: "no existe" (404, OMDb "Movie not found!") se guarda con el
+#   TTL normal; un fallo transitorio (timeout, 429, 5xx) sólo por unos minutos,
+#   y se re-valida en segundo plano al vencer.
+# - Single flight: pedidos idénticos concurrentes (varias sesiones fallando la
+#   caché a la vez) esperan una sola consulta en vuelo y comparten su resultado.
+# - `python -m modules.api_cache compact` borra vencidos y compacta el archivo.
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+from modules.circuit_breaker import CircuitOpenError
+from modules.http_client import get_client
+from modules.rate_limit import QuotaExceeded
+from modules.single_flight import SingleFlight
+
+DEFAULT_DB_PATH = os.environ.get(
+    "CATALOGO_API_CACHE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "api_cache.sqlite3"),
+)
+
+DAY = 24 * 3600
+TTL_BY_KIND: Dict[str, float] = {
+    "tmdb_search": 30 * DAY,      # id / póster / nota TMDb
+    "tmdb_find": 30 * DAY,        # póster / nota por id IMDb (el id TMDb queda en id_map)
+    "tmdb_providers": 1 * DAY,    # streaming cambia seguido
+    "tmdb_similar": 7 * DAY,
+    "tmdb_details": 7 * DAY,      # ficha + videos (append_to_response); proveedores se reparten con su TTL
+    "tmdb_discover": 1 * DAY,     # catálogo de un proveedor por región (páginas de /discover)
+    "tmdb_provider_list": 7 * DAY,
+    "youtube_search": 30 * DAY,
+    "omdb": 30 * DAY,
+}
+DEFAULT_TTL = 7 * DAY
+TRANSIENT_TTL = 120.0                # fallo transitorio: reintentar en minutos, no al reiniciar
+
+# Resultados de una consulta
+OK = "ok"
+NOT_FOUND = "not_found"
+TRANSIENT = "transient"
+
+# Parámetros que nunca forman parte de la clave
+SECRET_PARAMS = {"api_key", "apikey", "key"}
+
+
+class ApiError(Exception):
+    """Fallo al consultar una API externa (HTTP != 200 o excepción de red)."""
+
+
+class NotFound(ApiError):
+    """La API respondió que el recurso no existe (se cachea con el TTL normal)."""
+
+
+class TransientError(ApiError):
+    """Timeout, 429 o 5xx: se cachea sólo TRANSIENT_TTL y se re-valida en segundo plano."""
+
+
+def make_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Clave estable: endpoint + parámetros ordenados, sin API keys."""
+    clean = {}
+    for k, v in (params or {}).items():
+        if k in SECRET_PARAMS or v is None:
+            continue
+        clean[k] = str(v).strip().lower() if isinstance(v, str) else v
+    return f"{endpoint}?{urlencode(sorted(clean.items()))}" if clean else endpoint
+
+
+class ResponseCache:
+    """Caché clave -> JSON con vencimiento, respaldada en SQLite (WAL)."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'ok')"
+        )
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(responses)")}
+        if "status" not in cols:
+            # archivos creados antes de la caché negativa: todas las filas eran respuestas OK
+            conn.execute("ALTER TABLE responses ADD COLUMN status TEXT NOT NULL DEFAULT 'ok'")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_expires ON responses(expires_at)")
+        # Mapeos de ids externos (tt… -> id TMDb): no cambian, no vencen
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS id_map ("
+            " source TEXT NOT NULL,"
+            " ext_id TEXT NOT NULL,"
+            " target TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (source, ext_id))"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Tuple[Optional[str], Any]:
+        """(status, payload); status None si no hay entrada vigente."""
+        try:
+            row = self._conn().execute(
+                "SELECT status, payload FROM responses WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        except sqlite3.Error:
+            return None, None
+        if row is None:
+            return None, None
+        return row[0], json.loads(row[1])
+
+    def set(self, key: str, kind: str, payload: Any, ttl: Optional[float] = None,
+            status: str = OK) -> None:
+        now = time.time()
+        if ttl is None:
+            ttl = TRANSIENT_TTL if status == TRANSIENT else TTL_BY_KIND.get(kind, DEFAULT_TTL)
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO responses(key, kind, payload, created_at, expires_at, status)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(payload, ensure_ascii=False), now, now + ttl, status),
+            )
+        except sqlite3.Error:
+            # La caché es una optimización: si falla (disco lleno, lock), seguimos sin ella
+            pass
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """Payload OK aunque esté vencido (para servir algo con el proveedor caído o sin cuota)."""
+        try:
+            row = self._conn().execute(
+                "SELECT payload FROM responses WHERE key = ? AND status = ?", (key, OK)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return json.loads(row[0]) if row else None
+
+    def get_mapping(self, source: str, ext_id: str) -> Optional[str]:
+        try:
+            row = self._conn().execute(
+                "SELECT target FROM id_map WHERE source = ? AND ext_id = ?", (source, ext_id)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def set_mapping(self, source: str, ext_id: str, target: str) -> None:
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO id_map(source, ext_id, target, created_at) VALUES (?, ?, ?, ?)",
+                (source, ext_id, str(target), time.time()),
+            )
+        except sqlite3.Error:
+            pass
+
+    def compact(self) -> int:
+        """Borra entradas vencidas, hace checkpoint del WAL y VACUUM. Devuelve cuántas borró."""
+        conn = self._conn()
+        deleted = conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+        return deleted
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        now = time.time()
+        rows = self._conn().execute(
+            "SELECT kind, COUNT(*), SUM(expires_at > ?), SUM(LENGTH(payload)),"
+            " SUM(status = 'not_found'), SUM(status = 'transient' AND expires_at > ?)"
+            " FROM responses GROUP BY kind",
+            (now, now),
+        ).fetchall()
+        return {
+            k: {"entries": n, "live": int(live or 0), "bytes": int(size or 0),
+                "not_found": int(nf or 0), "transient": int(tr or 0)}
+            for k, n, live, size, nf, tr in rows
+        }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Caché del proceso (una por proceso; el archivo se comparte entre procesos)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(os.environ.get("CATALOGO_API_CACHE", DEFAULT_DB_PATH))
+        return _cache
+
+
+# ---------- contadores por resultado ----------
+_outcomes: Counter = Counter()
+_outcomes_lock = threading.Lock()
+
+
+def _count(kind: str, outcome: str) -> None:
+    with _outcomes_lock:
+        _outcomes[(kind, outcome)] += 1
+
+
+def outcome_counts() -> Dict[str, Dict[str, int]]:
+    """
+    {kind: {outcome: n}} del proceso (hit, ok, not_found, transient, negative_hit,
+    revalidated, circuit_open, quota, stale, coalesced).
+    """
+    with _outcomes_lock:
+        items = list(_outcomes.items())
+    out: Dict[str, Dict[str, int]] = {}
+    for (kind, outcome), n in sorted(items):
+        out.setdefault(kind, {})[outcome] = n
+    return out
+
+
+def _default_classify(data: Any) -> str:
+    return OK
+
+
+def _fetch(kind: str, key: str, url: str, params: Optional[Dict[str, Any]], timeout: float,
+           classify: Callable[[Any], str]) -> Tuple[str, Any, Optional[str]]:
+    """Consulta la red y guarda el resultado según su clase. (status, payload, detalle)."""
+    cache = get_response_cache()
+    try:
+        r = get_client().get(url, params=params, timeout=timeout)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        cache.set(key, kind, None, status=TRANSIENT)
+        return TRANSIENT, None, str(e)
+    if r.status_code == 404:
+        cache.set(key, kind, None, status=NOT_FOUND)
+        return NOT_FOUND, None, "HTTP 404"
+    if r.status_code == 429 or r.status_code >= 500:
+        cache.set(key, kind, None, status=TRANSIENT)
+        return TRANSIENT, None, f"HTTP {r.status_code}"
+    if r.status_code in (401, 403):
+        # OMDb contesta 401 "Request limit reached!" al agotar la cuota diaria:
+        # el cuerpo decide si es transitorio o un problema de API key
+        try:
+            body = r.json()
+        except ValueError:
+            body = None
+        if isinstance(body, dict) and classify(body) == TRANSIENT:
+            cache.set(key, kind, None, status=TRANSIENT)
+            return TRANSIENT, None, str(body.get("Error") or f"HTTP {r.status_code}")
+    if r.status_code != 200:
+        # 400/401/403: error de configuración (API key, parámetros); no se cachea
+        raise ApiError(f"HTTP {r.status_code}")
+    try:
+        data = r.json()
+    except ValueError:
+        cache.set(key, kind, None, status=TRANSIENT)
+        return TRANSIENT, None, "respuesta no es JSON"
+    status = classify(data)
+    cache.set(key, kind, data if status != TRANSIENT else None, status=status)
+    return status, data, None
+
+
+class _Revalidator:
+    """Hilo único que reintenta, al vencer su TTL corto, las consultas que fallaron transitoriamente."""
+
+    def __init__(self):
+        self._heap = []
+        self._pending: Dict[str, tuple] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, key: str, job: tuple, delay: float = TRANSIENT_TTL) -> None:
+        with self._cond:
+            if key in self._pending:
+                return
+            self._pending[key] = job
+            heapq.heappush(self._heap, (time.time() + delay, key))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="api-revalidate", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                due, key = self._heap[0]
+                wait = due - time.time()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                job = self._pending.pop(key, None)
+            if job is None:
+                continue
+            kind, url, params, timeout, classify = job
+            try:
+                status, _, _ = _fetch(kind, key, url, params, timeout, classify)
+            except CircuitOpenError:
+                status = TRANSIENT
+            except ApiError:
+                continue
+            _count(kind, "revalidated" if status != TRANSIENT else TRANSIENT)
+            if status == TRANSIENT:
+                self.schedule(key, job)
+
+
+_revalidator = _Revalidator()
+_flights = SingleFlight()
+
+
+def coalesced_stats() -> Dict[str, int]:
+    """Consultas a la red en el proceso vs. pedidos que se colgaron de una idéntica en vuelo."""
+    return _flights.stats()
+
+
+def cached_get_json(kind: str, url: str, params: Optional[Dict[str, Any]] = None,
+                    timeout: float = 5, classify: Optional[Callable[[Any], str]] = None) -> Any:
+    """GET JSON con caché persistente (ver cached_get_json_fresh); sólo el JSON."""
+    return cached_get_json_fresh(kind, url, params, timeout, classify)[0]
+
+
+def cached_get_json_fresh(kind: str, url: str, params: Optional[Dict[str, Any]] = None,
+                          timeout: float = 5, classify: Optional[Callable[[Any], str]] = None) -> Tuple[Any, bool]:
+    """
+    GET JSON con caché persistente. Devuelve (JSON, fresco): fresco=True si
+    la respuesta acaba de llegar de la red (y no del disco ni de una copia
+    vencida), para que el llamador sepa si vale la pena derivar otras entradas.
+    La red pasa por el cliente compartido (keep-alive por host, reintentos con backoff).
+
+    `classify(data)` decide si una respuesta 200 es OK, NOT_FOUND o TRANSIENT
+    (p. ej. OMDb responde 200 con "Movie not found!" o "Request limit reached!").
+    - OK / NOT_FOUND por contenido: se cachean con el TTL normal y se devuelven.
+    - HTTP 404: se cachea con el TTL normal y lanza NotFound.
+    - Red / 429 / 5xx / TRANSIENT: se cachea TRANSIENT_TTL, se agenda una
+      re-validación en segundo plano y lanza TransientError.
+    - Otros 4xx: lanza ApiError sin cachear.
+    - Circuito abierto o cuota diaria agotada: devuelve la última respuesta OK
+      aunque esté vencida; si no hay, lanza TransientError sin llamar a la red.
+    """
+    classify = classify or _default_classify
+    cache = get_response_cache()
+    key = make_key(url, params)
+    status, payload = cache.get(key)
+    if status == TRANSIENT:
+        _count(kind, "negative_hit")
+        raise TransientError("fallo reciente; se reintenta en segundo plano")
+    if status == NOT_FOUND and payload is None:
+        _count(kind, "negative_hit")
+        raise NotFound("HTTP 404")
+    if status is not None:
+        _count(kind, "hit")
+        return payload, False
+
+    try:
+        (status, payload, detail), shared = _flights.do(
+            key, lambda: _fetch(kind, key, url, params, timeout, classify)
+        )
+    except CircuitOpenError as e:
+        # proveedor caído o sin cuota: sin red ni escritura en disco; se sirve la
+        # última respuesta buena aunque esté vencida, o la app muestra un marcador
+        _count(kind, "quota" if isinstance(e, QuotaExceeded) else "circuit_open")
+        stale = cache.get_stale(key)
+        if stale is not None:
+            _count(kind, "stale")
+            return stale, False
+        raise TransientError(str(e)) from e
+    # los que esperaron una consulta idéntica en vuelo no cuentan como llamada a la red
+    _count(kind, "coalesced" if shared else status)
+    if status == TRANSIENT:
+        _revalidator.schedule(key, (kind, url, params, timeout, classify))
+        raise TransientError(detail or "fallo transitorio")
+    if status == NOT_FOUND and payload is None:
+        raise NotFound(detail or "HTTP 404")
+    return payload, True
+
+
+def transient_fallback(default: Any = None):
+    """
+    Para envolver helpers con @st.cache_data: el helper deja escapar TransientError
+    (Streamlit no memoiza excepciones) y aquí se traduce a `default`, así un
+    timeout no queda memoizado por toda la vida del proceso.
+    """
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            except TransientError:
+                return default() if callable(default) else default
+        return wrapper
+    return deco
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Mantenimiento de la caché persistente de APIs.")
+    ap.add_argument("command", choices=["compact", "stats"])
+    ap.add_argument("--db", default=DEFAULT_DB_PATH)
+    args = ap.parse_args()
+
+    rc = ResponseCache(args.db)
+    if args.command == "compact":
+        print(f"Entradas vencidas borradas: {rc.compact()}")
+    for kind, st_kind in sorted(rc.stats().items()):
+        print(f"{kind:16s} entradas={st_kind['entries']:7d} vigentes={st_kind['live']:7d} "
+              f"no_encontradas={st_kind['not_found']:6d} transitorias={st_kind['transient']:5d} "
+              f"bytes={st_kind['bytes']:10d}")
@@ -0,0 +1,119 @@
+# modules/awards_batch.py
+# Lookups de premios en lote: pool de hilos acotado y resultados por tandas.
+#
+# Cada lookup sigue siendo la función síncrona de siempre (CSV de premios ->
+# sidecar -> OMDb con caché persistente); aquí sólo se reparten en un pool:
+# - el tamaño del pool es la concurrencia configurada para OMDb en rate_limit
+#   (CATALOGO_OMDB_CONCURRENCY);
+# - el ritmo y la cuota diaria los sigue imponiendo el limitador del proveedor
+#   dentro de http_client, así que el lote no puede saltárselos. Lo que se gana
+#   es solapar la latencia de OMDb: en serie cada consulta espera la respuesta
+#   de la anterior y el ritmo real queda muy por debajo del permitido;
+# - los resultados salen en tandas a medida que se completan, para que la app
+#   actualice tabla y barra de progreso;
+# - cerrar el generador (o que Streamlit corte el script por un "Cancelar")
+#   cancela lo que aún no empezó.
+#
+# `python -m modules.awards_batch --films 40` lo prueba contra el OMDb falso local
+# (modules.fake_apis).
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import as_completed
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from modules.prefetch import script_executor
+from modules.rate_limit import get_limiter
+
+DEFAULT_BATCH = 20
+
+Batch = List[Tuple[int, Any]]   # (posición en la entrada, resultado); None si el lookup falló
+
+
+def default_concurrency(provider: str = "omdb") -> int:
+    """Lookups en vuelo: la concurrencia del limitador del proveedor (8 si no tiene)."""
+    return int(getattr(get_limiter(provider), "concurrency", 0) or 8)
+
+
+def iter_batches(items: Iterable[Any], fetch: Callable[[Any], Any],
+                 concurrency: Optional[int] = None, batch_size: int = DEFAULT_BATCH) -> Iterator[Batch]:
+    """
+    Aplica `fetch` (síncrona, bloqueante) a cada item con a lo sumo `concurrency`
+    llamadas en vuelo y entrega tandas de `batch_size` resultados en orden de
+    llegada. Cerrar el generador (contextlib.closing, o el corte del script)
+    cancela los lookups pendientes; los que ya estaban en curso terminan en
+    segundo plano y quedan en caché.
+    """
+    items = list(items)
+    if not items:
+        return
+
+    def _safe(item):
+        try:
+            return fetch(item)
+        except Exception:
+            return None
+
+    concurrency = max(1, concurrency or default_concurrency())
+    executor = script_executor(min(concurrency, len(items)), thread_name_prefix="awards")
+    futures = {executor.submit(_safe, it): i for i, it in enumerate(items)}
+    batch: Batch = []
+    try:
+        for fut in as_completed(futures):
+            batch.append((futures[fut], fut.result()))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------- prueba local contra el OMDb falso ----------
+def _demo(n_films: int, latency: float, error_rate: float, batch_size: int) -> None:
+    # caché y cuota temporales: la prueba no toca las del usuario
+    tmp = tempfile.mkdtemp(prefix="awards_batch_")
+    os.environ["CATALOGO_API_CACHE"] = os.path.join(tmp, "api_cache.sqlite3")
+    os.environ["CATALOGO_QUOTA_DB"] = os.path.join(tmp, "quota.sqlite3")
+    from modules.fake_apis import FakeApiServer
+
+    server = FakeApiServer(latency=latency, error_rate=error_rate).start()
+    os.environ["CATALOGO_API_BASE"] = server.base_url
+    from modules import external_apis   # lee CATALOGO_API_BASE al importarse
+
+    def fetch(n: int):
+        return external_apis.omdb_awards(None, None, external_apis.FAKE_API_KEY, imdb_id=f"tt{n:07d}")
+
+    t0 = time.perf_counter()
+    serial = [fetch(n) for n in range(1, n_films + 1)]
+    serial_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    done, ok = 0, 0
+    for batch in iter_batches(range(n_films + 1, 2 * n_films + 1), fetch, batch_size=batch_size):
+        done += len(batch)
+        ok += sum(1 for _, res in batch if isinstance(res, dict) and "error" not in res)
+        print(f"  tanda: {done}/{n_films} ({time.perf_counter() - t0:.2f} s)")
+    batch_s = time.perf_counter() - t0
+    server.stop()
+
+    rps = get_limiter("omdb").snapshot().get("rps")
+    serial_ok = sum(1 for res in serial if isinstance(res, dict) and "error" not in res)
+    print(f"serie: {n_films} películas en {serial_s:.2f} s ({serial_ok} con premios)")
+    print(f"lote:  {n_films} películas en {batch_s:.2f} s ({ok} con premios), "
+          f"concurrencia {default_concurrency()}, tope {rps} req/s")
+    print(f"servidor: {server.stats()}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Lookups de premios en lote contra el OMDb falso local.")
+    ap.add_argument("--films", type=int, default=40)
+    ap.add_argument("--latency", type=float, default=0.5, help="segundos por respuesta del servidor falso")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas 503")
+    ap.add_argument("--batch-size", type=int, default=DEFAULT_BATCH)
+    args = ap.parse_args()
+    _demo(args.films, args.latency, args.error_rate, args.batch_size)
@@ -0,0 +1,136 @@
+# modules/awards_parser.py
+# Parseo del texto "Awards" de OMDb ("Won 2 Oscars. 20 wins & 19 nominations total").
+#
+# Una sola tabla de patrones compilados sirve a los dos caminos:
+# - parse_awards_series: una columna entera (sidecar, CSV de premios) con
+#   `str.extract` / `str.contains`, una pasada vectorizada por patrón sobre
+#   los textos distintos (los repetidos se resuelven con factorize + take).
+# - parse_awards_text: un string suelto (respuesta en vivo de OMDb).
+#
+# `python -m modules.awards_parser --rows 100000` compara ambos caminos.
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+EMPTY_AWARDS = {
+    "raw": None,
+    "oscars": 0,
+    "emmys": 0,
+    "baftas": 0,
+    "golden_globes": 0,
+    "palme_dor": False,
+    "oscars_nominated": 0,
+    "total_wins": 0,
+    "total_nominations": 0,
+}
+
+# Patrones sobre el texto en minúsculas (más rápido que IGNORECASE en cada pasada).
+# clave -> patrón con un grupo numérico
+COUNT_PATTERNS = {
+    "oscars": re.compile(r"won\s+(\d+)\s+oscars?"),
+    "oscars_nominated": re.compile(r"nominated\s+for\s+(\d+)\s+oscars?"),
+    "emmys": re.compile(r"won\s+(\d+)\s+(?:primetime\s+)?emmys?"),
+    "baftas": re.compile(r"won\s+(\d+)[^\.]*bafta"),
+    "golden_globes": re.compile(r"won\s+(\d+)[^\.]*golden\s+globes?"),
+    "total_wins": re.compile(r"(\d+)\s+wins?"),
+    "total_nominations": re.compile(r"(\d+)\s+nominations?"),
+}
+# si el conteo no aparece pero el premio se menciona, cuenta como 1
+MENTION_FALLBACKS = {
+    "baftas": re.compile(r"bafta"),
+    "golden_globes": re.compile(r"golden\s+globe"),
+}
+PALME_DOR = re.compile(r"palme\s+d['’]or")
+
+
+def parse_awards_text(awards_str: Optional[str]) -> Dict[str, Any]:
+    """Parseo básico del texto "Awards" de OMDb."""
+    if not isinstance(awards_str, str) or not awards_str or awards_str == "N/A":
+        return dict(EMPTY_AWARDS)
+    text = awards_str.lower()
+    out: Dict[str, Any] = {"raw": awards_str}
+    for key, pat in COUNT_PATTERNS.items():
+        m = pat.search(text)
+        if m:
+            out[key] = int(m.group(1))
+        elif key in MENTION_FALLBACKS and MENTION_FALLBACKS[key].search(text):
+            out[key] = 1
+        else:
+            out[key] = 0
+    out["palme_dor"] = bool(PALME_DOR.search(text))
+    return {key: out[key] for key in EMPTY_AWARDS}
+
+
+def parse_awards_series(awards: pd.Series) -> pd.DataFrame:
+    """
+    Columna de textos "Awards" -> DataFrame con las mismas claves que
+    parse_awards_text (raw, oscars, ..., total_nominations), mismo índice.
+    """
+    raw = awards.where(awards.map(lambda v: isinstance(v, str)), "")
+    raw = raw.mask(raw.eq("N/A"), "")
+    codes, uniques = pd.factorize(raw)
+    text = pd.Series(uniques, dtype=object).str.lower()
+
+    parsed = pd.DataFrame(index=text.index)
+    for key, pat in COUNT_PATTERNS.items():
+        counts = pd.to_numeric(text.str.extract(pat, expand=False), errors="coerce")
+        if key in MENTION_FALLBACKS:
+            mentioned = text.str.contains(MENTION_FALLBACKS[key])
+            counts = counts.mask(counts.isna() & mentioned, 1)
+        parsed[key] = counts.fillna(0).astype(int)
+    parsed["palme_dor"] = text.str.contains(PALME_DOR).astype(bool)
+
+    out = parsed.take(codes).set_axis(awards.index)
+    out.insert(0, "raw", raw.where(raw.ne(""), None))
+    return out[list(EMPTY_AWARDS)]
+
+
+def synthetic_awards(n_rows: int, seed: int = 0) -> pd.Series:
+    """Textos de premios con el formato de OMDb (para el benchmark)."""
+    rng = np.random.default_rng(seed)
+    heads = [
+        "", "Won {a} Oscars. ", "Won 1 Oscar. ", "Nominated for {a} Oscars. ", "Won {a} Primetime Emmys. ",
+        "Won {a} BAFTA Film Awards", "Nominated for 1 BAFTA Award", "Won {a} Golden Globes. ",
+        "Nominated for 1 Golden Globe. ", "Won Palme d'Or. ",
+    ]
+    tails = ["{w} wins & {n} nominations total", "{n} nominations total", "1 win total", ""]
+    h = rng.integers(0, len(heads), n_rows)
+    t = rng.integers(0, len(tails), n_rows)
+    a, w, n = rng.integers(1, 12, n_rows), rng.integers(1, 300, n_rows), rng.integers(1, 400, n_rows)
+    out = [
+        (heads[hi] + tails[ti]).format(a=ai, w=wi, n=wi + ni) or "N/A"
+        for hi, ti, ai, wi, ni in zip(h, t, a, w, n)
+    ]
+    return pd.Series(out, name="awards_raw")
+
+
+def benchmark(n_rows: int = 100_000, seed: int = 0) -> pd.DataFrame:
+    """Tiempo del parseo fila a fila vs. vectorizado, y si ambos coinciden."""
+    texts = synthetic_awards(n_rows, seed)
+    t0 = time.perf_counter()
+    rowwise = pd.DataFrame([parse_awards_text(s) for s in texts], index=texts.index)
+    rowwise_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    vectorized = parse_awards_series(texts)
+    vectorized_s = time.perf_counter() - t0
+    same = rowwise.drop(columns="raw").eq(vectorized.drop(columns="raw")).all().all()
+    return pd.DataFrame([
+        {"método": "fila a fila (parse_awards_text)", "filas": n_rows, "s": rowwise_s,
+         "filas/s": n_rows / rowwise_s, "coincide": True},
+        {"método": "vectorizado (parse_awards_series)", "filas": n_rows, "s": vectorized_s,
+         "filas/s": n_rows / vectorized_s, "coincide": bool(same)},
+    ])
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark del parser de premios de OMDb.")
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    print(benchmark(args.rows, args.seed).to_string(index=False, float_format="%.3f"))
@@ -0,0 +1,93 @@
+# modules/awards_store.py
+# Premios precalculados: `peliculas_con_premios_2025.csv` como proveedor local.
+#
+# La app busca primero aquí (por Const / imdb_id, o título+año para filas sin
+# id) y sólo consulta OMDb para las películas que falten o cuyo registro quedó
+# con un error no definitivo (p. ej. "HTTP 401 from OMDb"). Cada resultado nuevo
+# se agrega al final del CSV; al releerlo, la última fila de una película gana.
+from __future__ import annotations
+
+import csv
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from modules.enrich import AWARD_COLUMNS, awards_from_row, reparse_awards, title_year_key
+from modules.external_apis import valid_imdb_id
+
+DEFAULT_AWARDS_CSV = os.environ.get(
+    "CATALOGO_AWARDS_CSV",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "peliculas_con_premios_2025.csv"),
+)
+
+# columnas mínimas si el CSV no existe todavía
+BASE_COLUMNS = ["Const", "Title", "Year", *AWARD_COLUMNS, "imdb_id", "awards_error"]
+
+
+class AwardsStore:
+    """Índice en memoria del CSV de premios + append de resultados nuevos."""
+
+    def __init__(self, path: str = DEFAULT_AWARDS_CSV):
+        self.path = path
+        self._lock = threading.Lock()
+        self._rows: Dict[str, pd.Series] = {}
+        self.columns = list(BASE_COLUMNS)
+        self.appended = 0
+        if path and os.path.exists(path):
+            try:
+                df = pd.read_csv(path, dtype={"Const": str, "imdb_id": str})
+            except Exception:
+                df = pd.DataFrame()
+            if not df.empty:
+                self.columns = list(df.columns)
+                df = reparse_awards(df)
+                for _, row in df.iterrows():
+                    self._index(row)
+
+    def _keys(self, row) -> list:
+        keys = [valid_imdb_id(row.get("Const")), valid_imdb_id(row.get("imdb_id"))]
+        keys = [k for k in keys if k]
+        if row.get("Title") is not None and not pd.isna(row.get("Title")):
+            keys.append(title_year_key(row.get("Title"), row.get("Year")))
+        return keys
+
+    def _index(self, row: pd.Series) -> None:
+        for k in self._keys(row):
+            self._rows[k] = row   # filas posteriores (agregadas) reemplazan a las anteriores
+
+    def lookup(self, title, year=None, imdb_id=None) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(encontrado, premios). Por id de IMDb si lo hay; si no, por título+año."""
+        const = valid_imdb_id(imdb_id)
+        row = self._rows.get(const) if const else None
+        if row is None:
+            row = self._rows.get(title_year_key(title, year))
+        return (False, None) if row is None else awards_from_row(row)
+
+    def append(self, title, year, imdb_id, awards: Dict[str, Any]) -> None:
+        """Agrega el resultado de OMDb al CSV (y al índice). Sólo resultados, no errores."""
+        if not isinstance(awards, dict) or "error" in awards:
+            return
+        rec: Dict[str, Any] = {"Const": valid_imdb_id(imdb_id) or "", "Title": title, "Year": year,
+                               "imdb_id": valid_imdb_id(imdb_id) or "", "awards_error": ""}
+        for col, key in AWARD_COLUMNS.items():
+            rec[col] = awards.get(key)
+        with self._lock:
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            try:
+                if not new_file:
+                    with open(self.path, "rb") as f:
+                        f.seek(-1, os.SEEK_END)
+                        missing_newline = f.read(1) not in (b"\n", b"\r")
+                with open(self.path, "a", newline="", encoding="utf-8") as f:
+                    w = csv.DictWriter(f, fieldnames=self.columns, extrasaction="ignore")
+                    if new_file:
+                        w.writeheader()
+                    elif missing_newline:
+                        f.write("\n")
+                    w.writerow(rec)
+            except OSError:
+                pass   # sin disco escribible seguimos sólo en memoria
+            self._index(pd.Series(rec))
+            self.appended += 1
@@ -0,0 +1,217 @@
+# modules/circuit_breaker.py
+# Circuit breaker por proveedor (TMDb / OMDb / YouTube).
+#
+# - CLOSED: las llamadas pasan; se lleva una ventana de los últimos resultados.
+# - OPEN: con suficientes llamadas y una tasa de error ≥ umbral, se deja de
+#   llamar a la red durante `open_seconds`; las consultas fallan al instante y
+#   la app muestra lo que tenga en caché o un marcador.
+# - HALF_OPEN: vencido ese plazo, una sola llamada de prueba decide si el
+#   circuito se cierra (éxito) o vuelve a abrirse (fallo).
+#
+# Configuración por variables de entorno (valores por defecto entre paréntesis):
+#   CATALOGO_CB_ERROR_RATE (0.5), CATALOGO_CB_MIN_CALLS (6),
+#   CATALOGO_CB_WINDOW (20), CATALOGO_CB_OPEN_SECONDS (30)
+#
+# `python -m modules.circuit_breaker` usa el servidor falso (modules.fake_apis)
+# con latencia y errores inyectados y muestra cómo se abre y se cierra el circuito.
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict
+from urllib.parse import urlsplit
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+PROVIDER_LABELS = {"tmdb": "TMDb", "omdb": "OMDb", "youtube": "YouTube"}
+
+
+class CircuitOpenError(Exception):
+    """El circuito del proveedor está abierto: no se llamó a la red."""
+
+    def __init__(self, provider: str, retry_in: float = 0.0):
+        super().__init__(f"{PROVIDER_LABELS.get(provider, provider)} en modo degradado")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def provider_for(url: str) -> str:
+    # con CATALOGO_API_BASE (servidor falso / proxy) el servicio va en la ruta: {base}/tmdb/...
+    api_base = os.environ.get("CATALOGO_API_BASE", "").rstrip("/")
+    if api_base and url.startswith(api_base + "/"):
+        service = url[len(api_base) + 1:].split("/", 1)[0]
+        if service in PROVIDER_LABELS:
+            return service
+    host = urlsplit(url).netloc.lower()
+    if "themoviedb" in host:
+        return "tmdb"
+    if "omdbapi" in host:
+        return "omdb"
+    if "googleapis" in host or "youtube" in host:
+        return "youtube"
+    return host
+
+
+class CircuitBreaker:
+    """Breaker por tasa de error sobre una ventana de las últimas llamadas."""
+
+    def __init__(self, name: str, error_rate: float = 0.5, min_calls: int = 6,
+                 window: int = 20, open_seconds: float = 30.0):
+        self.name = name
+        self.error_rate = float(error_rate)
+        self.min_calls = int(min_calls)
+        self.open_seconds = float(open_seconds)
+        self._results = deque(maxlen=int(window))   # True = error
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.opened_count = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """¿Puede salir esta llamada? En HALF_OPEN sólo pasa una prueba a la vez."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self._state = CLOSED
+                    self._results.clear()
+                else:
+                    self._trip()
+                return
+            if self._state == OPEN:
+                return   # respuesta tardía de una llamada previa a la apertura
+            self._results.append(not ok)
+            n = len(self._results)
+            if n >= self.min_calls and sum(self._results) / n >= self.error_rate:
+                self._trip()
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._results.clear()
+        self.opened_count += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        state = self.state
+        with self._lock:
+            errors = sum(self._results)
+            n = len(self._results)
+        return {
+            "state": state,
+            "retry_in_s": round(self.retry_in(), 1),
+            "window_error_rate": round(errors / n, 2) if n else 0.0,
+            "opened": self.opened_count,
+            "rejected": self.rejected,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    with _breakers_lock:
+        br = _breakers.get(provider)
+        if br is None:
+            br = _breakers[provider] = CircuitBreaker(
+                provider,
+                error_rate=_env_float("CATALOGO_CB_ERROR_RATE", 0.5),
+                min_calls=int(_env_float("CATALOGO_CB_MIN_CALLS", 6)),
+                window=int(_env_float("CATALOGO_CB_WINDOW", 20)),
+                open_seconds=_env_float("CATALOGO_CB_OPEN_SECONDS", 30.0),
+            )
+        return br
+
+
+def breaker_states() -> Dict[str, Dict[str, object]]:
+    with _breakers_lock:
+        items = list(_breakers.items())
+    return {name: br.snapshot() for name, br in sorted(items)}
+
+
+def degraded_providers() -> Dict[str, float]:
+    """{proveedor: segundos hasta el próximo intento} de los circuitos no cerrados."""
+    with _breakers_lock:
+        items = list(_breakers.items())
+    return {name: br.retry_in() for name, br in items if br.state != CLOSED}
+
+
+if __name__ == "__main__":
+    # el registro de breakers que usa el cliente es el del módulo importado, no el de __main__
+    from modules import circuit_breaker as cb
+    from modules.fake_apis import FakeApiServer
+    from modules.http_client import HttpClient
+
+    ap = argparse.ArgumentParser(description="Demo del circuit breaker contra el servidor falso con fallas inyectadas.")
+    ap.add_argument("--latency", type=float, default=0.3, help="latencia inyectada (s)")
+    ap.add_argument("--error-rate", type=float, default=0.8, help="fracción de respuestas 503")
+    ap.add_argument("--requests", type=int, default=40)
+    ap.add_argument("--timeout", type=float, default=1.0)
+    ap.add_argument("--open-seconds", type=float, default=2.0)
+    ap.add_argument("--heal-after", type=float, default=3.0, help="segundos hasta que el servidor se recupera")
+    args = ap.parse_args()
+
+    server = FakeApiServer(latency=args.latency, error_rate=args.error_rate).start()
+    os.environ["CATALOGO_API_BASE"] = server.base_url
+    url = f"{server.base_url}/tmdb/3/search/movie"
+    breaker = cb.get_breaker(cb.provider_for(url))
+    breaker.open_seconds = args.open_seconds
+
+    client = HttpClient(max_retries=0)
+    t_all = time.perf_counter()
+    for i in range(args.requests):
+        if time.perf_counter() - t_all > args.heal_after:
+            server.latency = server.error_rate = 0.0
+        t0 = time.perf_counter()
+        try:
+            r = client.get(url, params={"query": "Heat"}, timeout=args.timeout)
+            outcome = f"HTTP {r.status_code}"
+        except cb.CircuitOpenError as e:
+            outcome = f"fail-fast ({e.retry_in:.1f}s)"
+        except Exception as e:
+            outcome = type(e).__name__
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"{i:3d} {breaker.state:9s} {outcome:22s} {ms:7.1f} ms")
+        time.sleep(0.1)
+    server.stop()
+    print(f"total {time.perf_counter() - t_all:.1f}s; servidor: {server.stats()}")
+    print(cb.breaker_states())
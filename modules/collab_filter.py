@@ -0,0 +1,276 @@
+# modules/collab_filter.py
+# Filtrado colaborativo para varios exports de IMDb (club de cine).
+#
+# - Une los exports por `Const` (tt...) en una matriz usuario × película dispersa
+#   (tripletas COO: usuario, película, nota).
+# - Ajusta una factorización de bajo rango con ALS (NumPy puro, resolviendo en
+#   lote los sistemas k×k de todos los usuarios / películas).
+# - Re-ajuste incremental cuando un miembro vuelve a subir su export.
+# - Top-N por usuario en lote (una multiplicación matricial + argpartition).
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, List, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+def export_fingerprint(df: pd.DataFrame) -> str:
+    """Huella del export (Const + nota) para detectar re-subidas con cambios."""
+    cols = [c for c in ["Const", "Your Rating"] if c in df.columns]
+    h = pd.util.hash_pandas_object(df[cols].astype(str), index=False).to_numpy()
+    return hashlib.sha1(h.tobytes()).hexdigest()[:16]
+
+
+def _ratings_from_export(df: pd.DataFrame) -> pd.DataFrame:
+    """Extrae (Const, nota, título, año) de un export de IMDb; descarta filas sin nota."""
+    if "Const" not in df.columns or "Your Rating" not in df.columns:
+        return pd.DataFrame(columns=["Const", "Your Rating", "Title", "Year"])
+    out = pd.DataFrame({
+        "Const": df["Const"].astype(str).str.strip(),
+        "Your Rating": pd.to_numeric(df["Your Rating"], errors="coerce"),
+        "Title": df["Title"] if "Title" in df.columns else "",
+        "Year": pd.to_numeric(df["Year"], errors="coerce") if "Year" in df.columns else np.nan,
+    })
+    out = out[out["Const"].str.startswith("tt") & out["Your Rating"].notna()]
+    return out.drop_duplicates("Const", keep="last")
+
+
+def _solve_blocks(owner: np.ndarray, other: np.ndarray, resid: np.ndarray,
+                  factors: np.ndarray, n_owner: int, reg: float) -> np.ndarray:
+    """
+    Resuelve en lote (Σ v vᵀ + λ·n·I) x = Σ r v para cada "owner" (usuario o película),
+    con las tripletas ya ordenadas por owner.
+
+    Las Gram Σ v vᵀ se arman según la forma del problema:
+      - pocos "other" distintos (p. ej. decenas de usuarios al resolver películas):
+        matriz densa owner × other por las outer products de cada other;
+      - pocos owners (p. ej. resolver usuarios): un producto V_uᵀ V_u por owner;
+      - caso general: reduceat sobre las outer products de cada tripleta.
+    """
+    k = factors.shape[1]
+    out = np.zeros((n_owner, k))
+    if len(owner) == 0:
+        return out
+    starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+    owners = owner[starts]
+    counts = np.diff(np.r_[starts, len(owner)])
+    seg = np.repeat(np.arange(len(starts)), counts)
+
+    others, other_pos = np.unique(other, return_inverse=True)
+    if len(others) <= 512:
+        W = factors[others]                                             # (o, k)
+        M = np.zeros((len(starts), len(others)))
+        R = np.zeros((len(starts), len(others)))
+        np.add.at(M, (seg, other_pos), 1.0)
+        np.add.at(R, (seg, other_pos), resid)
+        A = (M @ (W[:, :, None] * W[:, None, :]).reshape(len(others), k * k)).reshape(-1, k, k)
+        b = R @ W
+    elif len(starts) <= 1024:
+        A = np.empty((len(starts), k, k))
+        b = np.empty((len(starts), k))
+        for j, (a, n) in enumerate(zip(starts, counts)):
+            V = factors[other[a:a + n]]
+            A[j] = V.T @ V
+            b[j] = V.T @ resid[a:a + n]
+    else:
+        V = factors[other]
+        A = np.add.reduceat(V[:, :, None] * V[:, None, :], starts, axis=0)
+        b = np.add.reduceat(V * resid[:, None], starts, axis=0)
+
+    A += (reg * counts)[:, None, None] * np.eye(k)[None, :, :]
+    out[owners] = np.linalg.solve(A, b[:, :, None])[:, :, 0]
+    return out
+
+
+class FilmClubModel:
+    """Modelo ALS sobre los exports de los miembros del club."""
+
+    def __init__(self, factors: int = 16, reg: float = 0.1, iters: int = 12, seed: int = 0):
+        self.k = int(factors)
+        self.reg = float(reg)
+        self.iters = int(iters)
+        self._rng = np.random.default_rng(seed)
+
+        self.users: List[str] = []
+        self.fingerprints: Dict[str, str] = {}
+        self.films = pd.DataFrame(columns=["Const", "Title", "Year"])
+        self._film_pos: Dict[str, int] = {}
+
+        # tripletas COO
+        self._u = np.empty(0, dtype=np.int64)
+        self._i = np.empty(0, dtype=np.int64)
+        self._r = np.empty(0, dtype=float)
+
+        self.mu = 0.0
+        self.user_bias = np.zeros(0)
+        self.item_bias = np.zeros(0)
+        self.U = np.zeros((0, self.k))
+        self.V = np.zeros((0, self.k))
+        self.fitted = False
+
+    # ---------- datos ----------
+    @property
+    def n_users(self) -> int:
+        return len(self.users)
+
+    @property
+    def n_films(self) -> int:
+        return len(self.films)
+
+    def _add_films(self, ratings: pd.DataFrame) -> np.ndarray:
+        new = ratings[~ratings["Const"].isin(self._film_pos)][["Const", "Title", "Year"]]
+        if not new.empty:
+            start = len(self.films)
+            self.films = pd.concat([self.films, new], ignore_index=True)
+            self._film_pos.update({c: start + j for j, c in enumerate(new["Const"])})
+            self.V = np.vstack([self.V, self._rng.normal(0, 0.1, (len(new), self.k))])
+            self.item_bias = np.r_[self.item_bias, np.zeros(len(new))]
+        return ratings["Const"].map(self._film_pos).to_numpy(dtype=np.int64)
+
+    def upsert_user(self, user: str, export_df: pd.DataFrame) -> bool:
+        """Agrega o reemplaza las notas de un miembro. Devuelve False si el export no cambió."""
+        fp = export_fingerprint(export_df)
+        if self.fingerprints.get(user) == fp:
+            return False
+        ratings = _ratings_from_export(export_df)
+
+        if user not in self.users:
+            self.users.append(user)
+            self.U = np.vstack([self.U, self._rng.normal(0, 0.1, (1, self.k))])
+            self.user_bias = np.r_[self.user_bias, 0.0]
+        u = self.users.index(user)
+
+        items = self._add_films(ratings)
+        keep = self._u != u
+        self._u = np.r_[self._u[keep], np.full(len(items), u, dtype=np.int64)]
+        self._i = np.r_[self._i[keep], items]
+        self._r = np.r_[self._r[keep], ratings["Your Rating"].to_numpy(dtype=float)]
+        self.fingerprints[user] = fp
+        return True
+
+    def remove_user(self, user: str) -> bool:
+        """Quita a un miembro y sus notas (y las películas que sólo él había visto)."""
+        if user not in self.users:
+            return False
+        u = self.users.index(user)
+        keep = self._u != u
+        self._u, self._i, self._r = self._u[keep], self._i[keep], self._r[keep]
+        self._u[self._u > u] -= 1
+        del self.users[u]
+        self.fingerprints.pop(user, None)
+        self.U = np.delete(self.U, u, axis=0)
+        self.user_bias = np.delete(self.user_bias, u)
+
+        rated = np.bincount(self._i, minlength=self.n_films) > 0
+        if not rated.all():
+            self._i = (np.cumsum(rated) - 1)[self._i]
+            self.films = self.films[rated].reset_index(drop=True)
+            self._film_pos = {c: j for j, c in enumerate(self.films["Const"])}
+            self.V = self.V[rated]
+            self.item_bias = self.item_bias[rated]
+        self.fitted = self.fitted and self.n_users > 0
+        return True
+
+    # ---------- ajuste ----------
+    def _fit_biases(self, users: Optional[np.ndarray] = None):
+        self.mu = float(self._r.mean()) if len(self._r) else 0.0
+        lam = 5.0
+        # sesgo de película con los sesgos de usuario actuales, y luego el de usuario
+        res = self._r - self.mu - self.user_bias[self._u]
+        self.item_bias = np.bincount(self._i, res, self.n_films) / (np.bincount(self._i, minlength=self.n_films) + lam)
+        res = self._r - self.mu - self.item_bias[self._i]
+        ub = np.bincount(self._u, res, self.n_users) / (np.bincount(self._u, minlength=self.n_users) + lam)
+        if users is None:
+            self.user_bias = ub
+        else:
+            self.user_bias[users] = ub[users]
+
+    def _residuals(self) -> np.ndarray:
+        return self._r - self.mu - self.user_bias[self._u] - self.item_bias[self._i]
+
+    def _update_users(self, users: Optional[np.ndarray] = None):
+        sel = np.ones(len(self._u), dtype=bool) if users is None else np.isin(self._u, users)
+        order = np.argsort(self._u[sel], kind="stable")
+        u, i, r = self._u[sel][order], self._i[sel][order], self._residuals()[sel][order]
+        new_U = _solve_blocks(u, i, r, self.V, self.n_users, self.reg)
+        rows = np.unique(u)
+        self.U[rows] = new_U[rows]
+
+    def _update_items(self, items: Optional[np.ndarray] = None):
+        sel = np.ones(len(self._i), dtype=bool) if items is None else np.isin(self._i, items)
+        order = np.argsort(self._i[sel], kind="stable")
+        i, u, r = self._i[sel][order], self._u[sel][order], self._residuals()[sel][order]
+        new_V = _solve_blocks(i, u, r, self.U, self.n_films, self.reg)
+        rows = np.unique(i)
+        self.V[rows] = new_V[rows]
+
+    def fit(self, iters: Optional[int] = None) -> "FilmClubModel":
+        """Ajuste completo (ALS alternando usuarios y películas)."""
+        if len(self._r) == 0:
+            return self
+        self._fit_biases()
+        for _ in range(iters or self.iters):
+            self._update_users()
+            self._update_items()
+        self.fitted = True
+        return self
+
+    def refit_user(self, user: str, iters: int = 3) -> "FilmClubModel":
+        """
+        Re-ajuste incremental tras la re-subida de un miembro: sólo se recalculan
+        su vector, su sesgo y los de las películas que tocó (warm start).
+        """
+        if user not in self.users or len(self._r) == 0:
+            return self
+        u = np.array([self.users.index(user)])
+        items = np.unique(self._i[self._u == u[0]])
+        self._fit_biases(users=u)
+        for _ in range(iters):
+            self._update_users(u)
+            self._update_items(items)
+        self._update_users(u)
+        return self
+
+    # ---------- predicción ----------
+    def predict(self, user: str, consts: Iterable[str]) -> np.ndarray:
+        u = self.users.index(user)
+        pos = pd.Series(list(consts)).map(self._film_pos)
+        out = np.full(len(pos), np.nan)
+        ok = pos.notna().to_numpy()
+        idx = pos[ok].astype(int).to_numpy()
+        out[ok] = self.mu + self.user_bias[u] + self.item_bias[idx] + self.V[idx] @ self.U[u]
+        return np.clip(out, 1.0, 10.0)
+
+    def recommend(self, users: Optional[List[str]] = None, top_n: int = 10,
+                  min_raters: int = 1) -> pd.DataFrame:
+        """Top-N de películas no vistas para cada usuario, en lote."""
+        cols = ["User", "Rank", "Const", "Title", "Year", "Predicted"]
+        users = users if users is not None else list(self.users)
+        if not users or self.n_films == 0 or top_n <= 0:
+            return pd.DataFrame(columns=cols)
+        uidx = np.array([self.users.index(x) for x in users])
+
+        scores = (self.mu + self.user_bias[uidx][:, None] + self.item_bias[None, :]
+                  + self.U[uidx] @ self.V.T)
+        raters = np.bincount(self._i, minlength=self.n_films)
+        scores[:, raters < min_raters] = -np.inf
+        # índice usuario -> fila de scores (un arreglo: vale también sin notas vistas)
+        seen = np.isin(self._u, uidx)
+        row_of = np.full(self.n_users, -1, dtype=np.int64)
+        row_of[uidx] = np.arange(len(uidx))
+        scores[row_of[self._u[seen]], self._i[seen]] = -np.inf
+
+        m = min(top_n, self.n_films)
+        top = np.argpartition(-scores, m - 1, axis=1)[:, :m]
+        frames = []
+        for j, user in enumerate(users):
+            cand = top[j][np.argsort(-scores[j, top[j]], kind="stable")]
+            cand = cand[np.isfinite(scores[j, cand])]
+            f = self.films.iloc[cand][["Const", "Title", "Year"]].copy()
+            f.insert(0, "Rank", np.arange(1, len(cand) + 1))
+            f.insert(0, "User", user)
+            f["Predicted"] = np.clip(scores[j, cand], 1.0, 10.0)
+            frames.append(f)
+        return pd.concat(frames, ignore_index=True)[cols] if frames else pd.DataFrame(columns=cols)
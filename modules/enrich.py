@@ -0,0 +1,377 @@
+# modules/enrich.py
+# Enriquecimiento offline del catálogo (o de la lista de películas de los Óscar).
+#
+#   python -m modules.enrich --source catalog --input peliculas.csv
+#   python -m modules.enrich --source oscars --input Oscar_Data_1927_today.csv --no-awards
+#
+# Por película resuelve (por id de IMDb cuando lo hay): id TMDb, póster, nota
+# TMDb, proveedores de streaming (uno o más países) y premios OMDb. Corre en un
+# pool de hilos con el mismo límite de ritmo y cuota diaria por proveedor que la
+# app (modules.rate_limit: CATALOGO_<P>_RPS, _BURST, _CONCURRENCY, _DAILY_QUOTA)
+# y va anotando cada película terminada en un checkpoint
+# (JSONL, append-only): si se interrumpe, la siguiente ejecución retoma donde
+# quedó. El resultado es un CSV "sidecar" que la app carga al iniciar y usa
+# en lugar de llamar a las APIs durante el render.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from modules.api_cache import TransientError
+from modules.awards_parser import parse_awards_series
+from modules.external_apis import (
+    TMDB_IMAGE_BASE,
+    coerce_year,
+    load_api_keys,
+    omdb_awards,
+    omdb_lookup_counts,
+    tmdb_basic_info,
+    tmdb_provider_table,
+    valid_imdb_id,
+)
+
+DEFAULT_SIDECAR = os.environ.get(
+    "CATALOGO_ENRICHMENT",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "peliculas_enriquecidas.csv"),
+)
+
+AWARD_COLUMNS = {
+    # columna del sidecar -> clave del dict de get_omdb_awards (mismos nombres que peliculas_con_premios_2025.csv)
+    "awards_raw": "raw",
+    "oscars_wins": "oscars",
+    "oscars_nominations": "oscars_nominated",
+    "emmys_wins": "emmys",
+    "bafta_wins": "baftas",
+    "golden_globes_wins": "golden_globes",
+    "palme_dor": "palme_dor",
+    "total_wins": "total_wins",
+    "total_nominations": "total_nominations",
+}
+
+# Errores de OMDb que son respuesta definitiva (no tiene sentido volver a preguntar)
+DEFINITIVE_AWARDS_ERRORS = ("Movie not found!",)
+
+_WS = re.compile(r"\s+")
+
+
+def title_year_key(title, year) -> str:
+    """Clave título normalizado + año (para filas sin Const)."""
+    t = _WS.sub(" ", str(title or "")).strip().lower()
+    y = coerce_year(year)
+    return f"{t}|{'' if y is None else y}"
+
+
+def film_key(const, title, year) -> str:
+    const = str(const or "").strip()
+    return const if const.startswith("tt") else title_year_key(title, year)
+
+
+# ---------------------------------------------------------------- sidecar (lectura)
+
+class EnrichmentSidecar:
+    """Vista de sólo lectura del sidecar, indexada por título+año y por id TMDb."""
+
+    def __init__(self, df: Optional[pd.DataFrame] = None):
+        self.df = reparse_awards(df) if df is not None else pd.DataFrame()
+        self._by_title: Dict[str, int] = {}
+        self._by_tmdb: Dict[int, int] = {}
+        self._by_const: Dict[str, int] = {}
+        if self.df.empty:
+            return
+        if "Const" in self.df.columns:
+            self._by_const = {c: i for i, c in enumerate(self.df["Const"]) if valid_imdb_id(c)}
+        keys = [title_year_key(t, y) for t, y in zip(self.df["Title"], self.df["Year"])]
+        self._by_title = {k: i for i, k in enumerate(keys)}
+        # sin año también: get_tmdb_basic_info se llama a veces sólo con el título
+        for i, t in enumerate(self.df["Title"]):
+            self._by_title.setdefault(title_year_key(t, None), i)
+        ids = pd.to_numeric(self.df.get("tmdb_id"), errors="coerce")
+        self._by_tmdb = {int(v): i for i, v in enumerate(ids) if pd.notna(v)}
+
+    @classmethod
+    def from_csv(cls, path: str = DEFAULT_SIDECAR) -> "EnrichmentSidecar":
+        if not path or not os.path.exists(path):
+            return cls()
+        try:
+            return cls(pd.read_csv(path, dtype={"Const": str}, keep_default_na=True))
+        except Exception:
+            return cls()
+
+    def __len__(self):
+        return len(self.df)
+
+    def _row(self, title, year, imdb_id=None) -> Optional[pd.Series]:
+        const = valid_imdb_id(imdb_id)
+        i = self._by_const.get(const) if const else None
+        if i is None:
+            i = self._by_title.get(title_year_key(title, year))
+        return None if i is None else self.df.iloc[i]
+
+    def tmdb_info(self, title, year=None, imdb_id=None) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(encontrado, info). info None = el enriquecimiento no halló la película en TMDb."""
+        row = self._row(title, year, imdb_id)
+        if row is None or "tmdb_id" not in row.index:
+            return False, None
+        if pd.isna(row["tmdb_id"]):
+            return True, None
+        poster_path = row.get("poster_path")
+        return True, {
+            "id": int(row["tmdb_id"]),
+            "poster_url": f"{TMDB_IMAGE_BASE}{poster_path}" if isinstance(poster_path, str) and poster_path else None,
+            "vote_average": None if pd.isna(row.get("vote_average")) else float(row["vote_average"]),
+        }
+
+    def providers(self, tmdb_id, country: str = "CL") -> Tuple[bool, Optional[Dict[str, Any]]]:
+        col = f"providers_{country.upper()}"
+        if not tmdb_id or col not in self.df.columns:
+            return False, None
+        i = self._by_tmdb.get(int(tmdb_id))
+        if i is None:
+            return False, None
+        row = self.df.iloc[i]
+        platforms = row[col]
+        link = row.get(f"providers_link_{country.upper()}")
+        if (not isinstance(platforms, str) or not platforms) and not isinstance(link, str):
+            return True, None
+        return True, {
+            "platforms": sorted(platforms.split("|")) if isinstance(platforms, str) and platforms else [],
+            "link": link if isinstance(link, str) else None,
+        }
+
+    def awards(self, title, year=None, imdb_id=None) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        row = self._row(title, year, imdb_id)
+        return (False, None) if row is None else awards_from_row(row)
+
+
+def reparse_awards(df: pd.DataFrame) -> pd.DataFrame:
+    """Recalcula las columnas de premios desde `awards_raw` en una pasada vectorizada."""
+    if "awards_raw" not in df.columns:
+        return df
+    has_raw = df["awards_raw"].map(lambda v: isinstance(v, str) and v != "")
+    if not has_raw.any():
+        return df
+    parsed = parse_awards_series(df.loc[has_raw, "awards_raw"])
+    df = df.copy()
+    for col, key in AWARD_COLUMNS.items():
+        if col != "awards_raw":
+            df[col] = df[col].astype(object) if col in df.columns else None
+            df.loc[has_raw, col] = parsed[key]
+    return df
+
+
+def awards_from_row(row) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    Fila de sidecar / peliculas_con_premios_2025.csv -> (encontrado, dict de premios).
+    Un error no definitivo (401, límite de OMDb...) cuenta como "no encontrado":
+    hay que volver a preguntar.
+    """
+    if "total_wins" not in row.index:
+        return False, None
+    err = row.get("awards_error")
+    if isinstance(err, str) and err:
+        return (True, {"error": err}) if err in DEFINITIVE_AWARDS_ERRORS else (False, None)
+    if pd.isna(row["total_wins"]):
+        return False, None
+    out = {}
+    for col, key in AWARD_COLUMNS.items():
+        v = row.get(col)
+        if key == "raw":
+            out[key] = v if isinstance(v, str) and v else None
+        elif key == "palme_dor":
+            out[key] = str(v).strip().lower() == "true"
+        else:
+            out[key] = 0 if pd.isna(v) else int(v)
+    return True, out
+
+
+# ---------------------------------------------------------------- pipeline
+
+def load_films(source: str, path: str) -> pd.DataFrame:
+    """(Const, Title, Year) únicos desde el export de IMDb o desde la lista de los Óscar."""
+    if source == "catalog":
+        raw = pd.read_csv(path)
+        films = pd.DataFrame({
+            "Const": raw["Const"].astype(str) if "Const" in raw.columns else "",
+            "Title": raw["Title"],
+            "Year": pd.to_numeric(raw["Year"], errors="coerce") if "Year" in raw.columns else None,
+        })
+    elif source == "oscars":
+        if path.endswith(".csv"):
+            try:
+                raw = pd.read_csv(path, sep=";", dtype=str)
+            except UnicodeDecodeError:
+                raw = pd.read_csv(path, sep=";", dtype=str, encoding="latin-1")
+        else:
+            raw = pd.read_excel(path, dtype=str)
+        year_col = "Year" if "Year" in raw.columns else "Year_Film"
+        films = pd.DataFrame({
+            "Const": raw.get("FilmId", pd.Series("", index=raw.index)).fillna(""),
+            "Title": raw["Film"],
+            # "1927/28" -> 1927
+            "Year": pd.to_numeric(raw[year_col].astype(str).str[:4], errors="coerce"),
+        })
+    else:
+        raise ValueError(f"Fuente desconocida: {source}")
+    films = films[films["Title"].notna() & (films["Title"].astype(str).str.strip() != "")]
+    films["key"] = [film_key(c, t, y) for c, t, y in zip(films["Const"], films["Title"], films["Year"])]
+    return films.drop_duplicates("key").reset_index(drop=True)
+
+
+def enrich_one(film: Dict[str, Any], keys: Dict[str, Optional[str]], countries: List[str],
+               with_providers: bool, with_awards: bool) -> Dict[str, Any]:
+    """Registro del sidecar para una película. Deja escapar TransientError (no se checkpointea)."""
+    title, year = film["Title"], film["Year"]
+    rec: Dict[str, Any] = {
+        "key": film["key"], "Const": film["Const"], "Title": title,
+        "Year": None if pd.isna(year) else int(year),
+    }
+
+    if keys.get("TMDB_API_KEY"):
+        info = tmdb_basic_info(title, year, keys["TMDB_API_KEY"], imdb_id=film["Const"])
+        rec["tmdb_id"] = info.get("id") if info else None
+        poster = (info or {}).get("poster_url")
+        rec["poster_path"] = poster[len(TMDB_IMAGE_BASE):] if poster else None
+        rec["vote_average"] = (info or {}).get("vote_average")
+        if with_providers and rec["tmdb_id"]:
+            table = tmdb_provider_table(rec["tmdb_id"], keys["TMDB_API_KEY"])
+            for cc in countries:
+                prov = table.for_country(cc) if table is not None else None
+                rec[f"providers_{cc}"] = "|".join(prov["platforms"]) if prov else ""
+                rec[f"providers_link_{cc}"] = prov.get("link") if prov else None
+
+    if with_awards and keys.get("OMDB_API_KEY"):
+        try:
+            aw = omdb_awards(title, year, keys["OMDB_API_KEY"], imdb_id=film["Const"])
+        except TransientError:
+            raise
+        except Exception as e:
+            aw = {"error": f"Error al parsear premios: {e}"}
+        rec["awards_error"] = aw.get("error")
+        for col, key in AWARD_COLUMNS.items():
+            rec[col] = aw.get(key)
+
+    rec["enriched_at"] = pd.Timestamp.now(tz="UTC").isoformat(timespec="seconds")
+    return rec
+
+
+def read_done(sidecar: str, checkpoint: str) -> Dict[str, Dict[str, Any]]:
+    """Películas ya resueltas: filas del sidecar + líneas del checkpoint (las últimas mandan)."""
+    done: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(sidecar):
+        prev = pd.read_csv(sidecar, dtype={"Const": str})
+        for rec in prev.to_dict("records"):
+            done[rec["key"]] = {k: (None if isinstance(v, float) and pd.isna(v) else v) for k, v in rec.items()}
+    if os.path.exists(checkpoint):
+        with open(checkpoint, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue   # última línea truncada por una interrupción
+                done[rec["key"]] = rec
+    return done
+
+
+def write_sidecar(done: Dict[str, Dict[str, Any]], sidecar: str) -> None:
+    """Escritura atómica (archivo temporal + rename): la app nunca ve un CSV a medias."""
+    tmp = sidecar + ".tmp"
+    pd.DataFrame(list(done.values())).to_csv(tmp, index=False)
+    os.replace(tmp, sidecar)
+
+
+def run(films: pd.DataFrame, sidecar: str, countries: List[str], with_providers: bool = True,
+        with_awards: bool = True, workers: int = 8, refresh: bool = False, flush_every: int = 200, keys: Optional[Dict[str, Optional[str]]] = None,
+        log=print) -> Dict[str, int]:
+    keys = keys or load_api_keys()
+    checkpoint = sidecar + ".checkpoint.jsonl"
+    done = {} if refresh else read_done(sidecar, checkpoint)
+    todo = [f for f in films.to_dict("records") if f["key"] not in done]
+    log(f"{len(films)} películas; {len(films) - len(todo)} ya enriquecidas; {len(todo)} por resolver.")
+
+    counts = {"ok": 0, "transient": 0, "error": 0}
+    t0 = time.perf_counter()
+    with open(checkpoint, "w" if refresh else "a", encoding="utf-8") as ck, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(enrich_one, f, keys, countries, with_providers, with_awards): f
+            for f in todo
+        }
+        try:
+            for n, fut in enumerate(as_completed(futures), 1):
+                try:
+                    rec = fut.result()
+                except TransientError:
+                    counts["transient"] += 1
+                    continue
+                except Exception as e:
+                    counts["error"] += 1
+                    log(f"  ! {futures[fut]['Title']}: {e}")
+                    continue
+                done[rec["key"]] = rec
+                ck.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+                ck.flush()
+                counts["ok"] += 1
+                if n % flush_every == 0:
+                    write_sidecar(done, sidecar)
+                    rate = n / (time.perf_counter() - t0)
+                    log(f"  {n}/{len(todo)} ({rate:.1f}/s)")
+        except KeyboardInterrupt:
+            log("Interrumpido: se guarda lo resuelto; vuelve a ejecutar para continuar.")
+            for f in futures:
+                f.cancel()
+            raise
+        finally:
+            if done:
+                write_sidecar(done, sidecar)
+
+    if counts["transient"] == 0 and counts["error"] == 0 and os.path.exists(checkpoint):
+        os.remove(checkpoint)   # todo quedó en el sidecar
+    log(f"Listo en {time.perf_counter() - t0:.1f}s: {counts['ok']} resueltas, "
+        f"{counts['transient']} pendientes por fallos transitorios, {counts['error']} con error.")
+    om = omdb_lookup_counts()
+    if om["id_lookups"] or om["title_lookups"]:
+        log(f"OMDb: {om['id_lookups']} por id ({om['id_queries']} consultas), {om['title_lookups']} por título "
+            f"({om['title_queries']} consultas); ~{om['queries_saved']} consultas ahorradas.")
+    return counts
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Enriquecimiento offline (TMDb + OMDb) con checkpoints reanudables.")
+    ap.add_argument("--source", choices=["catalog", "oscars"], default="catalog")
+    ap.add_argument("--input", default=None, help="peliculas.csv (catalog) u Oscar_Data_1927_today.csv (oscars)")
+    ap.add_argument("--out", default=DEFAULT_SIDECAR, help="CSV sidecar que lee la app")
+    ap.add_argument("--country", action="append", default=None, help="país(es) de streaming (repetible; por defecto CL)")
+    ap.add_argument("--no-providers", action="store_true")
+    ap.add_argument("--no-awards", action="store_true")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--limit", type=int, default=None, help="sólo las primeras N películas")
+    ap.add_argument("--refresh", action="store_true", help="ignorar el sidecar/checkpoint existente")
+    args = ap.parse_args(argv)
+
+    path = args.input or ("peliculas.csv" if args.source == "catalog" else "Oscar_Data_1927_today.csv")
+    films = load_films(args.source, path)
+    if args.limit:
+        films = films.head(args.limit)
+    keys = load_api_keys()
+    if not keys.get("TMDB_API_KEY") and not keys.get("OMDB_API_KEY"):
+        print("Faltan TMDB_API_KEY / OMDB_API_KEY (variables de entorno o .streamlit/secrets.toml).", file=sys.stderr)
+        return 2
+    countries = [c.upper() for c in (args.country or ["CL"])]
+    try:
+        counts = run(films, args.out, countries, with_providers=not args.no_providers,
+                     with_awards=not args.no_awards, workers=args.workers,
+                     refresh=args.refresh, keys=keys)
+    except KeyboardInterrupt:
+        return 130
+    return 0 if counts["transient"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,522 @@
+# modules/external_apis.py
+# Consultas a TMDb / OMDb / YouTube sin dependencias de Streamlit.
+#
+# La app (envolviéndolas con st.cache_data) y el CLI de enriquecimiento
+# (`python -m modules.enrich`) usan estas mismas funciones, así el parseo y
+# las entradas de la caché persistente son idénticos en ambos caminos.
+# Todas pasan por `cached_get_json` y dejan escapar TransientError (el
+# llamador decide si reintenta o muestra un marcador).
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from modules.api_cache import (
+    NOT_FOUND,
+    OK,
+    TRANSIENT,
+    ApiError,
+    TransientError,
+    cached_get_json,
+    cached_get_json_fresh,
+    get_response_cache,
+    make_key,
+)
+from modules.awards_parser import parse_awards_text
+from modules.prefetch import map_concurrent
+from modules.providers import CompactProviders
+
+# Bases configurables: CATALOGO_API_BASE apunta todos los servicios a un mismo
+# servidor con rutas /tmdb, /tmdb_image, /omdb y /youtube (p. ej. el falso
+# local, `python -m modules.fake_apis serve`); CATALOGO_<SERVICIO>_BASE pisa uno.
+API_BASE = os.environ.get("CATALOGO_API_BASE", "").rstrip("/")
+FAKE_API_KEY = "fake"   # key de relleno con CATALOGO_API_BASE y sin keys reales
+
+
+def _service_base(service: str, upstream: str) -> str:
+    base = os.environ.get(f"CATALOGO_{service.upper()}_BASE")
+    if base:
+        return base.rstrip("/")
+    return f"{API_BASE}/{service}" if API_BASE else upstream
+
+
+TMDB_API_BASE = _service_base("tmdb", "https://api.themoviedb.org")
+TMDB_SEARCH_URL = f"{TMDB_API_BASE}/3/search/movie"
+TMDB_FIND_URL_TEMPLATE = TMDB_API_BASE + "/3/find/{external_id}"
+TMDB_PROVIDERS_URL_TEMPLATE = TMDB_API_BASE + "/3/movie/{movie_id}/watch/providers"
+TMDB_SIMILAR_URL_TEMPLATE = TMDB_API_BASE + "/3/movie/{movie_id}/similar"
+TMDB_MOVIE_URL_TEMPLATE = TMDB_API_BASE + "/3/movie/{movie_id}"
+TMDB_DISCOVER_URL = f"{TMDB_API_BASE}/3/discover/movie"
+TMDB_PROVIDER_LIST_URL = f"{TMDB_API_BASE}/3/watch/providers/movie"
+TMDB_IMAGE_BASE = _service_base("tmdb_image", "https://image.tmdb.org") + "/t/p/w342"
+OMDB_URL = _service_base("omdb", "https://www.omdbapi.com") + "/"
+YOUTUBE_SEARCH_URL = _service_base("youtube", "https://www.googleapis.com") + "/youtube/v3/search"
+
+IMDB_TO_TMDB = "imdb->tmdb"
+TRAILER_BY_ID = "trailer"     # "tmdb:{id}" / tt… -> URL de YouTube (id_map, no vence)
+TMDB_DISCOVER_MAX_PAGES = 500   # tope de /discover en TMDb
+_IMDB_ID = re.compile(r"^tt\d{5,}$")
+
+
+def load_api_keys(secrets: Optional[Dict[str, Any]] = None) -> Dict[str, Optional[str]]:
+    """
+    API keys desde variables de entorno o, si no están, desde un dict de secretos
+    (st.secrets en la app; .streamlit/secrets.toml en el CLI).
+    """
+    if secrets is None:
+        secrets = {}
+        path = os.path.join(os.getcwd(), ".streamlit", "secrets.toml")
+        if os.path.exists(path):
+            try:
+                import tomllib
+                with open(path, "rb") as fh:
+                    secrets = tomllib.load(fh)
+            except Exception:
+                secrets = {}
+    return {
+        name: os.environ.get(name) or secrets.get(name) or (FAKE_API_KEY if API_BASE else None)
+        for name in ["TMDB_API_KEY", "OMDB_API_KEY", "YOUTUBE_API_KEY"]
+    }
+
+
+def coerce_year(year) -> Optional[int]:
+    if year is None or pd.isna(year):
+        return None
+    try:
+        return int(float(year))
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------- TMDb
+
+def tmdb_search(title, year, api_key: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Info básica TMDb (id/poster/vote_average) en una sola búsqueda."""
+    if api_key is None:
+        return None
+    if not title or pd.isna(title):
+        return None
+
+    params = {"api_key": api_key, "query": str(title).strip()}
+    year_int = coerce_year(year)
+    if year_int is not None:
+        params["year"] = year_int
+
+    try:
+        data = cached_get_json("tmdb_search", TMDB_SEARCH_URL, params, timeout=3)
+        results = data.get("results", [])
+        if not results:
+            return None
+
+        movie = results[0]
+        poster_path = movie.get("poster_path")
+        return {
+            "id": movie.get("id"),
+            "poster_url": f"{TMDB_IMAGE_BASE}{poster_path}" if poster_path else None,
+            "vote_average": movie.get("vote_average"),
+        }
+    except TransientError:
+        raise
+    except Exception:
+        return None
+
+
+def valid_imdb_id(imdb_id) -> Optional[str]:
+    """'tt0111161' normalizado, o None si no es un id de IMDb."""
+    if imdb_id is None or (not isinstance(imdb_id, str) and pd.isna(imdb_id)):
+        return None
+    imdb_id = str(imdb_id).strip()
+    return imdb_id if _IMDB_ID.match(imdb_id) else None
+
+
+def tmdb_find(imdb_id, api_key: Optional[str], id_only: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Info básica TMDb por id de IMDb (/find, sin adivinar por título).
+    El par tt… -> id TMDb se guarda para siempre; si TMDb no responde y el
+    id ya se conocía, se devuelve sólo el id (proveedores / similares siguen andando).
+    Con id_only=True (el llamador no necesita póster ni nota) el par conocido
+    alcanza y /find sólo se consulta si todavía no se conoce.
+    """
+    imdb_id = valid_imdb_id(imdb_id)
+    if api_key is None or imdb_id is None:
+        return None
+    cache = get_response_cache()
+    if id_only:
+        known = cache.get_mapping(IMDB_TO_TMDB, imdb_id)
+        if known is not None:
+            return {"id": int(known), "poster_url": None, "vote_average": None}
+    try:
+        data = cached_get_json(
+            "tmdb_find", TMDB_FIND_URL_TEMPLATE.format(external_id=imdb_id),
+            {"api_key": api_key, "external_source": "imdb_id"}, timeout=3,
+        )
+    except TransientError:
+        known = cache.get_mapping(IMDB_TO_TMDB, imdb_id)
+        if known is None:
+            raise
+        return {"id": int(known), "poster_url": None, "vote_average": None}
+    except Exception:
+        return None
+
+    results = data.get("movie_results", []) if isinstance(data, dict) else []
+    if not results:
+        return None
+    movie = results[0]
+    if movie.get("id"):
+        cache.set_mapping(IMDB_TO_TMDB, imdb_id, movie["id"])
+    poster_path = movie.get("poster_path")
+    return {
+        "id": movie.get("id"),
+        "poster_url": f"{TMDB_IMAGE_BASE}{poster_path}" if poster_path else None,
+        "vote_average": movie.get("vote_average"),
+    }
+
+
+def tmdb_basic_info(title, year, api_key: Optional[str], imdb_id=None) -> Optional[Dict[str, Any]]:
+    """Por id de IMDb si la fila lo tiene; la búsqueda por título queda para filas sin id."""
+    if valid_imdb_id(imdb_id):
+        return tmdb_find(imdb_id, api_key)
+    return tmdb_search(title, year, api_key)
+
+
+def tmdb_provider_table(tmdb_id, api_key: Optional[str]) -> Optional[CompactProviders]:
+    """
+    watch/providers completo (todos los países) en forma compacta. La caché
+    guarda el payload entero una vez por película; el corte por país es local.
+    """
+    if api_key is None or not tmdb_id:
+        return None
+    try:
+        url = TMDB_PROVIDERS_URL_TEMPLATE.format(movie_id=tmdb_id)
+        pdata = cached_get_json("tmdb_providers", url, {"api_key": api_key}, timeout=4)
+        return CompactProviders.from_payload(pdata)
+    except TransientError:
+        raise
+    except Exception:
+        return None
+
+
+def tmdb_providers(tmdb_id, api_key: Optional[str], country: str = "CL") -> Optional[Dict[str, Any]]:
+    """Streaming desde TMDb watch/providers para un país."""
+    table = tmdb_provider_table(tmdb_id, api_key)
+    return table.for_country(country) if table is not None else None
+
+
+def tmdb_region_providers(region: str, api_key: Optional[str],
+                          language: str = "es-ES") -> List[Dict[str, Any]]:
+    """Proveedores de streaming de una región ({id, name}), en el orden de TMDb."""
+    if api_key is None:
+        return []
+    try:
+        params = {"api_key": api_key, "watch_region": region.upper(), "language": language}
+        data = cached_get_json("tmdb_provider_list", TMDB_PROVIDER_LIST_URL, params, timeout=4)
+    except TransientError:
+        raise
+    except Exception:
+        return []
+    items = [p for p in data.get("results", []) or [] if p.get("provider_id") and p.get("provider_name")]
+    items.sort(key=lambda p: ((p.get("display_priorities") or {}).get(region.upper(), p.get("display_priority", 999)),
+                              p["provider_name"]))
+    return [{"id": int(p["provider_id"]), "name": p["provider_name"]} for p in items]
+
+
+def tmdb_provider_catalog(provider_id, region: str, api_key: Optional[str],
+                          max_pages: int = TMDB_DISCOVER_MAX_PAGES, max_workers: int = 8) -> List[int]:
+    """
+    Ids TMDb de todas las películas de un proveedor en una región, paginando
+    /discover (watch_region + with_watch_providers). La página 1 da el total;
+    el resto se pide en paralelo. Cada página queda en la caché persistente.
+    Si falla alguna página se lanza TransientError (un catálogo a medias no se guarda).
+    """
+    if api_key is None or not provider_id:
+        return []
+    base = {
+        "api_key": api_key,
+        "watch_region": region.upper(),
+        "with_watch_providers": str(provider_id),
+        # orden estable entre páginas (la popularidad cambia mientras se pagina)
+        "sort_by": "original_title.asc",
+        "include_adult": "false",
+    }
+
+    def _page(page):
+        return cached_get_json("tmdb_discover", TMDB_DISCOVER_URL, dict(base, page=page), timeout=6)
+
+    try:
+        first = _page(1)
+    except TransientError:
+        raise
+    except Exception:
+        return []
+    total = min(int(first.get("total_pages") or 1), max_pages)
+    rest = map_concurrent(_page, range(2, total + 1), max_workers=max_workers)
+    if any(r is None for r in rest):
+        raise TransientError(f"TMDb discover incompleto para proveedor {provider_id} ({region})")
+    ids = {m["id"] for data in [first, *rest] for m in data.get("results", []) or [] if m.get("id")}
+    return sorted(ids)
+
+
+def tmdb_similar(tmdb_id, api_key: Optional[str], language: str = "es-ES",
+                 max_results: int = 10) -> List[Dict[str, Any]]:
+    """Películas similares desde TMDb."""
+    if api_key is None or not tmdb_id:
+        return []
+    try:
+        url = TMDB_SIMILAR_URL_TEMPLATE.format(movie_id=tmdb_id)
+        params = {"api_key": api_key, "language": language, "page": 1}
+        data = cached_get_json("tmdb_similar", url, params, timeout=4)
+        out = []
+        for m in data.get("results", [])[:max_results]:
+            date_str = m.get("release_date") or ""
+            year = None
+            if date_str:
+                try:
+                    year = int(date_str[:4])
+                except Exception:
+                    year = None
+            out.append({
+                "id": m.get("id"),
+                "title": m.get("title") or m.get("name"),
+                "year": year,
+                "vote_average": m.get("vote_average"),
+                "poster_url": f"{TMDB_IMAGE_BASE}{m['poster_path']}" if m.get("poster_path") else None,
+            })
+        return out
+    except TransientError:
+        raise
+    except Exception:
+        return []
+
+
+def trailer_from_videos(videos: List[Dict[str, Any]], language_hint: str = "es") -> Optional[str]:
+    """Mejor tráiler de YouTube entre los videos de TMDb (idioma pedido, oficial, tráiler > teaser)."""
+    candidates = [
+        v for v in videos or []
+        if v.get("site") == "YouTube" and v.get("key") and v.get("type") in ("Trailer", "Teaser")
+    ]
+    if not candidates:
+        return None
+    best = max(candidates, key=lambda v: (
+        v.get("type") == "Trailer",
+        v.get("iso_639_1") == language_hint,
+        v.get("iso_639_1") == "en",
+        bool(v.get("official")),
+    ))
+    return f"https://www.youtube.com/watch?v={best['key']}"
+
+
+def tmdb_details(tmdb_id, api_key: Optional[str], language: str = "es-ES",
+                 language_hint: str = "es") -> Optional[Dict[str, Any]]:
+    """
+    Ficha TMDb en UNA llamada: detalles + watch/providers + videos + similares
+    (append_to_response). Los bloques de proveedores y similares se reparten en
+    las mismas entradas de caché que usan tmdb_providers / tmdb_similar, así
+    esas funciones ya no van a la red para esta película.
+    """
+    if api_key is None or not tmdb_id:
+        return None
+    params = {
+        "api_key": api_key,
+        "language": language,
+        "append_to_response": "watch/providers,videos,similar",
+        "include_video_language": f"{language_hint},en,null",
+    }
+    try:
+        data, fresh = cached_get_json_fresh(
+            "tmdb_details", TMDB_MOVIE_URL_TEMPLATE.format(movie_id=tmdb_id), params, timeout=4
+        )
+    except TransientError:
+        raise
+    except Exception:
+        return None
+
+    # sólo con una respuesta recién llegada de la red: repartir una ficha de hace
+    # días le daría a los proveedores un TTL nuevo y dejarían de vencer a tiempo
+    cache = get_response_cache()
+    if fresh and isinstance(data.get("watch/providers"), dict):
+        url = TMDB_PROVIDERS_URL_TEMPLATE.format(movie_id=tmdb_id)
+        cache.set(make_key(url, {"api_key": api_key}), "tmdb_providers", data["watch/providers"])
+    if fresh and isinstance(data.get("similar"), dict):
+        url = TMDB_SIMILAR_URL_TEMPLATE.format(movie_id=tmdb_id)
+        cache.set(make_key(url, {"api_key": api_key, "language": language, "page": 1}), "tmdb_similar", data["similar"])
+
+    poster_path = data.get("poster_path")
+    return {
+        "id": data.get("id"),
+        "poster_url": f"{TMDB_IMAGE_BASE}{poster_path}" if poster_path else None,
+        "vote_average": data.get("vote_average"),
+        "runtime": data.get("runtime"),
+        "overview": data.get("overview"),
+        "trailer_url": trailer_from_videos((data.get("videos") or {}).get("results"), language_hint),
+    }
+
+
+# ---------------------------------------------------------------- YouTube
+
+def youtube_trailer(title, year, api_key: Optional[str]) -> Optional[str]:
+    """URL de YouTube del primer resultado de tráiler."""
+    if api_key is None:
+        return None
+    if not title or pd.isna(title):
+        return None
+
+    q = f"{title} trailer"
+    year_int = coerce_year(year)
+    if year_int is not None:
+        q += f" {year_int}"
+
+    params = {
+        "key": api_key,
+        "part": "snippet",
+        "q": q,
+        "type": "video",
+        "maxResults": 1,
+        "videoEmbeddable": "true",
+        "regionCode": "CL",
+    }
+
+    try:
+        data = cached_get_json("youtube_search", YOUTUBE_SEARCH_URL, params, timeout=5)
+        items = data.get("items", [])
+        if not items:
+            return None
+        return f"https://www.youtube.com/watch?v={items[0]['id']['videoId']}"
+    except TransientError:
+        raise
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------- OMDb
+
+def omdb_classify(data) -> str:
+    """OMDb responde 200 también para errores: separa "no existe" de "reintentar"."""
+    if data.get("Response") == "True":
+        return OK
+    err = str(data.get("Error", "")).lower()
+    if "api key" in err:
+        raise ApiError(data.get("Error"))   # "Invalid API key!" / "No API key provided.": configuración
+    if "not found" in err or "incorrect" in err or "too many results" in err:
+        return NOT_FOUND
+    return TRANSIENT   # "Request limit reached!", errores internos, etc.
+
+
+# Consultas a OMDb por camino: "id" (i=tt…, una consulta) vs "title" (cascada t / t / s / i)
+_omdb_lookups: Counter = Counter()
+_omdb_lookups_lock = threading.Lock()
+
+
+def _count_omdb(path: str, queries: int) -> None:
+    with _omdb_lookups_lock:
+        _omdb_lookups[f"{path}_lookups"] += 1
+        _omdb_lookups[f"{path}_queries"] += queries
+
+
+def omdb_lookup_counts() -> Dict[str, Any]:
+    """
+    Búsquedas y consultas por camino, y consultas ahorradas estimadas: lo que
+    habrían costado las búsquedas por id con el promedio observado de la cascada
+    por título (o, sin muestra, su mínimo de 1 consulta).
+    """
+    with _omdb_lookups_lock:
+        c = dict(_omdb_lookups)
+    by_id, by_title = c.get("id_lookups", 0), c.get("title_lookups", 0)
+    per_title = c.get("title_queries", 0) / by_title if by_title else 1.0
+    return {
+        "id_lookups": by_id,
+        "id_queries": c.get("id_queries", 0),
+        "title_lookups": by_title,
+        "title_queries": c.get("title_queries", 0),
+        "queries_per_title_lookup": round(per_title, 2),
+        "queries_saved": round(by_id * per_title - c.get("id_queries", 0)),
+    }
+
+
+def omdb_awards(title, year, api_key: Optional[str], imdb_id=None) -> Dict[str, Any]:
+    """
+    Info de premios desde OMDb (texto + parseo básico) o {"error": ...}.
+    Con id de IMDb es una sola consulta (i=tt…); la cascada por título
+    (t / t simplificado / s + i) queda para filas sin id.
+    """
+    if api_key is None:
+        return {"error": "OMDB_API_KEY no está configurada en st.secrets."}
+    imdb_id = valid_imdb_id(imdb_id)
+    if not imdb_id and (not title or pd.isna(title)):
+        return {"error": "Título vacío o inválido."}
+
+    raw_title = str(title).strip()
+    simple_title = re.sub(r"\s*\(.*?\)\s*$", "", raw_title).strip()
+    year_int = coerce_year(year)
+
+    def _query(params):
+        try:
+            # "Movie not found!" se cachea como negativo; "Request limit reached!" sólo unos minutos
+            data = cached_get_json("omdb", OMDB_URL, params, timeout=8, classify=omdb_classify)
+            if data.get("Response") != "True":
+                return {"error": data.get("Error", "Respuesta no válida de OMDb.")}
+            return data
+        except TransientError:
+            raise
+        except ApiError as e:
+            # definitivos para esta API key (404, key inválida): el llamador puede memoizarlos
+            if str(e).startswith("HTTP "):
+                return {"error": f"{e} desde OMDb."}
+            return {"error": f"OMDb: {e}"}
+        except Exception as e:
+            # cualquier otro fallo no es definitivo: que no quede memoizado como error
+            raise TransientError(f"Excepción al llamar a OMDb: {e}") from e
+
+    if imdb_id:
+        data = _query({"apikey": api_key, "i": imdb_id})
+        _count_omdb("id", 1)
+        if "error" in data:
+            return {"error": data["error"]}
+        return parse_awards_text(data.get("Awards", ""))
+
+    data = None
+    last_error = None
+    queries = 0
+
+    for t in [raw_title, simple_title]:
+        params = {"apikey": api_key, "t": t, "type": "movie"}
+        if year_int:
+            params["y"] = year_int
+        candidate = _query(params)
+        queries += 1
+        if candidate is None:
+            continue
+        if "error" in candidate:
+            last_error = candidate["error"]
+        else:
+            data = candidate
+            break
+
+    if data is None:
+        params = {"apikey": api_key, "s": simple_title, "type": "movie"}
+        if year_int:
+            params["y"] = year_int
+        search = _query(params)
+        queries += 1
+        if search and "error" not in search and "Search" in search:
+            best = search["Search"][0]
+            found_id = best.get("imdbID")
+            if found_id:
+                data = _query({"apikey": api_key, "i": found_id})
+                queries += 1
+                if isinstance(data, dict) and "error" in data:
+                    last_error = data["error"]
+        elif search and "error" in search:
+            last_error = search["error"]
+
+    _count_omdb("title", queries)
+    if data is None:
+        return {"error": last_error or "No se encontró la película en OMDb."}
+    if "error" in data:
+        return {"error": data["error"]}
+
+    return parse_awards_text(data.get("Awards", ""))
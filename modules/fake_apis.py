@@ -0,0 +1,443 @@
+# modules/fake_apis.py
+# Servidor local que imita TMDb / OMDb / YouTube, para medir sin red ni API keys.
+#
+# Rutas (todas bajo una misma base, la que se pone en CATALOGO_API_BASE):
+#   /tmdb/3/search/movie, /tmdb/3/find/{tt}, /tmdb/3/movie/{id}[/watch/providers|/similar],
+#   /tmdb/3/discover/movie, /tmdb/3/watch/providers/movie,
+#   /tmdb_image/t/p/w342/...        (póster de relleno)
+#   /omdb/?i=… | ?t=…&y=… | ?s=…
+#   /youtube/v3/search
+#
+# Cada respuesta sale, en este orden, de:
+# 1. fixtures opcionales: `fixtures/fake_apis/<servicio>.json`, {clave: JSON}
+#    con las mismas claves que la caché persistente (URL real + parámetros sin
+#    keys). El repo no trae ninguno: se generan localmente con el subcomando
+#    `export` a partir de la caché de una sesión con API keys reales;
+# 2. si no hay fixture (lo normal en un checkout limpio) y no se pidió --strict,
+#    una respuesta sintética determinista armada con peliculas.csv y
+#    peliculas_con_premios_2025.csv:
+#    los ids TMDb son los dígitos del Const, los proveedores se reparten por hash
+#    y /discover es coherente con watch/providers (el filtro "Disponible en…" funciona).
+#
+# Fallas inyectables: latencia (+ jitter), tasa de 503, límite de ritmo por
+# servicio (429; OMDb responde como OMDb) y cuota diaria de OMDb / YouTube.
+#
+#   python -m modules.fake_apis serve --port 8765 --latency 0.15 --error-rate 0.02
+#   CATALOGO_API_BASE=http://127.0.0.1:8765 streamlit run app.py
+#   python -m modules.fake_apis export          # caché real -> fixtures
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+
+from modules.api_cache import DEFAULT_DB_PATH, make_key
+from modules.providers import REGIONS
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURES = os.path.join(APP_ROOT, "fixtures", "fake_apis")
+DEFAULT_CATALOG = os.path.join(APP_ROOT, "peliculas.csv")
+DEFAULT_AWARDS = os.path.join(APP_ROOT, "peliculas_con_premios_2025.csv")
+
+# servicio -> base real (las claves de los fixtures usan estas URLs)
+UPSTREAM = {
+    "tmdb": "https://api.themoviedb.org",
+    "tmdb_image": "https://image.tmdb.org",
+    "omdb": "https://www.omdbapi.com",
+    "youtube": "https://www.googleapis.com",
+}
+YOUTUBE_SEARCH_COST = 100
+
+# proveedores sintéticos (id TMDb real, nombre)
+FAKE_PROVIDERS = [
+    (8, "Netflix"), (119, "Amazon Prime Video"), (337, "Disney Plus"), (1899, "Max"),
+    (350, "Apple TV+"), (531, "Paramount Plus"), (283, "Crunchyroll"), (11, "MUBI"),
+]
+PAGE_SIZE = 20
+
+# GIF 1x1: basta para que el caché de pósters genere miniaturas
+PLACEHOLDER_IMAGE = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+
+def _h(*parts) -> int:
+    return int(hashlib.sha1(":".join(map(str, parts)).encode("utf-8")).hexdigest()[:12], 16)
+
+
+class FakeCatalog:
+    """Películas conocidas por el servidor falso (del catálogo y del CSV de premios)."""
+
+    def __init__(self, catalog_csv: str = DEFAULT_CATALOG, awards_csv: str = DEFAULT_AWARDS):
+        self.films: Dict[int, Dict[str, Any]] = {}       # id TMDb -> {const, title, year, awards}
+        self._by_title: Dict[str, int] = {}
+        for path in (catalog_csv, awards_csv):
+            if not path or not os.path.exists(path):
+                continue
+            df = pd.read_csv(path, dtype={"Const": str})
+            for r in df.itertuples(index=False):
+                const = getattr(r, "Const", None)
+                if not isinstance(const, str) or not re.match(r"^tt\d+$", const):
+                    continue
+                film = self.films.setdefault(int(const[2:]), {"const": const})
+                film["title"] = r.Title
+                film["year"] = None if pd.isna(r.Year) else int(float(r.Year))
+                awards = getattr(r, "awards_raw", None)
+                if isinstance(awards, str) and awards:
+                    film["awards"] = awards
+        for mid, film in self.films.items():
+            self._by_title.setdefault(self._title_key(film["title"]), mid)
+            self._by_title.setdefault(self._title_key(film["title"], film["year"]), mid)
+        self.ids = sorted(self.films, key=lambda mid: str(self.films[mid]["title"]).lower())
+        self._discover: Dict[Tuple[int, str], List[int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _title_key(title, year=None) -> str:
+        key = re.sub(r"\s+", " ", str(title).strip().lower())
+        return f"{key}|{year}" if year else key
+
+    def find_title(self, title, year=None) -> int:
+        """Id TMDb por título (+año); una película inventada si no está en el catálogo."""
+        year = int(year) if year and str(year).isdigit() else None
+        mid = self._by_title.get(self._title_key(title, year)) or self._by_title.get(self._title_key(title))
+        if mid is None:
+            mid = 90_000_000 + _h(str(title).lower(), year) % 1_000_000
+            self.films.setdefault(mid, {"const": f"tt{mid}", "title": str(title), "year": year})
+        return mid
+
+    def film(self, mid: int) -> Dict[str, Any]:
+        return self.films.get(mid) or {"const": f"tt{mid:07d}", "title": f"Película {mid}", "year": 2000}
+
+    def providers(self, mid: int, region: str) -> List[Tuple[int, str]]:
+        h = _h(mid, region.upper())
+        return [p for i, p in enumerate(FAKE_PROVIDERS) if (h >> (2 * i)) & 3 == 0]
+
+    def discover(self, provider_id: int, region: str) -> List[int]:
+        key = (int(provider_id), region.upper())
+        with self._lock:
+            ids = self._discover.get(key)
+            if ids is None:
+                ids = self._discover[key] = [
+                    mid for mid in self.ids if any(p == key[0] for p, _ in self.providers(mid, key[1]))
+                ]
+            return ids
+
+
+class FakeApiServer:
+    """ThreadingHTTPServer con las rutas de TMDb / OMDb / YouTube que usa la app."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, fixtures_dir: str = DEFAULT_FIXTURES,
+                 catalog: Optional[FakeCatalog] = None, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: float = 0.0, omdb_daily_limit: int = 0,
+                 youtube_daily_units: int = 0, strict: bool = False, seed: int = 0):
+        self.catalog = catalog or FakeCatalog()
+        self.fixtures = self._load_fixtures(fixtures_dir)
+        self.latency = float(latency)
+        self.jitter = float(jitter)
+        self.error_rate = float(error_rate)
+        self.rate_limit = float(rate_limit)
+        self.daily_limits = {"omdb": int(omdb_daily_limit), "youtube": int(youtube_daily_units)}
+        self.strict = strict
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows: Dict[str, Tuple[int, int]] = {}     # servicio -> (segundo, llamadas)
+        self._used: Counter = Counter()                     # unidades diarias gastadas
+        self.counts: Counter = Counter()                    # (servicio, resultado) -> n
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _load_fixtures(fixtures_dir: str) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        if fixtures_dir and os.path.isdir(fixtures_dir):
+            for name in sorted(os.listdir(fixtures_dir)):
+                if name.endswith(".json"):
+                    with open(os.path.join(fixtures_dir, name), encoding="utf-8") as f:
+                        out.update(json.load(f))
+        return out
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeApiServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-apis", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeApiServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {f"{svc}:{outcome}": n for (svc, outcome), n in sorted(self.counts.items())}
+
+    def _count(self, service: str, outcome: str) -> None:
+        with self._lock:
+            self.counts[(service, outcome)] += 1
+
+    # ---------- fallas ----------
+    def _faults(self, service: str, path: str) -> Optional[Tuple[int, Any]]:
+        """(status, cuerpo) si esta llamada debe fallar; None si sigue normal."""
+        delay = self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return 503, {"status_message": "fake outage"}
+            if self.rate_limit and service != "tmdb_image":
+                sec = int(time.time())
+                start, n = self._windows.get(service, (sec, 0))
+                n = n + 1 if start == sec else 1
+                self._windows[service] = (sec, n)
+                if n > self.rate_limit:
+                    if service == "omdb":
+                        return 401, {"Response": "False", "Error": "Request limit reached!"}
+                    return 429, {"status_message": "Your request count is over the allowed limit."}
+            limit = self.daily_limits.get(service, 0)
+            if limit:
+                cost = YOUTUBE_SEARCH_COST if service == "youtube" and path.endswith("/search") else 1
+                if self._used[service] + cost > limit:
+                    if service == "omdb":
+                        return 401, {"Response": "False", "Error": "Request limit reached!"}
+                    return 403, {"error": {"code": 403, "errors": [{"reason": "quotaExceeded"}]}}
+                self._used[service] += cost
+        return None
+
+    # ---------- respuestas ----------
+    def respond(self, service: str, path: str, params: Dict[str, str]) -> Tuple[int, Any]:
+        """(status, cuerpo JSON o bytes) para una llamada ya despojada del prefijo del servicio."""
+        failure = self._faults(service, path)
+        if failure is not None:
+            self._count(service, f"http_{failure[0]}")
+            return failure
+        if service == "tmdb_image":
+            self._count(service, "synthetic")
+            return 200, PLACEHOLDER_IMAGE
+        key = make_key(f"{UPSTREAM[service]}{path}", params)
+        if key in self.fixtures:
+            self._count(service, "fixture")
+            return 200, self.fixtures[key]
+        if self.strict:
+            self._count(service, "missing")
+            return 404, {"status_message": f"sin fixture para {key}"}
+        self._count(service, "synthetic")
+        return getattr(self, f"_{service}")(path, params)
+
+    def _movie(self, mid: int) -> Dict[str, Any]:
+        film = self.catalog.film(mid)
+        year = film.get("year")
+        return {
+            "id": mid,
+            "title": film["title"],
+            "original_title": film["title"],
+            "release_date": f"{year}-01-01" if year else "",
+            "poster_path": f"/fake_{mid}.jpg",
+            "vote_average": round(5.0 + (_h("vote", mid) % 45) / 10, 1),
+            "overview": f"Sinopsis de prueba de {film['title']}.",
+        }
+
+    def _watch_providers(self, mid: int) -> Dict[str, Any]:
+        results = {}
+        for region in REGIONS:
+            provs = self.catalog.providers(mid, region)
+            if provs:
+                results[region] = {
+                    "link": f"https://www.themoviedb.org/movie/{mid}/watch?locale={region}",
+                    "flatrate": [{"provider_id": pid, "provider_name": name, "display_priority": i}
+                                 for i, (pid, name) in enumerate(provs)],
+                }
+        return {"id": mid, "results": results}
+
+    def _similar(self, mid: int) -> Dict[str, Any]:
+        ids = self.catalog.ids or [mid + 1]
+        picks = [ids[_h("similar", mid, k) % len(ids)] for k in range(10)]
+        return {"page": 1, "results": [self._movie(p) for p in dict.fromkeys(picks) if p != mid],
+                "total_pages": 1}
+
+    def _tmdb(self, path: str, params: Dict[str, str]) -> Tuple[int, Any]:
+        if path == "/3/search/movie":
+            mid = self.catalog.find_title(params.get("query", ""), params.get("year"))
+            return 200, {"page": 1, "results": [self._movie(mid)], "total_pages": 1, "total_results": 1}
+        m = re.match(r"^/3/find/tt(\d+)$", path)
+        if m:
+            return 200, {"movie_results": [self._movie(int(m.group(1)))], "tv_results": []}
+        if path == "/3/watch/providers/movie":
+            return 200, {"results": [
+                {"provider_id": pid, "provider_name": name, "display_priority": i,
+                 "display_priorities": {r: i for r in REGIONS}}
+                for i, (pid, name) in enumerate(FAKE_PROVIDERS)
+            ]}
+        if path == "/3/discover/movie":
+            ids = self.catalog.discover(int(params.get("with_watch_providers", "0").split("|")[0] or 0),
+                                        params.get("watch_region", "CL"))
+            page = max(int(params.get("page", 1)), 1)
+            total_pages = max((len(ids) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+            chunk = ids[(page - 1) * PAGE_SIZE: page * PAGE_SIZE]
+            return 200, {"page": page, "results": [self._movie(i) for i in chunk],
+                         "total_pages": total_pages, "total_results": len(ids)}
+        m = re.match(r"^/3/movie/(\d+)(/watch/providers|/similar)?$", path)
+        if m:
+            mid = int(m.group(1))
+            if m.group(2) == "/watch/providers":
+                return 200, self._watch_providers(mid)
+            if m.group(2) == "/similar":
+                return 200, self._similar(mid)
+            details = dict(self._movie(mid), runtime=80 + _h("runtime", mid) % 80)
+            appended = params.get("append_to_response", "").split(",")
+            if "watch/providers" in appended:
+                details["watch/providers"] = self._watch_providers(mid)
+            if "videos" in appended:
+                details["videos"] = {"results": [{"site": "YouTube", "type": "Trailer", "iso_639_1": "en",
+                                                  "official": True, "key": self._video_id(mid)}]}
+            if "similar" in appended:
+                details["similar"] = self._similar(mid)
+            return 200, details
+        return 404, {"status_message": "The resource you requested could not be found."}
+
+    def _omdb(self, path: str, params: Dict[str, str]) -> Tuple[int, Any]:
+        if params.get("s"):
+            mid = self.catalog.find_title(params["s"], params.get("y"))
+            film = self.catalog.film(mid)
+            return 200, {"Response": "True", "totalResults": "1", "Search": [
+                {"Title": film["title"], "Year": str(film.get("year") or ""), "imdbID": film["const"], "Type": "movie"}
+            ]}
+        if params.get("i"):
+            m = re.match(r"^tt(\d+)$", params["i"])
+            mid = int(m.group(1)) if m else None
+        elif params.get("t"):
+            mid = self.catalog.find_title(params["t"], params.get("y"))
+        else:
+            return 200, {"Response": "False", "Error": "Incorrect IMDb ID."}
+        if mid is None:
+            return 200, {"Response": "False", "Error": "Incorrect IMDb ID."}
+        film = self.catalog.film(mid)
+        awards = film.get("awards")
+        if awards is None:
+            h = _h("awards", mid)
+            awards = f"{h % 40} wins & {h % 40 + h % 25} nominations total" if h % 5 else "N/A"
+        return 200, {"Response": "True", "Title": film["title"], "Year": str(film.get("year") or ""),
+                     "imdbID": film["const"], "Type": "movie", "Awards": awards}
+
+    @staticmethod
+    def _video_id(seed) -> str:
+        return base64.urlsafe_b64encode(hashlib.sha1(str(seed).encode("utf-8")).digest())[:11].decode()
+
+    def _youtube(self, path: str, params: Dict[str, str]) -> Tuple[int, Any]:
+        if not path.endswith("/search"):
+            return 404, {"error": {"code": 404}}
+        return 200, {"items": [{"id": {"kind": "youtube#video", "videoId": self._video_id(params.get("q", ""))}}]}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, como las APIs reales
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                service, _, rest = parts.path.lstrip("/").partition("/")
+                if service not in UPSTREAM:
+                    return self._send(404, {"error": f"servicio desconocido: {service}"})
+                params = dict(parse_qsl(parts.query, keep_blank_values=True))
+                status, body = server.respond(service, "/" + rest, params)
+                self._send(status, body)
+
+            def _send(self, status: int, body: Any) -> None:
+                if isinstance(body, bytes):
+                    data, ctype = body, "image/gif"
+                else:
+                    data, ctype = json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json"
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def export_fixtures(db_path: str = DEFAULT_DB_PATH, out_dir: str = DEFAULT_FIXTURES) -> Dict[str, int]:
+    """
+    Vuelca las respuestas reales de la caché persistente a fixtures por servicio.
+    Las claves ya vienen sin API keys (make_key las descarta).
+    """
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT key, payload FROM responses WHERE status != 'transient'").fetchall()
+    conn.close()
+    by_service: Dict[str, Dict[str, Any]] = {}
+    for key, payload in rows:
+        service = next((s for s, base in UPSTREAM.items() if key.startswith(base + "/")), None)
+        body = json.loads(payload)
+        if service is None or body is None:
+            continue
+        by_service.setdefault(service, {})[key] = body
+    os.makedirs(out_dir, exist_ok=True)
+    for service, fixtures in by_service.items():
+        with open(os.path.join(out_dir, f"{service}.json"), "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(fixtures.items())), f, ensure_ascii=False, indent=1)
+    return {service: len(fixtures) for service, fixtures in by_service.items()}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Servidor falso de TMDb / OMDb / YouTube para pruebas locales.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    sp = sub.add_parser("serve", help="levantar el servidor")
+    sp.add_argument("--host", default="127.0.0.1")
+    sp.add_argument("--port", type=int, default=8765)
+    sp.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    sp.add_argument("--latency", type=float, default=0.0, help="segundos por respuesta")
+    sp.add_argument("--jitter", type=float, default=0.0, help="± segundos aleatorios sobre la latencia")
+    sp.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas 503")
+    sp.add_argument("--rate-limit", type=float, default=0.0, help="llamadas/s por servicio antes de 429 (0 = sin tope)")
+    sp.add_argument("--omdb-daily-limit", type=int, default=0, help="consultas OMDb antes de 'Request limit reached!'")
+    sp.add_argument("--youtube-daily-units", type=int, default=0, help="unidades de YouTube (búsqueda = 100)")
+    sp.add_argument("--strict", action="store_true", help="sólo fixtures: 404 si falta uno")
+    ep = sub.add_parser("export", help="caché persistente -> fixtures")
+    ep.add_argument("--db", default=DEFAULT_DB_PATH)
+    ep.add_argument("--out", default=DEFAULT_FIXTURES)
+    args = ap.parse_args()
+
+    if args.command == "export":
+        for service, n in export_fixtures(args.db, args.out).items():
+            print(f"{service}: {n} respuestas")
+    else:
+        srv = FakeApiServer(
+            args.host, args.port, args.fixtures, latency=args.latency, jitter=args.jitter,
+            error_rate=args.error_rate, rate_limit=args.rate_limit, omdb_daily_limit=args.omdb_daily_limit,
+            youtube_daily_units=args.youtube_daily_units, strict=args.strict,
+        ).start()
+        print(f"APIs falsas en {srv.base_url} ({len(srv.fixtures)} fixtures, {len(srv.catalog.films)} películas)")
+        print(f"  CATALOGO_API_BASE={srv.base_url} streamlit run app.py")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print(srv.stats())
+            srv.stop()
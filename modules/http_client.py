@@ -0,0 +1,211 @@
+# modules/http_client.py
+# Cliente HTTP compartido para TMDb / OMDb / YouTube.
+#
+# - Una requests.Session por host (keep-alive + pool de conexiones), así cada
+#   póster no paga de nuevo el handshake TCP+TLS.
+# - Reintentos en 429 / 5xx / errores de red con backoff exponencial con jitter
+#   ("full jitter"), respetando `Retry-After` (segundos o fecha HTTP).
+# - Histograma de latencias por endpoint (host + ruta con ids normalizados).
+# - Circuit breaker por proveedor: con el circuito abierto no se llama a la red
+#   (CircuitOpenError al instante, sin esperar timeouts).
+# - Ritmo, simultaneidad y cuota diaria por proveedor (modules/rate_limit.py);
+#   sin cuota utilizable lanza QuotaExceeded (un CircuitOpenError) sin llamar.
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.circuit_breaker import CircuitOpenError, get_breaker, provider_for
+from modules.rate_limit import get_limiter, quota_cost
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Límites de los buckets del histograma (ms); el último bucket es "> 5000"
+LATENCY_BUCKETS_MS = [25, 50, 100, 200, 400, 800, 1600, 3200, 5000]
+
+
+class LatencyHistogram:
+    """Histograma de latencias con buckets fijos (barato y seguro entre hilos)."""
+
+    def __init__(self, bounds: List[float] = LATENCY_BUCKETS_MS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms: float) -> None:
+        i = 0
+        while i < len(self.bounds) and ms > self.bounds[i]:
+            i += 1
+        with self._lock:
+            self.counts[i] += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    @property
+    def n(self) -> int:
+        return sum(self.counts)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Cota superior (límite del bucket) del cuantil q."""
+        n = self.n
+        if n == 0:
+            return None
+        target, acc = q * n, 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return self.bounds[i] if i < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        n = self.n
+        return {
+            "n": n,
+            "mean_ms": round(self.total_ms / n, 1) if n else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+_ID_SEGMENT = re.compile(r"^(\d+|tt\d+)$")
+
+
+def endpoint_name(url: str) -> str:
+    """host + ruta con ids reemplazados (…/movie/{id}/watch/providers)."""
+    parts = urlsplit(url)
+    segs = parts.path.split("/")
+    # el primer segmento es la versión de la API (/3/...), no un id
+    path = "/".join(segs[:2] + ["{id}" if _ID_SEGMENT.match(seg) else seg for seg in segs[2:]])
+    return f"{parts.netloc}{path.rstrip('/') or '/'}"
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Interpreta `Retry-After` (segundos o fecha HTTP). None si no es válido."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class HttpClient:
+    """Sesiones por host + reintentos con backoff + métricas de latencia."""
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.25,
+                 backoff_cap: float = 8.0, max_retry_after: float = 30.0,
+                 pool_maxsize: int = 16):
+        self.max_retries = int(max_retries)
+        self.backoff_base = float(backoff_base)
+        self.backoff_cap = float(backoff_cap)
+        self.max_retry_after = float(max_retry_after)
+        self.pool_maxsize = int(pool_maxsize)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def session_for(self, url: str) -> requests.Session:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            s = self._sessions.get(host)
+            if s is None:
+                s = requests.Session()
+                # reintentos propios (abajo): el adapter no reintenta por su cuenta
+                s.mount(host, HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0))
+                self._sessions[host] = s
+            return s
+
+    def _histogram(self, endpoint: str) -> LatencyHistogram:
+        with self._lock:
+            h = self._latency.get(endpoint)
+            if h is None:
+                h = self._latency[endpoint] = LatencyHistogram()
+            return h
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniforme en [0, min(cap, base·2^attempt)]."""
+        return random.uniform(0.0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            timeout: float = 5) -> requests.Response:
+        """
+        GET con reintentos. Devuelve la última respuesta (aunque sea 429/5xx tras
+        agotar los reintentos); relanza la excepción de red del último intento.
+        Lanza CircuitOpenError sin tocar la red si el circuito del proveedor está
+        abierto, y QuotaExceeded si ya no queda cuota diaria utilizable.
+        """
+        session = self.session_for(url)
+        hist = self._histogram(endpoint_name(url))
+        breaker = get_breaker(provider_for(url))
+        limiter = get_limiter(breaker.name)
+        cost = quota_cost(url)
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            with limiter.slot(cost) as charge:
+                if not breaker.allow():
+                    raise CircuitOpenError(breaker.name, breaker.retry_in())
+                charge()
+                t0 = time.perf_counter()
+                try:
+                    r = session.get(url, params=params, timeout=timeout)
+                except (requests.ConnectionError, requests.Timeout):
+                    hist.observe((time.perf_counter() - t0) * 1000.0)
+                    breaker.record(False)
+                    if last:
+                        raise
+                    wait = self.backoff(attempt)
+                except Exception:
+                    breaker.record(False)
+                    raise
+                else:
+                    hist.observe((time.perf_counter() - t0) * 1000.0)
+                    breaker.record(r.status_code not in RETRY_STATUS)
+                    if r.status_code not in RETRY_STATUS or last:
+                        return r
+                    wait = retry_after_seconds(r.headers.get("Retry-After"))
+                    if wait is None:
+                        wait = self.backoff(attempt)
+                    elif wait > self.max_retry_after:
+                        # el servidor pide esperar demasiado: no bloqueamos la página
+                        return r
+                    r.close()
+            with self._lock:
+                self.retries += 1
+            time.sleep(wait)
+        raise RuntimeError("unreachable")
+
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            items = list(self._latency.items())
+        return {ep: h.summary() for ep, h in sorted(items)}
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Cliente del proceso (compartido por la app, los hilos de prefetch y los CLIs)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
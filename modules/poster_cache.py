@@ -0,0 +1,299 @@
+# modules/poster_cache.py
+# Caché local de pósters + miniaturas servidas como estáticos de Streamlit.
+#
+# - Cada póster de TMDb (w342) se descarga una sola vez al disco.
+# - De ese original se generan miniaturas WebP (JPEG si Pillow no trae WebP)
+#   a los anchos que usa la grilla; el navegador elige con srcset.
+# - Los archivos viven en `static/posters/` y Streamlit los sirve en
+#   `app/static/posters/...` (server.enableStaticServing en .streamlit/config.toml).
+#   Los nombres son hash del póster + ancho (inmutables) y la URL lleva `?v=`,
+#   con lo que el StaticFileHandler de Tornado responde con caché larga.
+# - Tamaño acotado: al pasar el tope se borran los archivos usados hace más
+#   tiempo (LRU por mtime; un acierto "toca" el archivo).
+#
+# `python -m modules.poster_cache stats|prune|clear` para mantenimiento.
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from modules.http_client import get_client
+
+try:
+    from PIL import Image, features
+except ImportError:  # sin Pillow se sirven los originales (igual locales)
+    Image = None
+    features = None
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_ROOT = os.path.join(APP_ROOT, "static")
+POSTER_DIR = os.path.join(STATIC_ROOT, "posters")
+STATIC_URL_PREFIX = "app/static"
+
+THUMB_WIDTHS = (160, 240)            # anchos de tarjeta en la grilla (móvil / escritorio)
+THUMB_QUALITY = 78
+DEFAULT_MAX_BYTES = int(float(os.environ.get("CATALOGO_POSTER_CACHE_MB", 200)) * 1024 * 1024)
+TOUCH_EVERY = 3600.0                 # no reescribir mtime en cada acierto
+
+
+def _thumb_ext() -> str:
+    if Image is not None and features.check("webp"):
+        return "webp"
+    return "jpg"
+
+
+class PosterCache:
+    """Pósters originales + miniaturas en disco, con tope de bytes y desalojo LRU."""
+
+    def __init__(self, root: str = POSTER_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.ext = _thumb_ext()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, List] = {}                   # clave -> [lock, hilos que lo usan]
+        self._files: "OrderedDict[str, int]" = OrderedDict()   # nombre -> bytes, más viejo primero
+        self._touched: Dict[str, float] = {}
+        self._pending: set = set()
+        self._bg = ThreadPoolExecutor(max_workers=4, thread_name_prefix="posters")
+        self.total_bytes = 0
+        self.hits = 0
+        self.downloads = 0
+        self.evictions = 0
+        os.makedirs(self.root, exist_ok=True)
+        self._scan()
+
+    def _scan(self) -> None:
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            st = os.stat(path)
+            entries.append((st.st_mtime, name, st.st_size))
+        for mtime, name, size in sorted(entries):
+            self._files[name] = size
+            self._touched[name] = mtime
+            self.total_bytes += size
+
+    @staticmethod
+    def key(poster_url: str) -> str:
+        return hashlib.sha1(poster_url.encode("utf-8")).hexdigest()[:20]
+
+    @contextmanager
+    def _key_lock(self, key: str) -> Iterator[None]:
+        """Serializa la descarga/generación de una clave; el lock se suelta al quedar sin usuarios."""
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    self._key_locks.pop(key, None)
+
+    # ---------- LRU ----------
+    def _hit(self, name: str) -> None:
+        now = time.time()
+        with self._lock:
+            if name in self._files:
+                self._files.move_to_end(name)
+            touch = now - self._touched.get(name, 0.0) > TOUCH_EVERY
+            if touch:
+                self._touched[name] = now
+        if touch:
+            try:
+                os.utime(os.path.join(self.root, name))
+            except OSError:
+                pass
+
+    def _forget(self, name: str) -> None:
+        """Saca del índice un archivo que ya no está en disco (borrado a mano, otro proceso)."""
+        with self._lock:
+            self.total_bytes -= self._files.pop(name, 0)
+            self._touched.pop(name, None)
+
+    def _present(self, name: str) -> bool:
+        if name not in self._files:
+            return False
+        if os.path.exists(os.path.join(self.root, name)):
+            return True
+        self._forget(name)
+        return False
+
+    def _add(self, name: str, data: bytes) -> None:
+        path = os.path.join(self.root, name)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self.total_bytes += len(data) - self._files.pop(name, 0)
+            self._files[name] = len(data)
+            self._touched[name] = time.time()
+        self.prune()
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """Borra los archivos menos usados hasta quedar bajo el tope. Devuelve cuántos borró."""
+        limit = self.max_bytes if max_bytes is None else int(max_bytes)
+        removed = 0
+        while True:
+            with self._lock:
+                if self.total_bytes <= limit or not self._files:
+                    return removed
+                name, size = self._files.popitem(last=False)
+                self._touched.pop(name, None)
+                self.total_bytes -= size
+                self.evictions += 1
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                pass
+            removed += 1
+
+    # ---------- originales y miniaturas ----------
+    def _original(self, poster_url: str, key: str) -> Optional[bytes]:
+        name = f"{key}.jpg"
+        path = os.path.join(self.root, name)
+        if self._present(name):
+            self._hit(name)
+            with open(path, "rb") as f:
+                return f.read()
+        r = get_client().get(poster_url, timeout=6)
+        if r.status_code != 200 or not r.content:
+            return None
+        self.downloads += 1
+        self._add(name, r.content)
+        return r.content
+
+    def _make_thumb(self, original: bytes, width: int) -> bytes:
+        img = Image.open(io.BytesIO(original))
+        img = img.convert("RGB")
+        if img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        out = io.BytesIO()
+        if self.ext == "webp":
+            img.save(out, "WEBP", quality=THUMB_QUALITY, method=4)
+        else:
+            img.save(out, "JPEG", quality=THUMB_QUALITY, optimize=True, progressive=True)
+        return out.getvalue()
+
+    def thumbnail(self, poster_url: str, width: int) -> Optional[str]:
+        """Nombre del archivo de la miniatura (descarga / genera si falta). None si no se pudo."""
+        if not poster_url:
+            return None
+        key = self.key(poster_url)
+        name = f"{key}_{int(width)}.{self.ext}" if Image is not None else f"{key}.jpg"
+        if self._present(name):
+            self._hit(name)
+            self.hits += 1
+            return name
+        with self._key_lock(key):
+            if self._present(name):
+                self.hits += 1
+                return name
+            try:
+                original = self._original(poster_url, key)
+                if original is None:
+                    return None
+                if Image is not None:
+                    self._add(name, self._make_thumb(original, int(width)))
+            except Exception:
+                return None
+        return name
+
+    def _is_local(self, poster_url: str, widths: Iterable[int]) -> bool:
+        key = self.key(poster_url)
+        if Image is None:
+            return f"{key}.jpg" in self._files
+        return all(f"{key}_{int(w)}.{self.ext}" in self._files for w in widths)
+
+    def _warm(self, poster_url: str, widths) -> None:
+        try:
+            for w in widths:
+                self.thumbnail(poster_url, w)
+        finally:
+            with self._lock:
+                self._pending.discard(poster_url)
+
+    def srcset(self, poster_url: str, widths: Iterable[int] = THUMB_WIDTHS,
+               wait: bool = True) -> Optional[Dict[str, str]]:
+        """
+        {"src", "srcset"} para un <img> con las miniaturas locales; None si no hay
+        póster local. Con wait=False no bloquea: si faltan, se generan en segundo
+        plano y esta vez se devuelve None (el llamador usa la URL de TMDb).
+        """
+        widths = tuple(widths)
+        if not poster_url:
+            return None
+        if not wait and not self._is_local(poster_url, widths):
+            with self._lock:
+                submit = poster_url not in self._pending
+                self._pending.add(poster_url)
+            if submit:
+                self._bg.submit(self._warm, poster_url, widths)
+            return None
+        urls = []
+        for w in widths:
+            name = self.thumbnail(poster_url, w)
+            if name is None:
+                return None
+            urls.append((w, f"{STATIC_URL_PREFIX}/posters/{name}?v={name.split('.')[0]}"))
+        if Image is None:
+            return {"src": urls[-1][1], "srcset": ""}
+        return {
+            "src": urls[-1][1],
+            "srcset": ", ".join(f"{u} {w}w" for w, u in urls),
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "downloads": self.downloads,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> int:
+        return self.prune(0)
+
+
+_cache: Optional[PosterCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_poster_cache() -> PosterCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PosterCache()
+        return _cache
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Mantenimiento de la caché local de pósters.")
+    ap.add_argument("command", choices=["stats", "prune", "clear"])
+    ap.add_argument("--max-mb", type=float, default=None, help="tope para prune (por defecto el configurado)")
+    args = ap.parse_args()
+
+    pc = PosterCache()
+    if args.command == "prune":
+        limit = None if args.max_mb is None else int(args.max_mb * 1024 * 1024)
+        print(f"Archivos borrados: {pc.prune(limit)}")
+    elif args.command == "clear":
+        print(f"Archivos borrados: {pc.clear()}")
+    s = pc.stats()
+    print(f"archivos={s['files']} bytes={s['bytes']} tope={s['max_bytes']} formato={pc.ext}")
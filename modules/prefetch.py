@@ -0,0 +1,187 @@
+# modules/prefetch.py
+# Resolución concurrente de lookups externos (TMDb, OMDb...) para una página.
+#
+# Los lookups son I/O puro: se reparten en un pool de hilos acotado y cada
+# hilo llama a las mismas funciones cacheadas de la app, así los resultados
+# quedan en las mismas cachés (st.cache_data + caché persistente).
+#
+# BackgroundPrefetcher adelanta trabajo que todavía nadie pidió (la página
+# siguiente / anterior de la galería) con pocos hilos y prioridad baja: antes
+# de cada item espera a que no haya lotes en primer plano (map_concurrent) en
+# ningún hilo. Cada sesión agenda con un token (p. ej. la firma de los
+# filtros); agendar con otro token cancela lo pendiente del token anterior.
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_WORKERS = 8
+BACKGROUND_WORKERS = 2
+
+
+def _script_ctx():
+    """Contexto de ejecución de Streamlit del hilo actual (None fuera de Streamlit)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+
+
+def _attach_ctx(ctx) -> None:
+    if ctx is None:
+        return
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx
+        add_script_run_ctx(threading.current_thread(), ctx)
+    except Exception:
+        pass
+
+
+def session_key() -> str:
+    """Id de la sesión de Streamlit del hilo actual ("local" fuera de Streamlit)."""
+    ctx = _script_ctx()
+    return getattr(ctx, "session_id", None) or "local"
+
+
+# ---------- primer plano vs. segundo plano ----------
+_foreground_cond = threading.Condition()
+_foreground_active = 0
+
+
+@contextmanager
+def foreground() -> Iterator[None]:
+    """Marca un lote en primer plano: el prefetch en segundo plano espera a que termine."""
+    global _foreground_active
+    with _foreground_cond:
+        _foreground_active += 1
+    try:
+        yield
+    finally:
+        with _foreground_cond:
+            _foreground_active -= 1
+            _foreground_cond.notify_all()
+
+
+def _wait_foreground_idle() -> None:
+    with _foreground_cond:
+        while _foreground_active:
+            _foreground_cond.wait(1.0)
+
+
+def script_executor(max_workers: int, thread_name_prefix: str = "prefetch") -> ThreadPoolExecutor:
+    """Pool de hilos cuyos hilos heredan el contexto de Streamlit del hilo que lo crea."""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix,
+                              initializer=_attach_ctx, initargs=(_script_ctx(),))
+
+
+def map_concurrent(fn: Callable[[Any], Any], items: Iterable[Any],
+                   max_workers: int = DEFAULT_WORKERS) -> List[Optional[Any]]:
+    """
+    Aplica `fn` a cada item en un pool de hilos acotado y devuelve los resultados
+    en el mismo orden. Un fallo en un item devuelve None para ese item.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def _safe(item):
+        try:
+            return fn(item)
+        except Exception:
+            return None
+
+    with foreground():
+        if len(items) == 1 or max_workers <= 1:
+            return [_safe(it) for it in items]
+        with script_executor(min(max_workers, len(items))) as pool:
+            return list(pool.map(_safe, items))
+
+
+class BackgroundPrefetcher:
+    """
+    Cola de prefetch de baja prioridad, compartida por todas las sesiones.
+    schedule(owner, token, fn, items): agenda fn(item) para cada item; lo que
+    `owner` tenía pendiente con otro token se descarta sin ejecutarse.
+    """
+
+    def __init__(self, max_workers: int = BACKGROUND_WORKERS):
+        self.max_workers = max_workers
+        self._queue: "queue.Queue[Tuple[str, Hashable, Callable[[Any], Any], Any, Any]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, Hashable] = {}
+        self._queued: set = set()
+        self._threads: List[threading.Thread] = []
+        self.done = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def _live(self, owner: str, token: Hashable) -> bool:
+        with self._lock:
+            return self._tokens.get(owner) == token
+
+    def schedule(self, owner: str, token: Hashable, fn: Callable[[Any], Any], items: Iterable[Any]) -> int:
+        """Agenda los items que no estén ya en cola para este owner/token. Devuelve cuántos agregó."""
+        ctx = _script_ctx()
+        added = 0
+        with self._lock:
+            self._tokens[owner] = token
+            for item in items:
+                job_key = (owner, token, item)
+                if job_key in self._queued:
+                    continue
+                self._queued.add(job_key)
+                self._queue.put((owner, token, fn, item, ctx))
+                added += 1
+            while len(self._threads) < self.max_workers and added:
+                t = threading.Thread(target=self._run, name=f"prefetch-bg-{len(self._threads)}", daemon=True)
+                self._threads.append(t)
+                t.start()
+        return added
+
+    def cancel(self, owner: str) -> None:
+        """Descarta lo pendiente de `owner` (lo que ya está corriendo termina)."""
+        with self._lock:
+            self._tokens.pop(owner, None)
+
+    def _run(self) -> None:
+        while True:
+            owner, token, fn, item, ctx = self._queue.get()
+            with self._lock:
+                self._queued.discard((owner, token, item))
+            _wait_foreground_idle()
+            if not self._live(owner, token):
+                with self._lock:
+                    self.cancelled += 1
+                continue
+            _attach_ctx(ctx)
+            try:
+                fn(item)
+                ok = True
+            except Exception:
+                ok = False
+            with self._lock:
+                if ok:
+                    self.done += 1
+                else:
+                    self.failed += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": self._queue.qsize(), "done": self.done,
+                    "failed": self.failed, "cancelled": self.cancelled}
+
+
+_background: Optional[BackgroundPrefetcher] = None
+_background_lock = threading.Lock()
+
+
+def get_background_prefetcher() -> BackgroundPrefetcher:
+    global _background
+    with _background_lock:
+        if _background is None:
+            _background = BackgroundPrefetcher()
+        return _background
@@ -0,0 +1,175 @@
+# modules/providers.py
+# Proveedores de streaming de TMDb, todos los países a la vez.
+#
+# TMDb devuelve watch/providers para todos los países en un solo payload; aquí
+# se guarda completo en forma compacta (arreglos pequeños de enteros: país ×
+# proveedor × tipo) y se "corta" por país en memoria. Cambiar de región en la
+# barra lateral no toca la red ni la caché en disco.
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+PROVIDER_KINDS = ["flatrate", "rent", "buy", "ads", "free"]
+
+# Regiones ofrecidas en la barra lateral (código ISO -> nombre)
+REGIONS = {
+    "CL": "Chile",
+    "AR": "Argentina",
+    "MX": "México",
+    "CO": "Colombia",
+    "PE": "Perú",
+    "UY": "Uruguay",
+    "BR": "Brasil",
+    "ES": "España",
+    "US": "Estados Unidos",
+    "GB": "Reino Unido",
+}
+
+
+class _Registry:
+    """Interna códigos de país y nombres de proveedor a enteros pequeños (compartido por proceso)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.country_codes: List[str] = []
+        self._country_idx: Dict[str, int] = {}
+        self.provider_names: Dict[int, str] = {}
+
+    def country(self, code: str) -> int:
+        code = code.upper()
+        with self._lock:
+            idx = self._country_idx.get(code)
+            if idx is None:
+                idx = self._country_idx[code] = len(self.country_codes)
+                self.country_codes.append(code)
+            return idx
+
+    def country_index(self, code: str) -> Optional[int]:
+        return self._country_idx.get(code.upper())
+
+    def provider(self, provider_id: int, name: str) -> int:
+        if provider_id not in self.provider_names:
+            with self._lock:
+                self.provider_names.setdefault(provider_id, name)
+        return provider_id
+
+
+REGISTRY = _Registry()
+
+
+class CompactProviders:
+    """
+    Disponibilidad de una película en todos los países:
+    tres arreglos paralelos (país uint16, proveedor int32, tipo uint8) + links por país.
+    """
+
+    __slots__ = ("countries", "providers", "kinds", "links")
+
+    def __init__(self, countries: np.ndarray, providers: np.ndarray, kinds: np.ndarray,
+                 links: Dict[int, str]):
+        self.countries = countries
+        self.providers = providers
+        self.kinds = kinds
+        self.links = links
+
+    @classmethod
+    def from_payload(cls, payload: Optional[Dict[str, Any]]) -> "CompactProviders":
+        """Desde la respuesta de /movie/{id}/watch/providers (o su bloque en append_to_response)."""
+        countries, providers, kinds, links = [], [], [], {}
+        for code, cdata in ((payload or {}).get("results") or {}).items():
+            c = REGISTRY.country(code)
+            if cdata.get("link"):
+                links[c] = cdata["link"]
+            for k, kind in enumerate(PROVIDER_KINDS):
+                for item in cdata.get(kind, []) or []:
+                    pid = item.get("provider_id")
+                    name = item.get("provider_name")
+                    if pid is None or not name:
+                        continue
+                    countries.append(c)
+                    providers.append(REGISTRY.provider(int(pid), name))
+                    kinds.append(k)
+        return cls(
+            np.asarray(countries, dtype=np.uint16),
+            np.asarray(providers, dtype=np.int32),
+            np.asarray(kinds, dtype=np.uint8),
+            links,
+        )
+
+    def available_countries(self) -> List[str]:
+        idx = set(np.unique(self.countries).tolist()) | set(self.links)
+        return sorted(REGISTRY.country_codes[i] for i in idx)
+
+    def provider_ids(self, country: str) -> np.ndarray:
+        c = REGISTRY.country_index(country)
+        if c is None:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(self.providers[self.countries == c])
+
+    def for_country(self, country: str) -> Optional[Dict[str, Any]]:
+        """Mismo formato que antes: {"platforms": [...], "link": ...} o None si no hay datos."""
+        c = REGISTRY.country_index(country)
+        if c is None or (c not in self.links and not (self.countries == c).any()):
+            return None
+        names = {REGISTRY.provider_names[int(p)] for p in self.providers[self.countries == c]}
+        return {"platforms": sorted(names), "link": self.links.get(c)}
+
+    def __getstate__(self):
+        # st.cache_data serializa: se guardan códigos de país y nombres, no índices del proceso
+        codes = REGISTRY.country_codes
+        return {
+            "countries": [codes[int(c)] for c in self.countries],
+            "providers": self.providers.tolist(),
+            "names": {int(p): REGISTRY.provider_names[int(p)] for p in np.unique(self.providers)},
+            "kinds": self.kinds.tolist(),
+            "links": {codes[c]: link for c, link in self.links.items()},
+        }
+
+    def __setstate__(self, state):
+        for pid, name in state["names"].items():
+            REGISTRY.provider(int(pid), name)
+        self.countries = np.asarray([REGISTRY.country(c) for c in state["countries"]], dtype=np.uint16)
+        self.providers = np.asarray(state["providers"], dtype=np.int32)
+        self.kinds = np.asarray(state["kinds"], dtype=np.uint8)
+        self.links = {REGISTRY.country(c): link for c, link in state["links"].items()}
+
+
+class ProviderIndex:
+    """
+    Índice inverso proveedor -> películas del catálogo: un bitset (np.packbits)
+    por proveedor sobre las filas del catálogo, armado cruzando el catálogo del
+    proveedor (/discover) con los ids TMDb conocidos. Filtrar es un OR de bits.
+    """
+
+    def __init__(self, tmdb_ids):
+        # id TMDb por fila del catálogo; -1 = desconocido (nunca coincide)
+        self.tmdb_ids = np.asarray(tmdb_ids, dtype=np.int64)
+        self.bits: Dict[int, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.tmdb_ids)
+
+    @property
+    def known(self) -> int:
+        return int((self.tmdb_ids >= 0).sum())
+
+    def add(self, provider_id: int, catalog_ids) -> None:
+        hits = np.isin(self.tmdb_ids, np.asarray(list(catalog_ids), dtype=np.int64)) & (self.tmdb_ids >= 0)
+        self.bits[int(provider_id)] = np.packbits(hits)
+
+    def mask(self, provider_ids) -> np.ndarray:
+        """Filas disponibles en al menos uno de los proveedores (bool, largo = catálogo)."""
+        n = len(self.tmdb_ids)
+        acc = np.zeros((n + 7) // 8, dtype=np.uint8)
+        for pid in provider_ids:
+            bits = self.bits.get(int(pid))
+            if bits is not None:
+                acc |= bits
+        return np.unpackbits(acc, count=n).astype(bool)
+
+    def count(self, provider_id: int) -> int:
+        bits = self.bits.get(int(provider_id))
+        return 0 if bits is None else int(np.unpackbits(bits, count=len(self.tmdb_ids)).sum())
@@ -0,0 +1,336 @@
+# modules/rate_limit.py
+# Límite de ritmo y cuota diaria por proveedor (TMDb / OMDb / YouTube).
+#
+# - Token bucket por proveedor (ritmo + ráfaga), compartido por todas las
+#   sesiones del proceso; con CATALOGO_RATE_LIMIT_HOST_WIDE=1 el estado del
+#   bucket vive en un archivo con lock (fcntl) y lo comparten todos los
+#   procesos del host.
+# - Tope de llamadas simultáneas por proveedor (semáforo).
+# - Cuota diaria persistente (SQLite, compartida entre procesos): OMDb gratis
+#   son 1.000 consultas/día; una búsqueda de YouTube cuesta 100 unidades de
+#   10.000. Cerca del tope (queda sólo la reserva) se deja de llamar a la red:
+#   QuotaExceeded es un CircuitOpenError, así que la app sirve lo que haya en
+#   caché (aunque esté vencido) o un marcador, igual que con el circuito abierto.
+#
+# Configuración (por proveedor P = TMDB / OMDB / YOUTUBE):
+#   CATALOGO_<P>_RPS, CATALOGO_<P>_BURST, CATALOGO_<P>_CONCURRENCY,
+#   CATALOGO_<P>_DAILY_QUOTA (0 = sin cuota), CATALOGO_QUOTA_RESERVE (0.05),
+#   CATALOGO_QUOTA_DB, CATALOGO_RATE_LIMIT_HOST_WIDE
+#
+# `python -m modules.rate_limit` muestra el consumo del día.
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+from modules.circuit_breaker import PROVIDER_LABELS, CircuitOpenError, provider_for
+
+try:
+    import fcntl
+except ImportError:  # Windows: sólo límite por proceso
+    fcntl = None
+
+try:
+    from zoneinfo import ZoneInfo
+    _PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:
+    _PACIFIC = timezone.utc
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+DEFAULT_QUOTA_DB = os.environ.get("CATALOGO_QUOTA_DB", os.path.join(CACHE_DIR, "quota.sqlite3"))
+
+# ritmo (req/s), ráfaga, simultáneas, cuota diaria (unidades), zona horaria del reinicio de cuota
+PROVIDER_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "tmdb": {"rps": 40.0, "burst": 40, "concurrency": 16, "daily_quota": 0, "tz": timezone.utc},
+    "omdb": {"rps": 5.0, "burst": 5, "concurrency": 4, "daily_quota": 1000, "tz": timezone.utc},
+    "youtube": {"rps": 2.0, "burst": 2, "concurrency": 2, "daily_quota": 10000, "tz": _PACIFIC},
+}
+YOUTUBE_SEARCH_COST = 100
+
+
+class QuotaExceeded(CircuitOpenError):
+    """Cuota diaria del proveedor agotada (o en la reserva): no se llamó a la red."""
+
+    def __init__(self, provider: str, retry_in: float = 0.0):
+        super().__init__(provider, retry_in)
+        self.args = (f"cuota diaria de {PROVIDER_LABELS.get(provider, provider)} agotada",)
+
+
+def quota_cost(url: str) -> int:
+    """Unidades de cuota de una llamada (YouTube search = 100; el resto, 1)."""
+    if provider_for(url) == "youtube" and urlsplit(url).path.rstrip("/").endswith("/search"):
+        return YOUTUBE_SEARCH_COST
+    return 1
+
+
+def _env(provider: str, name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(f"CATALOGO_{provider.upper()}_{name}", default))
+    except ValueError:
+        return default
+
+
+# ---------------------------------------------------------------- token bucket
+
+class TokenBucket:
+    """
+    Token bucket seguro entre hilos. Con `state_path`, el estado (tokens, t)
+    se lee y escribe bajo flock y lo comparten los procesos del host.
+    """
+
+    def __init__(self, rate: float, burst: float, state_path: Optional[str] = None):
+        self.rate = float(rate)
+        self.burst = float(max(burst, 1))
+        self.state_path = state_path if fcntl is not None else None
+        self._tokens = self.burst
+        self._t = time.time()
+        self._lock = threading.Lock()
+        self.waited_s = 0.0
+
+    def _take(self, tokens: float, now: float, state: Dict[str, float]) -> float:
+        """Descuenta del estado y devuelve cuánto hay que esperar (0 si había tokens)."""
+        avail = min(self.burst, state["tokens"] + (now - state["t"]) * self.rate)
+        avail -= tokens
+        state["tokens"], state["t"] = avail, now
+        return 0.0 if avail >= 0 else -avail / self.rate
+
+    def _take_shared(self, tokens: float, now: float) -> float:
+        with open(self.state_path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                    state = {"tokens": float(state["tokens"]), "t": float(state["t"])}
+                except (ValueError, KeyError, TypeError):
+                    state = {"tokens": self.burst, "t": now}
+                wait = self._take(tokens, now, state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return wait
+
+    def _take_local(self, tokens: float, now: float) -> float:
+        state = {"tokens": self._tokens, "t": self._t}
+        wait = self._take(tokens, now, state)
+        self._tokens, self._t = state["tokens"], state["t"]
+        return wait
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Toma `tokens` (puede quedar en deuda) y duerme lo necesario. Devuelve la espera."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.time()
+        with self._lock:
+            if self.state_path:
+                try:
+                    wait = self._take_shared(tokens, now)
+                except OSError:
+                    self.state_path = None
+                    wait = self._take_local(tokens, now)
+            else:
+                wait = self._take_local(tokens, now)
+            self.waited_s += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+# ---------------------------------------------------------------- cuota diaria
+
+class QuotaLedger:
+    """Unidades consumidas por proveedor y día (SQLite; una conexión por hilo)."""
+
+    def __init__(self, path: str = DEFAULT_QUOTA_DB):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS quota ("
+            " provider TEXT NOT NULL, day TEXT NOT NULL, units INTEGER NOT NULL,"
+            " PRIMARY KEY (provider, day))"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def add(self, provider: str, day: str, units: int) -> None:
+        try:
+            self._conn().execute(
+                "INSERT INTO quota(provider, day, units) VALUES (?, ?, ?)"
+                " ON CONFLICT(provider, day) DO UPDATE SET units = units + excluded.units",
+                (provider, day, int(units)),
+            )
+        except sqlite3.Error:
+            pass
+
+    def used(self, provider: str, day: str) -> int:
+        try:
+            row = self._conn().execute(
+                "SELECT units FROM quota WHERE provider = ? AND day = ?", (provider, day)
+            ).fetchone()
+        except sqlite3.Error:
+            return 0
+        return int(row[0]) if row else 0
+
+
+# ---------------------------------------------------------------- por proveedor
+
+class ProviderLimiter:
+    """Ritmo + simultaneidad + cuota diaria de un proveedor."""
+
+    def __init__(self, name: str, rps: float, burst: float, concurrency: int, daily_quota: int,
+                 tz=timezone.utc, reserve: float = 0.05, ledger: Optional[QuotaLedger] = None,
+                 state_path: Optional[str] = None):
+        self.name = name
+        self.bucket = TokenBucket(rps, burst, state_path)
+        self.concurrency = int(concurrency)
+        self._sem = threading.BoundedSemaphore(self.concurrency) if self.concurrency > 0 else None
+        self.daily_quota = int(daily_quota)
+        self.reserve = float(reserve)
+        self.tz = tz
+        self.ledger = ledger
+        self.rejected = 0
+        self._reserved = 0          # unidades admitidas en este proceso y aún no anotadas
+        self._quota_lock = threading.Lock()
+
+    def day(self) -> str:
+        return datetime.now(self.tz).strftime("%Y-%m-%d")
+
+    def seconds_to_reset(self) -> float:
+        now = datetime.now(self.tz)
+        tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (tomorrow - now).total_seconds()
+
+    @property
+    def usable_quota(self) -> int:
+        """Cuota que la app se permite usar: el resto queda de reserva."""
+        return int(self.daily_quota * (1.0 - self.reserve))
+
+    def used_today(self) -> int:
+        return self.ledger.used(self.name, self.day()) if self.ledger and self.daily_quota else 0
+
+    def near_limit(self, cost: int = 1) -> bool:
+        return bool(self.daily_quota) and self.used_today() + self._reserved + cost > self.usable_quota
+
+    @contextmanager
+    def slot(self, cost: int = 1) -> Iterator[Callable[[], None]]:
+        """
+        Reserva la cuota y espera turno (ritmo y simultaneidad); lanza QuotaExceeded
+        sin esperar si no alcanza. Entrega `charge()`: llamarlo justo antes de salir
+        a la red anota el consumo; si no se llama, la reserva se devuelve.
+        """
+        if self.daily_quota:
+            with self._quota_lock:
+                if self.near_limit(cost):
+                    self.rejected += 1
+                    raise QuotaExceeded(self.name, self.seconds_to_reset())
+                self._reserved += cost
+        pending = [cost if self.daily_quota else 0]
+
+        def charge() -> None:
+            if pending[0]:
+                if self.ledger is not None:
+                    self.ledger.add(self.name, self.day(), pending[0])
+                with self._quota_lock:
+                    self._reserved -= pending[0]
+                pending[0] = 0
+
+        try:
+            self.bucket.acquire(1)
+            if self._sem is not None:
+                self._sem.acquire()
+            try:
+                yield charge
+            finally:
+                if self._sem is not None:
+                    self._sem.release()
+        finally:
+            if pending[0]:
+                with self._quota_lock:
+                    self._reserved -= pending[0]
+
+    def snapshot(self) -> Dict[str, Any]:
+        used = self.used_today()
+        return {
+            "used_today": used if self.daily_quota else None,
+            "daily_quota": self.daily_quota or None,
+            "remaining": max(0, self.usable_quota - used) if self.daily_quota else None,
+            "rps": self.bucket.rate,
+            "concurrency": self.concurrency,
+            "throttled_s": round(self.bucket.waited_s, 1),
+            "rejected": self.rejected,
+        }
+
+
+class _Unlimited:
+    """Proveedores sin configuración (imágenes, servidores locales): sin límites."""
+
+    @contextmanager
+    def slot(self, cost: int = 1) -> Iterator[Callable[[], None]]:
+        yield lambda: None
+
+
+_UNLIMITED = _Unlimited()
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+_ledger: Optional[QuotaLedger] = None
+
+
+def get_limiter(provider: str):
+    global _ledger
+    if provider not in PROVIDER_DEFAULTS:
+        return _UNLIMITED
+    with _limiters_lock:
+        lim = _limiters.get(provider)
+        if lim is None:
+            if _ledger is None:
+                _ledger = QuotaLedger(os.environ.get("CATALOGO_QUOTA_DB", DEFAULT_QUOTA_DB))
+            cfg = PROVIDER_DEFAULTS[provider]
+            host_wide = os.environ.get("CATALOGO_RATE_LIMIT_HOST_WIDE", "") not in ("", "0")
+            lim = _limiters[provider] = ProviderLimiter(
+                provider,
+                rps=_env(provider, "RPS", cfg["rps"]),
+                burst=_env(provider, "BURST", cfg["burst"]),
+                concurrency=int(_env(provider, "CONCURRENCY", cfg["concurrency"])),
+                daily_quota=int(_env(provider, "DAILY_QUOTA", cfg["daily_quota"])),
+                tz=cfg["tz"],
+                reserve=float(os.environ.get("CATALOGO_QUOTA_RESERVE", 0.05)),
+                ledger=_ledger,
+                state_path=os.path.join(CACHE_DIR, f"ratelimit_{provider}.json") if host_wide else None,
+            )
+        return lim
+
+
+def quota_states() -> Dict[str, Dict[str, Any]]:
+    return {p: get_limiter(p).snapshot() for p in PROVIDER_DEFAULTS}
+
+
+def quota_degraded() -> Dict[str, float]:
+    """{proveedor: segundos hasta el reinicio} de los que ya no tienen cuota utilizable."""
+    out = {}
+    for p in PROVIDER_DEFAULTS:
+        lim = get_limiter(p)
+        if lim.near_limit():
+            out[p] = lim.seconds_to_reset()
+    return out
+
+
+if __name__ == "__main__":
+    for name, snap in quota_states().items():
+        print(f"{PROVIDER_LABELS.get(name, name):8s} {snap}")
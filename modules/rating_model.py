@@ -0,0 +1,169 @@
+# modules/rating_model.py
+# Nota estimada para películas sin nota mía.
+#
+# Modelo lineal regularizado (ridge) sobre géneros, directores, década,
+# duración, IMDb Rating y Num Votes, ajustado con las películas que ya
+# tienen `Your Rating`. El espacio de features es fijo (hashing para
+# géneros/directores, escalas constantes para lo numérico), así que el
+# modelo se puede actualizar de forma incremental sumando/restando las
+# contribuciones (XᵀX, Xᵀy) de las notas nuevas o cambiadas.
+from __future__ import annotations
+
+import zlib
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+GENRE_DIMS = 128
+DIRECTOR_DIMS = 512
+DECADES = list(range(1900, 2040, 10))     # 1900s … 2030s
+MIN_RATED = 20                            # mínimo de notas para ajustar
+
+_N_NUM = 6  # runtime, imdb, votes + indicadores de faltante
+
+# columnas que entran en featurize(); si cambian, la película se vuelve a sumar
+FEATURE_COLUMNS = ("Genres", "Directors", "Year", "Runtime (mins)", "IMDb Rating", "Num Votes")
+
+
+def _bucket(token: str, dims: int) -> int:
+    return zlib.crc32(token.encode("utf-8")) % dims
+
+
+def film_keys(df: pd.DataFrame) -> pd.Series:
+    """Clave estable por película: Const si existe; si no, título normalizado + año."""
+    if "Const" in df.columns:
+        return df["Const"].astype(str)
+    title = df["Title"].astype(str).str.lower() if "Title" in df.columns else pd.Series("", index=df.index)
+    year = pd.to_numeric(df["Year"], errors="coerce").fillna(-1).astype(int).astype(str) if "Year" in df.columns else "-1"
+    return title + "|" + year
+
+
+def _hashed_block(X: np.ndarray, col: Optional[pd.Series], offset: int, dims: int, normalize: bool):
+    """Tokens separados por coma -> buckets hasheados (en bloque, sin recorrer filas)."""
+    if col is None or len(col) == 0:
+        return
+    lists = col.fillna("").astype(str).str.split(",")
+    rows = np.repeat(np.arange(len(col)), lists.str.len().to_numpy())
+    flat = lists.explode().str.strip()
+    valid = (flat.notna() & (flat != "")).to_numpy()
+    if not valid.any():
+        return
+    codes, uniques = pd.factorize(flat[valid])
+    buckets = np.array([_bucket(u, dims) for u in uniques], dtype=np.int64)[codes]
+    rows = rows[valid]
+    if normalize:
+        vals = 1.0 / np.sqrt(np.bincount(rows, minlength=len(col))[rows])
+    else:
+        vals = 1.0
+    X[rows, offset + buckets] = vals
+
+
+def feature_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash por fila de las columnas de FEATURE_COLUMNS (detecta ediciones sin featurizar)."""
+    cols = [c for c in FEATURE_COLUMNS if c in df.columns]
+    if not cols:
+        return np.zeros(len(df), dtype=np.uint64)
+    return pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+
+
+def featurize(df: pd.DataFrame) -> np.ndarray:
+    """Matriz de features (n, d) con escala fija (no depende del catálogo)."""
+    n = len(df)
+    d = 1 + GENRE_DIMS + DIRECTOR_DIMS + len(DECADES) + _N_NUM
+    X = np.zeros((n, d))
+    X[:, 0] = 1.0
+    off_g, off_d = 1, 1 + GENRE_DIMS
+    off_dec = off_d + DIRECTOR_DIMS
+    off_num = off_dec + len(DECADES)
+
+    _hashed_block(X, df["Genres"] if "Genres" in df.columns else None, off_g, GENRE_DIMS, normalize=True)
+    _hashed_block(X, df["Directors"] if "Directors" in df.columns else None, off_d, DIRECTOR_DIMS, normalize=False)
+
+    def num(col):
+        return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float) if col in df.columns else np.full(n, np.nan)
+
+    year = num("Year")
+    dec = np.clip((np.nan_to_num(year, nan=DECADES[0]) - DECADES[0]) // 10, 0, len(DECADES) - 1).astype(int)
+    X[np.arange(n), off_dec + dec] = np.where(np.isnan(year), 0.0, 1.0)
+
+    runtime, imdb, votes = num("Runtime (mins)"), num("IMDb Rating"), num("Num Votes")
+    X[:, off_num + 0] = np.nan_to_num((runtime - 110.0) / 30.0)
+    X[:, off_num + 1] = np.nan_to_num(imdb - 6.5)
+    X[:, off_num + 2] = np.nan_to_num((np.log1p(votes) - 10.0) / 2.0)
+    X[:, off_num + 3] = np.isnan(runtime)
+    X[:, off_num + 4] = np.isnan(imdb)
+    X[:, off_num + 5] = np.isnan(votes)
+    return X
+
+
+class RatingModel:
+    """Ridge incremental: mantiene XᵀX, Xᵀy y la contribución (x, y, hash) de cada película con nota."""
+
+    def __init__(self, alpha: float = 3.0):
+        self.alpha = float(alpha)
+        d = 1 + GENRE_DIMS + DIRECTOR_DIMS + len(DECADES) + _N_NUM
+        self._xtx = np.zeros((d, d))
+        self._xty = np.zeros(d)
+        self._rated: Dict[str, Tuple[np.ndarray, float, int]] = {}
+        self.coef: Optional[np.ndarray] = None
+        self.catalog_key: Optional[str] = None
+
+    @property
+    def n_rated(self) -> int:
+        return len(self._rated)
+
+    def _solve(self):
+        if self.n_rated < MIN_RATED:
+            self.coef = None
+            return
+        reg = self.alpha * np.eye(len(self._xty))
+        reg[0, 0] = 0.0  # sin regularizar el intercepto
+        self.coef = np.linalg.solve(self._xtx + reg, self._xty)
+
+    def sync(self, df: pd.DataFrame, catalog_key: Optional[str] = None) -> int:
+        """
+        Actualiza el modelo con las notas actuales del catálogo. Sólo se suman/restan
+        las películas cuya nota es nueva, cambió o desapareció, o cuyas columnas de
+        features se editaron. Devuelve cuántas cambiaron.
+        """
+        if catalog_key is not None and catalog_key == self.catalog_key:
+            return 0
+        ratings = pd.to_numeric(df["Your Rating"], errors="coerce") if "Your Rating" in df.columns else pd.Series(np.nan, index=df.index)
+        keys = film_keys(df)
+        rated = ratings.notna().to_numpy()
+        hashes = feature_hashes(df)
+        current = dict(zip(keys[rated], zip(ratings[rated].astype(float), hashes[rated].tolist())))
+
+        removed = [k for k, (_, y, h) in self._rated.items() if current.get(k) != (y, h)]
+        for k in removed:
+            x, y, _ = self._rated.pop(k)
+            self._xtx -= np.outer(x, x)
+            self._xty -= x * y
+
+        add_mask = rated & ~keys.isin(self._rated).to_numpy() & ~keys.duplicated(keep="last").to_numpy()
+        if add_mask.any():
+            X = featurize(df[add_mask])
+            y = ratings[add_mask].to_numpy(dtype=float)
+            self._xtx += X.T @ X
+            self._xty += X.T @ y
+            for k, x, yy, h in zip(keys[add_mask], X, y, hashes[add_mask].tolist()):
+                self._rated[k] = (x, yy, h)
+
+        changed = len(removed) + int(add_mask.sum())
+        if changed:
+            self._solve()
+        self.catalog_key = catalog_key
+        return changed
+
+    def predict(self, df: pd.DataFrame, chunk_size: int = 20000) -> pd.Series:
+        """Nota estimada para las películas sin nota (NaN para las que ya tienen)."""
+        out = pd.Series(np.nan, index=df.index, name="Predicted Rating")
+        if self.coef is None or df.empty:
+            return out
+        unrated = pd.to_numeric(df["Your Rating"], errors="coerce").isna() if "Your Rating" in df.columns else pd.Series(True, index=df.index)
+        todo = df[unrated]
+        preds = [featurize(todo.iloc[i:i + chunk_size]) @ self.coef for i in range(0, len(todo), chunk_size)]
+        if preds:
+            out[unrated] = np.clip(np.concatenate(preds), 1.0, 10.0).round(2)
+        return out
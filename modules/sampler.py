@@ -0,0 +1,167 @@
+# modules/sampler.py
+# Sorteo de "¿Qué ver hoy?" en O(1) por clic.
+#
+# Cada definición de pool (todas / favoritas / 8–10 de los últimos 20 años /
+# pendientes con IMDb ≥ x) se resuelve UNA vez a un arreglo de posiciones del
+# catálogo + una tabla de alias (método de Vose) con sus pesos. Cada sorteo
+# cuesta O(1) y devuelve una posición: la fila se lee con df.iloc[pos], sin
+# copiar ni filtrar el DataFrame. El historial por sesión evita repetir
+# sugerencias hasta agotar el pool.
+from __future__ import annotations
+
+import random
+from collections import deque
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+POOL_ALL = "all"
+POOL_FAVOURITES = "favourites"          # nota ≥ 9
+POOL_RECENT_TOP = "recent_8_10"         # nota 8–10 de los últimos 20 años
+POOL_UNRATED = "unrated"                # sin nota mía (y IMDb ≥ x)
+
+
+class AliasTable:
+    """Tabla de alias de Vose: construcción O(n), muestreo O(1)."""
+
+    __slots__ = ("n", "_prob", "_alias")
+
+    def __init__(self, weights: Sequence[float]):
+        w = np.asarray(weights, dtype=float)
+        n = len(w)
+        self.n = n
+        if n == 0:
+            self._prob, self._alias = [], []
+            return
+        w = np.where(np.isfinite(w) & (w > 0), w, 0.0)
+        total = w.sum()
+        scaled = w * n / total if total > 0 else np.ones(n)
+
+        prob = np.ones(n)
+        alias = np.arange(n)
+        small = list(np.flatnonzero(scaled < 1.0))
+        large = list(np.flatnonzero(scaled >= 1.0))
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # listas de Python: el acceso escalar es más rápido que en arrays NumPy
+        self._prob = prob.tolist()
+        self._alias = alias.tolist()
+
+    def sample(self, rng: random.Random = random) -> int:
+        i = int(rng.random() * self.n)
+        return i if rng.random() < self._prob[i] else self._alias[i]
+
+
+class PickHistory:
+    """
+    Historial de sugerencias de una sesión para un pool (sin repetir hasta
+    agotarlo). Guarda a lo sumo `maxlen` posiciones: en pools grandes sólo se
+    evita repetir las últimas `maxlen` sugerencias.
+    """
+
+    def __init__(self, maxlen: int = 500):
+        self.recent: deque = deque(maxlen=maxlen)
+        self.seen = set()
+
+    def __len__(self):
+        return len(self.seen)
+
+    def __contains__(self, pos) -> bool:
+        return pos in self.seen
+
+    def add(self, pos) -> None:
+        if pos in self.seen:
+            return
+        if len(self.recent) == self.recent.maxlen:
+            self.seen.discard(self.recent[0])
+        self.recent.append(pos)
+        self.seen.add(pos)
+
+    def reset(self):
+        self.recent.clear()
+        self.seen.clear()
+
+
+class PoolSampler:
+    """Pool precomputado: posiciones en el catálogo + tabla de alias de sus pesos."""
+
+    def __init__(self, positions: np.ndarray, weights: Optional[np.ndarray] = None):
+        self.positions = np.asarray(positions, dtype=np.int64).tolist()
+        self.table = AliasTable(np.ones(len(self.positions)) if weights is None else weights)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def pick(self, history: Optional[PickHistory] = None, rng: random.Random = random,
+             max_tries: int = 24) -> Optional[int]:
+        """
+        Devuelve una posición del catálogo (o None si el pool está vacío).
+        Con `history`, se rechazan las ya sugeridas; si el pool se agotó (o hay
+        demasiados rechazos seguidos) el historial se reinicia, así el costo sigue acotado.
+        """
+        if not self.positions:
+            return None
+        if history is None:
+            return self.positions[self.table.sample(rng)]
+        if len(history) >= len(self.positions):
+            history.reset()
+        for _ in range(max_tries):
+            pos = self.positions[self.table.sample(rng)]
+            if pos not in history:
+                history.add(pos)
+                return pos
+        history.reset()
+        pos = self.positions[self.table.sample(rng)]
+        history.add(pos)
+        return pos
+
+
+def pool_mask(df: pd.DataFrame, definition: str, min_imdb: float = 0.0,
+              now_year: Optional[int] = None) -> np.ndarray:
+    """Máscara booleana (sin copiar el catálogo) para una definición de pool."""
+    n = len(df)
+    my = pd.to_numeric(df["Your Rating"], errors="coerce") if "Your Rating" in df.columns else pd.Series(np.nan, index=df.index)
+    year = pd.to_numeric(df["Year"], errors="coerce") if "Year" in df.columns else pd.Series(np.nan, index=df.index)
+    imdb = pd.to_numeric(df["IMDb Rating"], errors="coerce") if "IMDb Rating" in df.columns else pd.Series(np.nan, index=df.index)
+
+    if definition == POOL_ALL:
+        mask = np.ones(n, dtype=bool)
+    elif definition == POOL_FAVOURITES:
+        mask = (my >= 9).to_numpy()
+    elif definition == POOL_RECENT_TOP:
+        now_year = now_year or pd.Timestamp.now().year
+        mask = ((my >= 8) & (year >= now_year - 20)).to_numpy()
+    elif definition == POOL_UNRATED:
+        mask = my.isna().to_numpy()
+    else:
+        raise ValueError(f"Definición de pool desconocida: {definition}")
+
+    if min_imdb:
+        mask &= (imdb.isna() | (imdb >= float(min_imdb))).to_numpy()
+    return mask
+
+
+def rating_weights(df: pd.DataFrame, positions: np.ndarray) -> Optional[np.ndarray]:
+    """Pesos por mi nota (nota + 1); None si el pool no tiene notas (sorteo uniforme)."""
+    if "Your Rating" not in df.columns or len(positions) == 0:
+        return None
+    my = pd.to_numeric(df["Your Rating"], errors="coerce").to_numpy(dtype=float)[positions]
+    if np.isnan(my).all():
+        return None
+    return np.nan_to_num(my, nan=0.0) + 1.0
+
+
+def build_pool_sampler(df: pd.DataFrame, definition: str, min_imdb: float = 0.0,
+                       weighted: bool = True, within: Optional[np.ndarray] = None) -> PoolSampler:
+    """Pool de una definición; `within` (máscara booleana) lo restringe a un subconjunto."""
+    mask = pool_mask(df, definition, min_imdb=min_imdb)
+    if within is not None:
+        mask &= within
+    positions = np.flatnonzero(mask)
+    weights = rating_weights(df, positions) if weighted else None
+    return PoolSampler(positions, weights)
@@ -0,0 +1,93 @@
+# modules/single_flight.py
+# Coalescencia de llamadas idénticas concurrentes ("single flight").
+#
+# Si varias sesiones piden lo mismo a la vez (el mismo año de los Oscar, la
+# misma página de la galería), todas fallan la caché al mismo tiempo. Con esto
+# sólo la primera va a la red; las demás esperan esa llamada en vuelo y se
+# quedan con su resultado (o con su excepción). No es una caché: terminada la
+# llamada, la clave se libera.
+#
+# `python -m modules.single_flight` muestra 20 hilos pidiendo la misma clave.
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Una llamada en vuelo por clave; las concurrentes esperan y comparten el resultado."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.leaders = 0        # llamadas que efectivamente se ejecutaron
+        self.coalesced = 0      # llamadas que esperaron a otra idéntica
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(resultado, compartido). compartido=True si se reutilizó una llamada ya en vuelo."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Demo de coalescencia de llamadas idénticas.")
+    ap.add_argument("--threads", type=int, default=20)
+    ap.add_argument("--latency", type=float, default=0.3, help="segundos de la llamada simulada")
+    args = ap.parse_args()
+
+    flight = SingleFlight()
+    executed = []
+
+    def slow_lookup():
+        executed.append(1)
+        time.sleep(args.latency)
+        return {"id": 603, "title": "The Matrix"}
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(lambda _: flight.do("tmdb_search?query=the matrix", slow_lookup),
+                                range(args.threads)))
+    print(f"{args.threads} pedidos en {time.perf_counter() - t0:.2f} s, "
+          f"{len(executed)} llamada(s) reales, {sum(shared for _, shared in results)} coalescidos")
+    print(flight.stats())
@@ -5,7 +5,8 @@ from typing import Optional, Dict, Any
 
 import pandas as pd
 import streamlit as st
-import requests
+
+from modules.http_client import get_client
 
 APP_VERSION = "v2.1.3"
 
@@ -215,7 +216,7 @@ def get_tmdb_basic_info(title: str, year=None) -> Optional[Dict[str, Any]]:
     y = _coerce_year_for_tmdb(year)
     if y is not None: params["year"] = y
     try:
-        r = requests.get(TMDB_SEARCH_URL, params=params, timeout=4)
+        r = get_client().get(TMDB_SEARCH_URL, params=params, timeout=4)
         if r.status_code != 200: return None
         res = (r.json() or {}).get("results", [])
         if not res: return None
@@ -233,7 +234,7 @@ def get_tmdb_providers(tmdb_id: int, country: str = "CL") -> Optional[Dict[str,
     if TMDB_API_KEY is None or not tmdb_id: return None
     try:
         url = f"https://api.themoviedb.org/3/movie/{tmdb_id}/watch/providers"
-        r = requests.get(url, params={"api_key": TMDB_API_KEY}, timeout=4)
+        r = get_client().get(url, params={"api_key": TMDB_API_KEY}, timeout=4)
         if r.status_code != 200: return None
         results = (r.json() or {}).get("results", {})
         cdata = results.get(country.upper())
@@ -0,0 +1,161 @@
+# tests/test_api_cache.py
+from __future__ import annotations
+
+import pytest
+
+from modules import api_cache
+from modules.api_cache import (
+    NOT_FOUND, OK, TRANSIENT, TRANSIENT_TTL, TTL_BY_KIND, ResponseCache, make_key,
+)
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(api_cache.time, "time", c)
+    return c
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "api_cache.sqlite3"))
+
+
+def test_make_key_drops_secrets_and_sorts_params():
+    a = make_key("https://x/search", {"query": " Heat ", "api_key": "secret", "year": 1995})
+    b = make_key("https://x/search", {"year": 1995, "query": "heat", "apikey": "other"})
+    assert a == b
+    assert "secret" not in a
+
+
+def test_get_returns_payload_until_kind_ttl_expires(cache, clock):
+    cache.set("k", "tmdb_providers", {"results": [1]})
+    assert cache.get("k") == (OK, {"results": [1]})
+
+    clock.now += TTL_BY_KIND["tmdb_providers"] - 1
+    assert cache.get("k") == (OK, {"results": [1]})
+
+    clock.now += 2
+    assert cache.get("k") == (None, None)
+
+
+def test_explicit_ttl_overrides_kind(cache, clock):
+    cache.set("k", "omdb", {"Response": "True"}, ttl=10)
+    clock.now += 11
+    assert cache.get("k") == (None, None)
+
+
+def test_transient_entries_use_the_short_ttl(cache, clock):
+    cache.set("k", "omdb", None, status=TRANSIENT)
+    assert cache.get("k") == (TRANSIENT, None)
+
+    clock.now += TRANSIENT_TTL + 1
+    assert cache.get("k") == (None, None)
+
+
+def test_not_found_is_cached_with_the_normal_ttl(cache, clock):
+    cache.set("k", "omdb", {"Response": "False", "Error": "Movie not found!"}, status=NOT_FOUND)
+    clock.now += TRANSIENT_TTL + 1
+    status, payload = cache.get("k")
+    assert status == NOT_FOUND
+    assert payload["Error"] == "Movie not found!"
+
+
+def test_get_stale_serves_only_expired_ok_payloads(cache, clock):
+    cache.set("ok", "tmdb_search", {"id": 1}, ttl=1)
+    cache.set("nf", "tmdb_search", None, ttl=1, status=NOT_FOUND)
+    clock.now += 5
+    assert cache.get("ok") == (None, None)
+    assert cache.get_stale("ok") == {"id": 1}
+    assert cache.get_stale("nf") is None
+
+
+def test_set_replaces_previous_entry(cache):
+    cache.set("k", "omdb", None, status=TRANSIENT)
+    cache.set("k", "omdb", {"Response": "True"})
+    assert cache.get("k") == (OK, {"Response": "True"})
+
+
+def test_id_map_never_expires_and_is_scoped_by_source(cache, clock):
+    cache.set_mapping("imdb_to_tmdb", "tt0113277", 949)
+    clock.now += 10 * 365 * 24 * 3600
+    assert cache.get_mapping("imdb_to_tmdb", "tt0113277") == "949"
+    assert cache.get_mapping("trailer", "tt0113277") is None
+
+    cache.set_mapping("imdb_to_tmdb", "tt0113277", 950)
+    assert cache.get_mapping("imdb_to_tmdb", "tt0113277") == "950"
+
+
+def test_compact_and_stats(cache, clock):
+    cache.set("a", "omdb", {"x": 1}, ttl=1)
+    cache.set("b", "omdb", None, status=NOT_FOUND)
+    cache.set("c", "tmdb_search", {"y": 2})
+    clock.now += 2
+
+    stats = cache.stats()
+    assert stats["omdb"]["entries"] == 2
+    assert stats["omdb"]["live"] == 1
+    assert stats["omdb"]["not_found"] == 1
+
+    assert cache.compact() == 1
+    assert cache.stats()["omdb"]["entries"] == 1
+
+
+def test_cache_survives_reopening(tmp_path):
+    path = str(tmp_path / "api_cache.sqlite3")
+    ResponseCache(path).set("k", "omdb", {"Response": "True"})
+    ResponseCache(path).set_mapping("imdb_to_tmdb", "tt1", 1)
+    reopened = ResponseCache(path)
+    assert reopened.get("k") == (OK, {"Response": "True"})
+    assert reopened.get_mapping("imdb_to_tmdb", "tt1") == "1"
+
+
+@pytest.fixture
+def network(monkeypatch, cache):
+    """Caché del proceso -> `cache`; la "red" (_fetch) responde desde un dict y cuenta llamadas."""
+    monkeypatch.setattr(api_cache, "_cache", cache)
+    responses, calls = {}, []
+
+    def fake_fetch(kind, key, url, params, timeout, classify):
+        calls.append(url)
+        data = responses[url]
+        cache.set(key, kind, data)
+        return OK, data, None
+
+    monkeypatch.setattr(api_cache, "_fetch", fake_fetch)
+    return responses, calls
+
+
+def test_fresh_flag_is_true_only_for_network_responses(network):
+    responses, calls = network
+    responses["https://x/movie/1"] = {"id": 1}
+    assert api_cache.cached_get_json_fresh("tmdb_details", "https://x/movie/1") == ({"id": 1}, True)
+    assert api_cache.cached_get_json_fresh("tmdb_details", "https://x/movie/1") == ({"id": 1}, False)
+    assert api_cache.cached_get_json("tmdb_details", "https://x/movie/1") == {"id": 1}
+    assert len(calls) == 1
+
+
+def test_details_fan_out_only_from_the_network(network, cache, clock):
+    from modules import external_apis as ea
+
+    responses, calls = network
+    url = ea.TMDB_MOVIE_URL_TEMPLATE.format(movie_id=949)
+    providers_key = make_key(ea.TMDB_PROVIDERS_URL_TEMPLATE.format(movie_id=949), {})
+    responses[url] = {"id": 949, "watch/providers": {"results": {"CL": {}}}, "similar": {"results": []}}
+
+    ea.tmdb_details(949, "key")
+    assert cache.get(providers_key)[0] == OK
+
+    # la ficha (7 días) sigue en disco; los proveedores (1 día) vencen igual
+    clock.now += TTL_BY_KIND["tmdb_providers"] + 1
+    ea.tmdb_details(949, "key")
+    assert len(calls) == 1
+    assert cache.get(providers_key) == (None, None)
@@ -0,0 +1,91 @@
+# tests/test_awards_parser.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.awards_parser import EMPTY_AWARDS, parse_awards_series, parse_awards_text, synthetic_awards
+
+SAMPLES = [
+    "Won 11 Oscars. 126 wins & 79 nominations total",
+    "Won 1 Oscar. 10 wins & 20 nominations total",
+    "Nominated for 7 Oscars. 32 wins & 98 nominations total",
+    "Won 3 BAFTA Awards. 20 wins & 45 nominations total",
+    "Won 2 BAFTA Film Awards13 wins & 40 nominations total",
+    "Nominated for 1 BAFTA Award5 wins & 12 nominations total",
+    "Won 4 Golden Globes. 30 wins & 60 nominations total",
+    "Nominated for 1 Golden Globe. 3 wins & 9 nominations total",
+    "Won 5 Primetime Emmys. 40 wins & 100 nominations total",
+    "Won Palme d'Or. 12 wins & 30 nominations total",
+    "Won Palme d’Or. 1 win total",
+    "1 win total",
+    "2 nominations total",
+    "N/A",
+    "",
+    None,
+    np.nan,
+]
+
+
+def test_text_parser_known_values():
+    got = parse_awards_text("Won 11 Oscars. 126 wins & 79 nominations total")
+    assert got["oscars"] == 11
+    assert got["total_wins"] == 126
+    assert got["total_nominations"] == 79
+    assert got["palme_dor"] is False
+    assert list(got) == list(EMPTY_AWARDS)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Won 3 BAFTA Awards. 20 wins & 45 nominations total", 3),
+    ("Won 2 BAFTA Film Awards13 wins & 40 nominations total", 2),
+    # mencionado sin conteo: cuenta como 1 (igual que antes del parser vectorizado)
+    ("Nominated for 1 BAFTA Award5 wins & 12 nominations total", 1),
+    ("Won 1 Oscar. 10 wins & 20 nominations total", 0),
+])
+def test_bafta_count_is_the_captured_number(text, expected):
+    # antes: baftas = int(match), no el número capturado
+    assert parse_awards_text(text)["baftas"] == expected
+
+
+@pytest.mark.parametrize("text", ["N/A", "", None, np.nan, 42])
+def test_missing_text_gives_empty_awards(text):
+    assert parse_awards_text(text) == EMPTY_AWARDS
+
+
+def _rowwise(texts: pd.Series) -> pd.DataFrame:
+    return pd.DataFrame([parse_awards_text(t) for t in texts], index=texts.index)
+
+
+def _assert_same(texts: pd.Series):
+    rowwise = _rowwise(texts)
+    vectorized = parse_awards_series(texts)
+    assert list(vectorized.columns) == list(EMPTY_AWARDS)
+    assert vectorized.index.equals(texts.index)
+    pd.testing.assert_frame_equal(
+        vectorized.drop(columns="raw"), rowwise.drop(columns="raw"), check_dtype=False
+    )
+    # raw: el texto original, o None si no había
+    assert vectorized["raw"].tolist() == [r if isinstance(r, str) else None for r in rowwise["raw"]]
+
+
+def test_series_matches_text_parser_on_samples():
+    _assert_same(pd.Series(SAMPLES, index=range(100, 100 + len(SAMPLES))))
+
+
+def test_series_matches_text_parser_on_synthetic_corpus():
+    _assert_same(synthetic_awards(5000, seed=3))
+
+
+def test_series_resolves_repeated_texts_once_per_row():
+    texts = pd.Series(["Won 2 Oscars. 5 wins & 7 nominations total"] * 3 + ["N/A"], index=list("abcd"))
+    out = parse_awards_series(texts)
+    assert out.loc[["a", "b", "c"], "oscars"].tolist() == [2, 2, 2]
+    assert out.loc["d"].drop("raw").eq(pd.Series(EMPTY_AWARDS).drop("raw")).all()
+
+
+def test_empty_series():
+    out = parse_awards_series(pd.Series([], dtype=object))
+    assert out.empty
+    assert list(out.columns) == list(EMPTY_AWARDS)
@@ -0,0 +1,132 @@
+# tests/test_collab_filter.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.collab_filter import FilmClubModel, export_fingerprint
+
+
+def _export(consts, ratings) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Const": list(consts),
+        "Your Rating": list(ratings),
+        "Title": [f"Film {c}" for c in consts],
+        "Year": [2000] * len(consts),
+    })
+
+
+@pytest.fixture
+def club():
+    """12 miembros y 40 películas con gustos de rango 2 (+ ruido); cada uno ve ~60%."""
+    rng = np.random.default_rng(1)
+    taste = rng.normal(0, 1, (12, 2))
+    style = rng.normal(0, 1, (40, 2))
+    true = np.clip(6 + 1.5 * taste @ style.T + rng.normal(0, 0.3, (12, 40)), 1, 10).round()
+    seen = rng.random((12, 40)) < 0.6
+    consts = np.array([f"tt{i:07d}" for i in range(40)])
+    exports = {f"u{u}": _export(consts[seen[u]], true[u, seen[u]]) for u in range(12)}
+    return exports, true, seen, consts
+
+
+def _model(exports, **kw) -> FilmClubModel:
+    model = FilmClubModel(factors=4, **kw)
+    for user, df in exports.items():
+        model.upsert_user(user, df)
+    return model
+
+
+def _train_rmse(model: FilmClubModel, exports, users=None) -> float:
+    err = []
+    for user in users or exports:
+        df = exports[user]
+        err.append(model.predict(user, df["Const"]) - df["Your Rating"].to_numpy(dtype=float))
+    return float(np.sqrt(np.mean(np.concatenate(err) ** 2)))
+
+
+def test_fit_learns_the_club_ratings(club):
+    exports, true, seen, consts = club
+    model = _model(exports)
+    baseline = _train_rmse(model, exports)          # factores aleatorios, sin sesgos
+    model.fit()
+    assert model.fitted
+    assert model.n_users == 12 and model.n_films == 40
+    assert _train_rmse(model, exports) < min(0.6, baseline / 3)
+    # y generaliza a lo no visto mejor que la media global
+    held = ~seen
+    pred = np.vstack([model.predict(f"u{u}", consts) for u in range(12)])
+    assert np.sqrt(np.mean((pred[held] - true[held]) ** 2)) < np.std(true[held])
+
+
+def test_upsert_is_a_no_op_for_the_same_export(club):
+    exports, *_ = club
+    model = _model(exports)
+    assert not model.upsert_user("u0", exports["u0"])
+    assert model.fingerprints["u0"] == export_fingerprint(exports["u0"])
+
+
+def test_recommend_excludes_seen_films_and_ranks_by_score(club):
+    exports, *_ = club
+    model = _model(exports).fit()
+    recs = model.recommend(top_n=5)
+    for user, group in recs.groupby("User"):
+        assert not set(group["Const"]) & set(exports[user]["Const"])
+        assert group["Rank"].tolist() == list(range(1, len(group) + 1))
+        assert group["Predicted"].is_monotonic_decreasing
+    top = recs[recs["User"] == "u0"]
+    unseen = sorted(set(model.films["Const"]) - set(exports["u0"]["Const"]))
+    scores = dict(zip(unseen, model.predict("u0", unseen)))
+    assert top["Predicted"].iloc[0] == pytest.approx(max(scores.values()))
+
+
+def test_recommend_with_nothing_left_to_suggest():
+    model = FilmClubModel(factors=2)
+    model.upsert_user("a", _export(["tt1", "tt2"], [5, 6]))
+    model.upsert_user("b", _export(["xx1"], [7]))   # sin Const válidos: no ve nada
+    model.fit()
+    assert model.recommend(["a"]).empty             # ya vio todo el catálogo
+    assert model.recommend(["b"], top_n=10)["Const"].tolist() in (["tt1", "tt2"], ["tt2", "tt1"])
+    assert model.recommend(["a"], top_n=0).empty
+
+
+def test_remove_user_drops_ratings_and_orphan_films(club):
+    exports, *_ = club
+    model = _model(exports)
+    solo = _export(["tt9999999"], [10])
+    model.upsert_user("solo", pd.concat([exports["u3"], solo], ignore_index=True))
+    model.fit()
+    assert model.n_films == 41
+
+    assert model.remove_user("solo")
+    assert not model.remove_user("solo")
+    assert model.n_users == 12 and "solo" not in model.users
+    assert model.n_films == 40 and "tt9999999" not in set(model.films["Const"])
+    assert model.U.shape == (12, 4) and model.V.shape == (40, 4)
+    assert len(model.user_bias) == 12 and len(model.item_bias) == 40
+    # las tripletas restantes siguen apuntando a las películas correctas
+    for user in ("u0", "u11"):
+        mine = model._i[model._u == model.users.index(user)]
+        assert set(model.films["Const"].iloc[mine]) == set(exports[user]["Const"])
+
+    model.remove_user("u5")
+    model.fit()
+    assert "u5" not in set(model.recommend()["User"])
+
+
+def test_refit_user_only_moves_the_reuploaded_member(club):
+    exports, *_ = club
+    model = _model(exports).fit()
+    other_before = model.U[model.users.index("u1")].copy()
+
+    changed = exports["u0"].copy()
+    changed["Your Rating"] = 11 - changed["Your Rating"]        # gustos invertidos
+    assert model.upsert_user("u0", changed)
+    stale = _train_rmse(model, {"u0": changed})
+    model.refit_user("u0")
+
+    assert _train_rmse(model, {"u0": changed}) < stale / 2
+    np.testing.assert_array_equal(model.U[model.users.index("u1")], other_before)
+    # y queda cerca de un ajuste completo desde cero
+    full = _model({**exports, "u0": changed}).fit()
+    assert _train_rmse(model, {"u0": changed}) < _train_rmse(full, {"u0": changed}) + 0.5
@@ -0,0 +1,137 @@
+# tests/test_poster_cache.py
+from __future__ import annotations
+
+import io
+import os
+
+import pytest
+
+from modules import poster_cache
+from modules.poster_cache import PosterCache
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _jpeg(width: int = 342, height: int = 513) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(out, "JPEG")
+    return out.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+
+class FakeClient:
+    """Sirve un JPEG por URL conocida y cuenta las descargas."""
+
+    def __init__(self, posters):
+        self.posters = posters
+        self.calls = []
+
+    def get(self, url, timeout=None):
+        self.calls.append(url)
+        if url not in self.posters:
+            return FakeResponse(404, b"")
+        return FakeResponse(200, self.posters[url])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    c = FakeClient({f"https://img/p{i}.jpg": _jpeg() for i in range(4)})
+    monkeypatch.setattr(poster_cache, "get_client", lambda: c)
+    return c
+
+
+@pytest.fixture
+def pc(tmp_path, client):
+    return PosterCache(str(tmp_path / "posters"), max_bytes=10 * 1024 * 1024)
+
+
+def _write(root, name: str, size: int, mtime: float) -> None:
+    path = os.path.join(root, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_thumbnail_downloads_once_and_resizes(pc, client):
+    name = pc.thumbnail("https://img/p0.jpg", 160)
+    assert name == f"{pc.key('https://img/p0.jpg')}_160.{pc.ext}"
+    with Image.open(os.path.join(pc.root, name)) as img:
+        assert img.width == 160
+        assert img.height == round(513 * 160 / 342)
+
+    assert pc.thumbnail("https://img/p0.jpg", 240) is not None
+    assert pc.thumbnail("https://img/p0.jpg", 160) == name
+    assert client.calls == ["https://img/p0.jpg"]     # el original se reutiliza
+    assert pc.hits == 1
+    assert pc.stats()["files"] == 3                    # original + dos miniaturas
+    assert pc._key_locks == {}
+
+
+def test_thumbnail_returns_none_when_the_download_fails(pc, client):
+    assert pc.thumbnail("https://img/missing.jpg", 160) is None
+    assert pc.thumbnail("", 160) is None
+    assert pc.stats()["files"] == 0
+    assert pc._key_locks == {}
+
+
+def test_file_deleted_behind_the_index_is_regenerated(pc, client):
+    name = pc.thumbnail("https://img/p0.jpg", 160)
+    os.remove(os.path.join(pc.root, name))
+    os.remove(os.path.join(pc.root, f"{pc.key('https://img/p0.jpg')}.jpg"))
+
+    assert pc.thumbnail("https://img/p0.jpg", 160) == name
+    assert os.path.exists(os.path.join(pc.root, name))
+    assert len(client.calls) == 2
+    assert pc.total_bytes == sum(os.path.getsize(os.path.join(pc.root, n)) for n in os.listdir(pc.root))
+
+
+def test_scan_orders_existing_files_by_mtime(tmp_path, client):
+    root = tmp_path / "posters"
+    root.mkdir()
+    _write(root, "b.jpg", 10, 2000)
+    _write(root, "a.jpg", 20, 1000)
+    _write(root, "c.jpg.123.tmp", 30, 500)             # restos de una escritura cortada
+
+    pc = PosterCache(str(root), max_bytes=1000)
+    assert list(pc._files) == ["a.jpg", "b.jpg"]
+    assert pc.total_bytes == 30
+
+
+def test_prune_evicts_least_recently_used_first(tmp_path, client):
+    root = tmp_path / "posters"
+    root.mkdir()
+    for i, name in enumerate(["a.jpg", "b.jpg", "c.jpg"]):
+        _write(root, name, 100, 1000 + i)
+    pc = PosterCache(str(root), max_bytes=1000)
+
+    pc._hit("a.jpg")                                   # "a" pasa a ser el más reciente
+
+    assert pc.prune(200) == 1
+    assert sorted(os.listdir(root)) == ["a.jpg", "c.jpg"]
+    assert pc.total_bytes == 200
+    assert pc.evictions == 1
+    assert os.path.getmtime(root / "a.jpg") > os.path.getmtime(root / "c.jpg")   # el acierto lo tocó
+
+
+def test_adding_past_the_cap_evicts_old_files(tmp_path, client):
+    root = tmp_path / "posters"
+    root.mkdir()
+    _write(root, "old.jpg", 5000, 1000)
+    pc = PosterCache(str(root), max_bytes=len(_jpeg()) + 4000)
+
+    assert pc.thumbnail("https://img/p1.jpg", 160) is not None
+    assert "old.jpg" not in os.listdir(root)
+    assert pc.total_bytes <= pc.max_bytes
+
+
+def test_clear_removes_everything(pc):
+    pc.thumbnail("https://img/p0.jpg", 160)
+    pc.thumbnail("https://img/p1.jpg", 160)
+    assert pc.clear() == 4
+    assert os.listdir(pc.root) == []
+    assert pc.stats()["bytes"] == 0
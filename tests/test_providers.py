@@ -0,0 +1,165 @@
+# tests/test_providers.py
+from __future__ import annotations
+
+import pickle
+
+import numpy as np
+import pytest
+
+from modules import providers
+from modules.providers import PROVIDER_KINDS, CompactProviders, ProviderIndex, _Registry
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """Registro nuevo por test (el real es global al proceso)."""
+    reg = _Registry()
+    monkeypatch.setattr(providers, "REGISTRY", reg)
+    return reg
+
+
+PAYLOAD = {
+    "id": 550,
+    "results": {
+        "CL": {
+            "link": "https://www.themoviedb.org/movie/550/watch?locale=CL",
+            "flatrate": [{"provider_id": 8, "provider_name": "Netflix"},
+                         {"provider_id": 337, "provider_name": "Disney Plus"}],
+            "rent": [{"provider_id": 2, "provider_name": "Apple TV"}],
+            "buy": [{"provider_id": 2, "provider_name": "Apple TV"}],
+        },
+        "us": {
+            "flatrate": [{"provider_id": 8, "provider_name": "Netflix"}],
+            "ads": [{"provider_id": 300, "provider_name": "Pluto TV"},
+                    {"provider_id": None, "provider_name": "Sin id"},
+                    {"provider_id": 301, "provider_name": ""}],
+        },
+        "ES": {"link": "https://www.themoviedb.org/movie/550/watch?locale=ES"},
+    },
+}
+
+
+def test_payload_is_encoded_as_small_int_arrays(registry):
+    cp = CompactProviders.from_payload(PAYLOAD)
+    assert cp.countries.dtype == np.uint16
+    assert cp.providers.dtype == np.int32
+    assert cp.kinds.dtype == np.uint8
+
+    cl, us = registry.country_index("CL"), registry.country_index("US")
+    rows = sorted(zip(cp.countries.tolist(), cp.providers.tolist(), cp.kinds.tolist()))
+    k = PROVIDER_KINDS.index
+    assert rows == sorted([
+        (cl, 8, k("flatrate")), (cl, 337, k("flatrate")), (cl, 2, k("rent")), (cl, 2, k("buy")),
+        (us, 8, k("flatrate")), (us, 300, k("ads")),
+    ])
+    assert registry.provider_names == {8: "Netflix", 337: "Disney Plus", 2: "Apple TV", 300: "Pluto TV"}
+    assert set(cp.links) == {cl, registry.country_index("ES")}
+
+
+def test_slicing_by_country(registry):
+    cp = CompactProviders.from_payload(PAYLOAD)
+    assert cp.available_countries() == ["CL", "ES", "US"]
+    assert cp.provider_ids("cl").tolist() == [2, 8, 337]
+    assert cp.for_country("CL") == {
+        "platforms": ["Apple TV", "Disney Plus", "Netflix"],
+        "link": PAYLOAD["results"]["CL"]["link"],
+    }
+    assert cp.for_country("US") == {"platforms": ["Netflix", "Pluto TV"], "link": None}
+    assert cp.for_country("ES") == {"platforms": [], "link": PAYLOAD["results"]["ES"]["link"]}
+    assert cp.for_country("AR") is None                 # país que nadie registró
+    registry.country("MX")
+    assert cp.for_country("MX") is None                 # registrado, pero sin datos
+    assert cp.provider_ids("ZZ").size == 0
+
+
+@pytest.mark.parametrize("payload", [None, {}, {"results": {}}, {"results": None}])
+def test_empty_payloads(payload):
+    cp = CompactProviders.from_payload(payload)
+    assert len(cp.countries) == len(cp.providers) == len(cp.kinds) == 0
+    assert cp.available_countries() == []
+    assert cp.for_country("CL") is None
+    back = pickle.loads(pickle.dumps(cp))
+    assert len(back.providers) == 0 and back.links == {}
+    assert back.for_country("CL") is None
+
+
+def test_pickle_round_trip_in_the_same_process():
+    cp = CompactProviders.from_payload(PAYLOAD)
+    back = pickle.loads(pickle.dumps(cp))
+    for attr in ("countries", "providers", "kinds"):
+        np.testing.assert_array_equal(getattr(back, attr), getattr(cp, attr))
+        assert getattr(back, attr).dtype == getattr(cp, attr).dtype
+    assert back.links == cp.links
+    for code in ("CL", "US", "ES", "AR"):
+        assert back.for_country(code) == cp.for_country(code)
+
+
+def test_pickle_carries_codes_and_names_not_process_indices(monkeypatch):
+    blob = pickle.dumps(CompactProviders.from_payload(PAYLOAD))
+    expected = {code: CompactProviders.from_payload(PAYLOAD).for_country(code) for code in ("CL", "US", "ES")}
+
+    # "otro proceso": registro vacío, con países en otro orden y sin nombres de proveedor
+    other = _Registry()
+    for code in ("BR", "ES", "US"):
+        other.country(code)
+    monkeypatch.setattr(providers, "REGISTRY", other)
+
+    back = pickle.loads(blob)
+    assert other.provider_names == {8: "Netflix", 337: "Disney Plus", 2: "Apple TV", 300: "Pluto TV"}
+    assert other.country_index("CL") == 3
+    assert back.available_countries() == ["CL", "ES", "US"]
+    for code, value in expected.items():
+        assert back.for_country(code) == value
+
+
+# ---------- ProviderIndex ----------
+def _reference(tmdb_ids, catalogs, wanted) -> np.ndarray:
+    """Filtro sin bitsets: np.isin contra la unión de los catálogos descargados."""
+    ids = np.asarray(tmdb_ids, dtype=np.int64)
+    union = [i for pid in wanted if catalogs.get(pid) is not None for i in catalogs[pid]]
+    return np.isin(ids, np.asarray(union, dtype=np.int64)) & (ids >= 0)
+
+
+def _index(tmdb_ids, catalogs) -> ProviderIndex:
+    index = ProviderIndex(tmdb_ids)
+    for pid, ids in catalogs.items():
+        if ids is not None:                 # None = el catálogo no se pudo descargar
+            index.add(pid, ids)
+    return index
+
+
+@pytest.mark.parametrize("n", [0, 1, 7, 8, 9, 13, 1000])
+def test_mask_matches_isin_reference(n):
+    rng = np.random.default_rng(n)
+    tmdb_ids = np.where(rng.random(n) < 0.2, -1, rng.integers(1, 3 * n + 2, n))
+    catalogs = {
+        8: rng.integers(1, 3 * n + 2, n // 2 + 1).tolist(),
+        337: rng.integers(1, 3 * n + 2, n // 3 + 1).tolist(),
+        2: [],
+        300: None,
+    }
+    index = _index(tmdb_ids, catalogs)
+    assert len(index) == n
+    assert index.known == int((tmdb_ids >= 0).sum())
+    for wanted in ([], [8], [337], [8, 337], [8, 2], [300], [8, 300], [999], [8, 337, 2, 300, 999]):
+        mask = index.mask(wanted)
+        assert mask.dtype == bool and mask.shape == (n,)
+        np.testing.assert_array_equal(mask, _reference(tmdb_ids, catalogs, wanted))
+    for pid in (8, 337, 2, 300):
+        assert index.count(pid) == int(_reference(tmdb_ids, catalogs, [pid]).sum())
+
+
+def test_unknown_ids_never_match():
+    tmdb_ids = [-1, 550, -1, 13, 550]
+    index = _index(tmdb_ids, {8: [550, -1], 337: [-1]})
+    assert index.mask([8]).tolist() == [False, True, False, False, True]
+    assert not index.mask([337]).any()
+    assert index.known == 3
+
+
+def test_failed_provider_catalog_is_ignored():
+    index = _index([10, 20, 30], {8: [10], 300: None})
+    assert index.mask([8, 300]).tolist() == [True, False, False]
+    assert not index.mask([300]).any()
+    assert index.count(300) == 0
+    assert 300 not in index.bits
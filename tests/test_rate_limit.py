@@ -0,0 +1,140 @@
+# tests/test_rate_limit.py
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from modules import rate_limit
+from modules.rate_limit import ProviderLimiter, QuotaExceeded, QuotaLedger, TokenBucket
+
+
+class Clock:
+    """time.time / time.sleep falsos: dormir adelanta el reloj."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, s: float) -> None:
+        self.slept.append(s)
+        self.now += s
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(rate_limit.time, "time", c.time)
+    monkeypatch.setattr(rate_limit.time, "sleep", c.sleep)
+    return c
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return QuotaLedger(str(tmp_path / "quota.sqlite3"))
+
+
+# ---------- token bucket ----------
+
+def test_bucket_allows_a_burst_then_paces_at_rate(clock):
+    bucket = TokenBucket(rate=5, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.2)
+    assert bucket.acquire() == pytest.approx(0.2)
+    assert bucket.waited_s == pytest.approx(0.4)
+
+
+def test_bucket_refills_over_time_up_to_burst(clock):
+    bucket = TokenBucket(rate=2, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60          # mucho tiempo sin uso: no acumula más que la ráfaga
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+
+
+def test_bucket_rate_zero_never_waits(clock):
+    bucket = TokenBucket(rate=0, burst=1)
+    assert all(bucket.acquire() == 0.0 for _ in range(100))
+    assert clock.slept == []
+
+
+def test_host_wide_bucket_shares_state_through_the_file(clock, tmp_path):
+    if rate_limit.fcntl is None:
+        pytest.skip("sin fcntl (Windows)")
+    path = str(tmp_path / "ratelimit_omdb.json")
+    a = TokenBucket(rate=1, burst=2, state_path=path)
+    b = TokenBucket(rate=1, burst=2, state_path=path)
+    assert a.acquire() == 0.0
+    assert b.acquire() == 0.0
+    assert a.acquire() == pytest.approx(1.0)
+
+
+# ---------- cuota diaria ----------
+
+def test_ledger_accumulates_per_provider_and_day(ledger):
+    ledger.add("omdb", "2026-01-01", 3)
+    ledger.add("omdb", "2026-01-01", 2)
+    ledger.add("youtube", "2026-01-01", 100)
+    assert ledger.used("omdb", "2026-01-01") == 5
+    assert ledger.used("youtube", "2026-01-01") == 100
+    assert ledger.used("omdb", "2026-01-02") == 0
+
+
+def test_ledger_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "quota.sqlite3")
+    QuotaLedger(path).add("omdb", "2026-01-01", 7)
+    assert QuotaLedger(path).used("omdb", "2026-01-01") == 7
+
+
+def _limiter(ledger, quota=10, reserve=0.2):
+    return ProviderLimiter("omdb", rps=0, burst=1, concurrency=2, daily_quota=quota,
+                           reserve=reserve, ledger=ledger)
+
+
+def test_limiter_stops_at_the_reserve(ledger):
+    lim = _limiter(ledger)               # 10 unidades, 20 % de reserva -> 8 utilizables
+    for _ in range(8):
+        with lim.slot() as charge:
+            charge()
+    assert lim.used_today() == 8
+    with pytest.raises(QuotaExceeded):
+        with lim.slot():
+            pass
+    assert lim.rejected == 1
+
+
+def test_uncharged_slot_returns_its_reservation(ledger):
+    lim = _limiter(ledger, quota=2, reserve=0.0)
+    for _ in range(5):
+        with lim.slot():
+            pass                         # respuesta desde caché: no sale a la red
+    assert lim.used_today() == 0
+    assert not lim.near_limit()
+
+
+def test_quota_resets_on_a_new_day(ledger, monkeypatch):
+    lim = _limiter(ledger, quota=4, reserve=0.0)
+    today = datetime(2026, 3, 1, 23, 59, tzinfo=timezone.utc)
+    monkeypatch.setattr(lim, "day", lambda: today.strftime("%Y-%m-%d"))
+    for _ in range(4):
+        with lim.slot() as charge:
+            charge()
+    assert lim.near_limit()
+
+    today += timedelta(minutes=2)
+    assert lim.used_today() == 0
+    assert not lim.near_limit()
+    with lim.slot() as charge:
+        charge()
+    assert ledger.used("omdb", "2026-03-02") == 1
+    assert ledger.used("omdb", "2026-03-01") == 4
+
+
+def test_seconds_to_reset_counts_to_local_midnight():
+    lim = ProviderLimiter("omdb", rps=0, burst=1, concurrency=0, daily_quota=1)
+    assert 0 < lim.seconds_to_reset() <= 24 * 3600
@@ -0,0 +1,92 @@
+# tests/test_rating_model.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.rating_model import MIN_RATED, RatingModel, featurize
+
+GENRES = ["Drama", "Comedy", "Crime", "Horror", "Sci-Fi", "Romance"]
+DIRECTORS = ["Kubrick", "Varda", "Kurosawa", "Wilder", "Lynch"]
+
+
+@pytest.fixture
+def catalog():
+    rng = np.random.default_rng(7)
+    n = 60
+    df = pd.DataFrame({
+        "Const": [f"tt{i:07d}" for i in range(n)],
+        "Title": [f"Film {i}" for i in range(n)],
+        "Genres": [", ".join(rng.choice(GENRES, size=rng.integers(1, 4), replace=False)) for _ in range(n)],
+        "Directors": rng.choice(DIRECTORS, size=n),
+        "Year": rng.integers(1940, 2025, size=n),
+        "Runtime (mins)": rng.integers(80, 180, size=n).astype(float),
+        "IMDb Rating": rng.uniform(5, 9, size=n).round(1),
+        "Num Votes": rng.integers(1_000, 2_000_000, size=n),
+        "Your Rating": rng.integers(1, 11, size=n).astype(float),
+    })
+    df.loc[df.index[-10:], "Your Rating"] = np.nan
+    return df
+
+
+def _fresh(df: pd.DataFrame) -> RatingModel:
+    model = RatingModel()
+    model.sync(df)
+    return model
+
+
+def _assert_same_fit(incremental: RatingModel, df: pd.DataFrame) -> None:
+    fresh = _fresh(df)
+    assert incremental.n_rated == fresh.n_rated
+    np.testing.assert_allclose(incremental.coef, fresh.coef, atol=1e-8)
+    pd.testing.assert_series_equal(incremental.predict(df), fresh.predict(df))
+
+
+def test_fit_needs_min_rated(catalog):
+    few = catalog.copy()
+    few.loc[few.index[MIN_RATED - 1:], "Your Rating"] = np.nan
+    model = _fresh(few)
+    assert model.n_rated == MIN_RATED - 1
+    assert model.coef is None
+    assert model.predict(few).isna().all()
+
+
+def test_featurize_shape_and_intercept(catalog):
+    X = featurize(catalog)
+    assert X.shape[0] == len(catalog)
+    assert (X[:, 0] == 1.0).all()
+
+
+def test_sync_with_same_catalog_key_is_a_no_op(catalog):
+    model = RatingModel()
+    assert model.sync(catalog, "k1") == 50
+    assert model.sync(catalog, "k1") == 0
+    assert model.sync(catalog, "k2") == 0           # otra clave, mismas notas y features
+
+
+def test_incremental_sync_matches_fresh_fit(catalog):
+    model = _fresh(catalog)
+    df = catalog.copy()
+
+    df.loc[df.index[-3:], "Your Rating"] = [7.0, 9.0, 4.0]       # notas nuevas
+    df.loc[df.index[0], "Your Rating"] = np.nan                  # nota borrada
+    df.loc[df.index[1], "Your Rating"] = 10.0 if df.loc[df.index[1], "Your Rating"] != 10.0 else 1.0
+    df = df.drop(df.index[2])                                    # película quitada del catálogo
+    assert model.sync(df) == 3 + 1 + 2 + 1                     # altas, baja, cambio (resta + suma), quitada
+    _assert_same_fit(model, df)
+
+
+def test_feature_edits_are_resynced(catalog):
+    model = _fresh(catalog)
+    df = catalog.copy()
+
+    df.loc[df.index[3], "Genres"] = "Western"
+    df.loc[df.index[4], "Directors"] = "Akerman"
+    df.loc[df.index[5], "IMDb Rating"] = np.nan
+    df.loc[df.index[6], "Year"] = 1925
+    assert model.sync(df) == 2 * 4                               # se resta y se vuelve a sumar
+    _assert_same_fit(model, df)
+
+    df.loc[df.index[-1], "Num Votes"] = 42                       # sin nota: no entra al ajuste
+    assert model.sync(df) == 0
@@ -0,0 +1,160 @@
+# tests/test_recommender.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.recommender import (
+    ANN_AUTO_MIN_ROWS, LSHIndex, _exact_scores, _seed_from_row, benchmark_ann,
+    build_catalog_features, recommend_for_seeds, recommend_from_catalog, synthetic_catalog,
+)
+
+
+def _baseline_scores(df_all: pd.DataFrame, seed_row) -> list:
+    """Puntaje fila a fila de la versión original de recommend_from_catalog (referencia)."""
+    candidates = df_all[~((df_all["Title"] == seed_row.get("Title")) & (df_all["Year"] == seed_row.get("Year")))]
+    seed_genres = set(seed_row.get("GenreList") or [])
+    seed_dirs = {d.strip() for d in str(seed_row.get("Directors") or "").split(",") if d.strip()}
+    seed_year = seed_row.get("Year")
+    seed_rating = seed_row.get("Your Rating")
+
+    scores = []
+    for idx, r in candidates.iterrows():
+        g2 = set(r.get("GenreList") or [])
+        d2 = {d.strip() for d in str(r.get("Directors") or "").split(",") if d.strip()}
+        score = 0.0
+        score += 2.0 * len(seed_genres & g2)
+        if seed_dirs & d2:
+            score += 3.0
+        y2 = r.get("Year")
+        if pd.notna(seed_year) and pd.notna(y2):
+            score -= min(abs(seed_year - y2) / 10.0, 3.0)
+        r2 = r.get("Your Rating")
+        if pd.notna(seed_rating) and pd.notna(r2):
+            score -= abs(seed_rating - r2) * 0.3
+        imdb_r2 = r.get("IMDb Rating")
+        if pd.notna(imdb_r2):
+            score += (float(imdb_r2) - 6.5) * 0.2
+        scores.append((idx, score))
+    return scores
+
+
+def _baseline_top(df_all: pd.DataFrame, seed_row, top_n: int) -> list:
+    ranked = sorted(_baseline_scores(df_all, seed_row), key=lambda x: x[1], reverse=True)
+    return [(idx, sc) for idx, sc in ranked[:top_n] if sc > 0]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    df = synthetic_catalog(400, seed=3)
+    df.index = pd.RangeIndex(1000, 1000 + len(df))          # etiquetas != posiciones
+    # faltantes y varios directores por película, como en los exports reales
+    df.loc[df.index[::17], "Year"] = np.nan
+    df.loc[df.index[::13], "IMDb Rating"] = np.nan
+    df.loc[df.index[::11], "Directors"] = df["Directors"].iloc[::11] + ", Director 0"
+    df.loc[df.index[::29], "Directors"] = None
+    return df
+
+
+SEEDS = [0, 1, 17, 26, 58, 143, 399]
+
+
+@pytest.mark.parametrize("pos", SEEDS)
+def test_vectorized_scores_match_the_row_by_row_baseline(catalog, pos):
+    seed_row = catalog.iloc[pos]
+    feats = build_catalog_features(catalog)
+    scores = _exact_scores(feats, _seed_from_row(feats, seed_row))
+    expected = dict(_baseline_scores(catalog, seed_row))
+    labels = catalog.index.to_numpy()
+    keep = np.isin(labels, list(expected))
+    np.testing.assert_allclose(scores[keep], [expected[i] for i in labels[keep]], rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("pos", SEEDS)
+def test_exact_recommendations_match_the_baseline_ranking(catalog, pos):
+    seed_row = catalog.iloc[pos]
+    recs = recommend_from_catalog(catalog, seed_row, top_n=8)
+    expected = _baseline_top(catalog, seed_row, 8)
+    assert list(recs.index) == [idx for idx, _ in expected]
+    np.testing.assert_allclose(recs["similarity_score"], [sc for _, sc in expected], atol=1e-12)
+
+
+def test_subset_scores_match_full_scores(catalog):
+    feats = build_catalog_features(catalog)
+    rows = np.array([3, 11, 12, 58, 290, 399])
+    for pos in SEEDS:
+        seed = _seed_from_row(feats, catalog.iloc[pos])
+        np.testing.assert_array_equal(_exact_scores(feats, seed, rows), _exact_scores(feats, seed)[rows])
+
+
+def test_lsh_returns_the_exact_top_k_on_a_small_catalog(catalog):
+    # pocos bits + multi-probe: en un catálogo chico los candidatos cubren el top-k
+    index = LSHIndex(build_catalog_features(catalog), n_tables=16, n_bits=3, n_probes=3)
+    for pos in range(0, len(catalog), 7):
+        seed_row = catalog.iloc[pos]
+        approx = recommend_from_catalog(catalog, seed_row, top_n=10, index=index)
+        exact = recommend_from_catalog(catalog, seed_row, top_n=10)
+        assert list(approx.index) == list(exact.index)
+        np.testing.assert_array_equal(approx["similarity_score"], exact["similarity_score"])
+
+
+def test_lsh_default_config_recall_at_the_auto_threshold():
+    # la app activa el índice desde ANN_AUTO_MIN_ROWS filas; por debajo los buckets quedan casi vacíos
+    df = synthetic_catalog(ANN_AUTO_MIN_ROWS, seed=0)
+    res = benchmark_ann(df, n_queries=40, configs=[{}])
+    assert res["recall@10"].iloc[1] >= 0.9
+
+
+# ---------- recommend_for_seeds ----------
+def _as_pairs(table: pd.DataFrame, seed_idx) -> list:
+    sel = table[table["SeedIdx"] == seed_idx]
+    return list(zip(sel["RecIdx"], sel["similarity_score"]))
+
+
+def test_batch_matches_one_seed_at_a_time(catalog):
+    table = recommend_for_seeds(catalog, SEEDS, top_n=6, chunk_size=3)
+    for pos in SEEDS:
+        single = recommend_from_catalog(catalog, catalog.iloc[pos], top_n=6)
+        pairs = _as_pairs(table, catalog.index[pos])
+        assert [idx for idx, _ in pairs] == list(single.index)
+        np.testing.assert_allclose([sc for _, sc in pairs], single["similarity_score"], atol=1e-12)
+        assert table[table["SeedIdx"] == catalog.index[pos]]["Rank"].tolist() == list(range(1, len(pairs) + 1))
+
+
+def test_seed_is_never_its_own_recommendation():
+    df = pd.DataFrame({
+        "Title": ["Heat", "Heat", "Collateral", "Thief"],
+        "Year": [1995.0, 1986.0, 2004.0, 1981.0],
+        "Your Rating": [9.0, 5.0, 8.0, 8.0],
+        "IMDb Rating": [8.3, 5.0, 7.5, 7.3],
+        "GenreList": [["Crime", "Drama"], ["Crime", "Drama"], ["Crime"], ["Crime", "Drama"]],
+        "Directors": ["Michael Mann", "Dick Richards", "Michael Mann", "Michael Mann"],
+    }, index=[10, 20, 30, 40])
+    table = recommend_for_seeds(df, [0, 2, 3], top_n=10)
+    assert not (table["SeedIdx"] == table["RecIdx"]).any()
+    # mismo título con otro año no es la semilla
+    assert 20 in set(table[table["SeedIdx"] == 10]["RecIdx"])
+    assert set(table[table["SeedIdx"] == 30]["RecIdx"]) == {10, 40}
+
+
+def test_duplicate_seeds_are_computed_once(catalog):
+    once = recommend_for_seeds(catalog, [26, 58], top_n=5)
+    twice = recommend_for_seeds(catalog, [26, 58, 26, 26], top_n=5, chunk_size=2)
+    pd.testing.assert_frame_equal(twice, once)
+
+
+def test_top_n_larger_than_the_candidates():
+    df = synthetic_catalog(12, seed=5)
+    table = recommend_for_seeds(df, range(len(df)), top_n=50)
+    for pos in range(len(df)):
+        pairs = _as_pairs(table, df.index[pos])
+        assert len(pairs) <= len(df) - 1
+        assert [idx for idx, _ in pairs] == list(recommend_from_catalog(df, df.iloc[pos], top_n=50).index)
+        assert all(sc > 0 for _, sc in pairs)
+
+
+def test_no_seeds_or_empty_catalog():
+    cols = ["SeedIdx", "Rank", "RecIdx", "similarity_score"]
+    assert list(recommend_for_seeds(synthetic_catalog(5), [], top_n=3).columns) == cols
+    assert recommend_for_seeds(pd.DataFrame(), [0], top_n=3).empty
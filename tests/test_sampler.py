@@ -0,0 +1,120 @@
+# tests/test_sampler.py
+from __future__ import annotations
+
+import random
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.sampler import (
+    POOL_ALL, POOL_FAVOURITES, POOL_RECENT_TOP, POOL_UNRATED,
+    AliasTable, PickHistory, PoolSampler, build_pool_sampler, pool_mask, rating_weights,
+)
+
+
+def _frequencies(table, n, seed=0):
+    rng = random.Random(seed)
+    counts = Counter(table.sample(rng) for _ in range(n))
+    return np.array([counts[i] for i in range(table.n)]) / n
+
+
+@pytest.mark.parametrize("weights", [
+    [1, 1, 1, 1],
+    [1, 2, 3, 4],
+    [10, 1, 0.5, 0.1, 5],
+    [9 + 1, 8 + 1, 7 + 1, 1, 1, 1, 1, 1],     # nota + 1, como en la app
+])
+def test_alias_table_matches_the_weights(weights):
+    table = AliasTable(weights)
+    expected = np.asarray(weights, dtype=float) / np.sum(weights)
+    freq = _frequencies(table, 200_000)
+    # ~4 desviaciones estándar de una binomial con n = 200k
+    tol = 4 * np.sqrt(expected * (1 - expected) / 200_000)
+    assert np.all(np.abs(freq - expected) <= tol + 1e-9)
+
+
+def test_alias_table_never_samples_zero_or_invalid_weights():
+    table = AliasTable([0, 3, np.nan, -1, 1, np.inf])
+    freq = _frequencies(table, 50_000)
+    assert freq[[0, 2, 3, 5]].sum() == 0
+    assert freq[1] == pytest.approx(0.75, abs=0.01)
+
+
+def test_alias_table_all_zero_falls_back_to_uniform():
+    freq = _frequencies(AliasTable([0, 0, 0, 0]), 40_000)
+    assert np.allclose(freq, 0.25, atol=0.01)
+
+
+def test_alias_table_single_and_empty():
+    assert AliasTable([5]).sample() == 0
+    assert AliasTable([]).n == 0
+
+
+def test_pool_sampler_with_history_does_not_repeat_until_exhausted():
+    pool = PoolSampler(np.array([10, 20, 30, 40, 50]))
+    history = PickHistory()
+    rng = random.Random(1)
+    first = [pool.pick(history, rng) for _ in range(5)]
+    assert sorted(first) == [10, 20, 30, 40, 50]
+    # agotado: el historial se reinicia y el sorteo sigue
+    assert pool.pick(history, rng) in first
+    assert len(history) == 1
+
+
+def test_pick_history_keeps_only_the_last_maxlen_picks():
+    history = PickHistory(maxlen=3)
+    for pos in [1, 2, 3, 4, 5]:
+        history.add(pos)
+    assert len(history) == 3
+    assert 1 not in history and 2 not in history
+    assert all(p in history for p in (3, 4, 5))
+    history.add(5)                        # repetida: no desplaza a nadie
+    assert 3 in history
+
+
+def test_empty_pool_picks_none():
+    assert PoolSampler(np.array([], dtype=int)).pick(PickHistory()) is None
+
+
+@pytest.fixture
+def catalog():
+    return pd.DataFrame({
+        "Title": list("ABCDEF"),
+        "Year": [2024, 1990, 2015, 2020, 1980, 2022],
+        "Your Rating": [9, 10, 8, np.nan, 9, 6],
+        "IMDb Rating": [7.0, 8.5, 6.0, 5.0, np.nan, 7.5],
+    })
+
+
+def test_pool_masks(catalog):
+    assert pool_mask(catalog, POOL_ALL).all()
+    assert pool_mask(catalog, POOL_FAVOURITES).tolist() == [True, True, False, False, True, False]
+    assert pool_mask(catalog, POOL_RECENT_TOP, now_year=2025).tolist() == [True, False, True, False, False, False]
+    assert pool_mask(catalog, POOL_UNRATED).tolist() == [False, False, False, True, False, False]
+    # IMDb mínima: las filas sin nota IMDb no se descartan
+    assert pool_mask(catalog, POOL_ALL, min_imdb=7).tolist() == [True, True, False, False, True, True]
+    with pytest.raises(ValueError):
+        pool_mask(catalog, "desconocido")
+
+
+def test_rating_weights_and_builder(catalog):
+    pos = np.array([0, 3, 5])
+    assert rating_weights(catalog, pos).tolist() == [10.0, 1.0, 7.0]
+    assert rating_weights(catalog, np.array([3])) is None
+    sampler = build_pool_sampler(catalog, POOL_FAVOURITES)
+    assert sorted(sampler.positions) == [0, 1, 4]
+    assert all(sampler.pick() in (0, 1, 4) for _ in range(50))
+
+
+def test_builder_restricts_to_within_and_weights_by_rating(catalog):
+    within = np.array([True, False, True, True, True, True])
+    sampler = build_pool_sampler(catalog, POOL_FAVOURITES, within=within)
+    assert sorted(sampler.positions) == [0, 4]
+    uniform = build_pool_sampler(catalog, POOL_ALL, weighted=False, within=within)
+    assert sorted(uniform.positions) == [0, 2, 3, 4, 5]
+    rng = random.Random(3)
+    counts = Counter(build_pool_sampler(catalog, POOL_ALL).pick(rng=rng) for _ in range(20_000))
+    # nota + 1: la de 10 sale ~11 veces más que la pendiente
+    assert counts[1] / counts[3] == pytest.approx(11, rel=0.25)
@@ -0,0 +1,116 @@
+# tests/test_single_flight.py
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules.single_flight import SingleFlight
+
+N = 12
+
+
+def _run_concurrently(flight, key, fn, n=N):
+    """n llamadas a flight.do(key, fn) que arrancan juntas; devuelve (resultado o excepción)."""
+    start = threading.Barrier(n)
+
+    def call(_):
+        start.wait()
+        try:
+            return flight.do(key, fn)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(call, range(n)))
+
+
+def _gated(result=None, error=None):
+    """Función lenta hasta que se abre la compuerta; cuenta sus ejecuciones."""
+    gate = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        gate.wait(5)
+        if error is not None:
+            raise error
+        return result
+
+    return fn, gate, calls
+
+
+def _release_when_all_waiting(flight, gate, n=N):
+    def waiter():
+        while flight.stats()["coalesced"] < n - 1:
+            threading.Event().wait(0.005)
+        gate.set()
+    t = threading.Thread(target=waiter, daemon=True)
+    t.start()
+    return t
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    payload = {"id": 603}
+    fn, gate, calls = _gated(result=payload)
+    _release_when_all_waiting(flight, gate)
+
+    out = _run_concurrently(flight, "tmdb_find?tt0133093", fn)
+
+    assert len(calls) == 1
+    assert all(res is payload for res, _ in out)
+    assert sorted(shared for _, shared in out) == [False] + [True] * (N - 1)
+    assert flight.stats() == {"leaders": 1, "coalesced": N - 1, "in_flight": 0}
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+    fn, gate, calls = _gated(error=TimeoutError("OMDb no responde"))
+    _release_when_all_waiting(flight, gate)
+
+    out = _run_concurrently(flight, "omdb?i=tt0000001", fn)
+
+    assert len(calls) == 1
+    assert all(isinstance(e, TimeoutError) and str(e) == "OMDb no responde" for e in out)
+    assert flight.in_flight() == 0
+
+
+def test_key_is_released_after_the_call():
+    flight = SingleFlight()
+    calls = []
+    assert flight.do("k", lambda: calls.append(1) or "a") == ("a", False)
+    assert flight.do("k", lambda: calls.append(1) or "b") == ("b", False)
+    assert len(calls) == 2
+
+
+def test_key_is_released_after_an_error():
+    flight = SingleFlight()
+
+    def boom():
+        raise ValueError("x")
+
+    with pytest.raises(ValueError):
+        flight.do("k", boom)
+    assert flight.do("k", lambda: 1) == (1, False)
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    gates = {k: threading.Event() for k in ("a", "b")}
+    started = threading.Barrier(3)
+
+    def slow(k):
+        started.wait(5)
+        gates[k].wait(5)
+        return k
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futs = {k: pool.submit(flight.do, k, lambda k=k: slow(k)) for k in gates}
+        started.wait(5)                  # las dos en vuelo a la vez
+        assert flight.in_flight() == 2
+        for g in gates.values():
+            g.set()
+        assert {k: f.result() for k, f in futs.items()} == {"a": ("a", False), "b": ("b", False)}
+    assert flight.stats()["coalesced"] == 0